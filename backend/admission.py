@@ -0,0 +1,221 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+
+# Threads each worker serves requests with (gunicorn's WEB_THREADS)
+WORKER_THREADS = int(os.environ.get("WEB_THREADS", "4"))
+# Threads expensive endpoints may hold per worker, running or queued; the rest stay free for
+# writes and cheap reads (0 = admission control off)
+HEAVY_THREADS = int(os.environ.get("ADMISSION_HEAVY_THREADS", str(max(1, WORKER_THREADS - 2))))
+# Server-Sent Events streams (/events, /jobs/<id>/events) open at once per worker. Each one
+# holds a thread until the client leaves, so they get what heavy requests leave over minus
+# one thread that stays free for writes and cheap reads.
+STREAM_THREADS = int(os.environ.get("ADMISSION_STREAM_THREADS",
+                                    str(max(0, WORKER_THREADS - max(HEAVY_THREADS, 0) - 1))))
+# Expensive requests running at once per worker, across all gates. They are CPU-bound and
+# share one GIL: a second one adds little throughput and doubles cheap-request latency.
+HEAVY_CONCURRENCY = int(os.environ.get("ADMISSION_HEAVY_CONCURRENCY", "1"))
+# Longest a request waits in a gate's queue before it is shed
+QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "2"))
+# Per-gate overrides, e.g. "analysis=2:4,insights=1:0" (concurrency:queue length)
+LIMITS_OVERRIDE = os.environ.get("ADMISSION_LIMITS", "")
+
+# Gate -> (requests running at once, requests allowed to wait) per worker
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {
+    'analysis': (1, 2),
+    'forecast': (1, 2),
+    'insights': (1, 2),
+    'health': (1, 2),
+    'stats': (1, 2),
+    'dashboard': (2, 2),
+    'market': (1, 1),
+    'projection': (1, 1),
+    'scenarios': (1, 1),
+    'analyze': (1, 2),
+}
+
+
+def parse_limits(text: str) -> Dict[str, Tuple[int, int]]:
+    """'analysis=2:4,insights=1' -> {'analysis': (2, 4), 'insights': (1, 0)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, value = item.partition('=')
+        concurrency, _, queue = value.partition(':')
+        limits[name.strip()] = (max(1, int(concurrency)), max(0, int(queue or 0)))
+    return limits
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, gate: str, reason: str, retry_after: int):
+        super().__init__(f"{gate} is {reason}")
+        self.gate = gate
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Gate:
+    """Limits for one group of expensive routes and what they are using right now"""
+
+    def __init__(self, name: str, limit: int, queue: int):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.running = 0
+        self.queued = 0
+        # Smoothed seconds per request, for Retry-After estimates
+        self.service_time = 0.5
+
+
+class AdmissionController:
+    """Per-route admission control for expensive endpoints.
+
+    Each gate runs at most `limit` requests and queues up to `queue` more,
+    for at most `timeout` seconds each. Across all gates, `concurrency`
+    requests run at once and `heavy_threads` server threads are held
+    (running or queued), and at most `stream_threads` event streams stay
+    open, so neither a burst of analyses nor a few open tabs can occupy
+    every thread of a worker: writes and cheap reads are never gated and
+    always find one free. Queued requests start in arrival order as
+    capacity frees up. Requests that don't fit are shed with a Retry-After
+    estimated from the gate's recent service time. All limits are per
+    worker process.
+    """
+
+    def __init__(self, heavy_threads: int = HEAVY_THREADS, concurrency: int = HEAVY_CONCURRENCY,
+                 timeout: float = QUEUE_TIMEOUT, limits: Dict[str, Tuple[int, int]] = None,
+                 stream_threads: int = STREAM_THREADS):
+        self.heavy_threads = heavy_threads
+        self.stream_threads = stream_threads
+        self.streams = 0
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        limits = {**DEFAULT_LIMITS, **parse_limits(LIMITS_OVERRIDE), **(limits or {})}
+        self._gates = {name: Gate(name, limit, queue) for name, (limit, queue) in limits.items()}
+        # Arrival-ordered [gate, event] pairs not yet admitted
+        self._waiting: List[list] = []
+        self._running = 0
+        self._held = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.heavy_threads > 0
+
+    @contextmanager
+    def admit(self, name: str):
+        """Run the block under gate `name`, waiting in its queue if needed; raises Overloaded when shed"""
+        if not self.enabled:
+            yield
+            return
+        gate = self._gates[name]
+        waited = self._enter(gate)
+        if waited is not None:
+            metrics.observe("admission_wait_seconds", (("gate", name),), waited)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._leave(gate, time.perf_counter() - started)
+
+    def open_stream(self) -> bool:
+        """Reserve a thread for a long-lived stream; False when this worker has none to spare"""
+        with self._lock:
+            admitted = self.streams < self.stream_threads
+            if admitted:
+                self.streams += 1
+            self._record_streams("admitted" if admitted else "overloaded")
+        return admitted
+
+    def close_stream(self):
+        """Release a thread reserved by open_stream()"""
+        with self._lock:
+            self.streams -= 1
+            self._record_streams(None)
+
+    def _enter(self, gate: Gate) -> Optional[float]:
+        """Take a slot; returns the seconds spent queued (None if admitted straight away)"""
+        with self._lock:
+            if self._held >= self.heavy_threads:
+                self._shed(gate, "overloaded")
+            waiter = [gate, threading.Event()]
+            self._waiting.append(waiter)
+            gate.queued += 1
+            self._held += 1
+            self._dispatch()
+            if waiter[1].is_set():
+                self._record(gate, "admitted")
+                return None
+            if gate.queued > gate.queue:
+                self._withdraw(waiter)
+                self._shed(gate, "queue_full")
+            self._record(gate, None)
+
+        started = time.perf_counter()
+        waiter[1].wait(self.timeout)
+        with self._lock:
+            # The slot may have been handed over just as the wait timed out
+            if not waiter[1].is_set():
+                self._withdraw(waiter)
+                self._shed(gate, "timeout")
+            self._record(gate, "queued")
+        return time.perf_counter() - started
+
+    def _leave(self, gate: Gate, seconds: float):
+        with self._lock:
+            gate.service_time += 0.2 * (seconds - gate.service_time)
+            gate.running -= 1
+            self._running -= 1
+            self._held -= 1
+            self._dispatch()
+            self._record(gate, None)
+
+    def _dispatch(self):
+        """Start queued requests, oldest first, while there is capacity; called with the lock held"""
+        for waiter in list(self._waiting):
+            if self._running >= self.concurrency:
+                break
+            gate = waiter[0]
+            if gate.running < gate.limit:
+                self._waiting.remove(waiter)
+                gate.queued -= 1
+                gate.running += 1
+                self._running += 1
+                waiter[1].set()
+                self._record(gate, None)
+
+    def _withdraw(self, waiter: list):
+        self._waiting.remove(waiter)
+        waiter[0].queued -= 1
+        self._held -= 1
+
+    def _shed(self, gate: Gate, reason: str):
+        """Count the rejection and raise; called with the lock held"""
+        self._record(gate, reason)
+        # Time for the requests ahead of this one to drain, at least a second
+        ahead = gate.running + gate.queued + 1
+        retry_after = max(1, math.ceil(ahead * gate.service_time / gate.limit))
+        raise Overloaded(gate.name, reason, retry_after)
+
+    def _record_streams(self, result: Optional[str]):
+        labels = (("gate", "streams"),)
+        if result is not None:
+            metrics.inc("admission_requests_total", labels + (("result", result),))
+        metrics.set_gauge("admission_in_flight", labels, self.streams)
+
+    def _record(self, gate: Gate, result: Optional[str]):
+        labels = (("gate", gate.name),)
+        if result is not None:
+            metrics.inc("admission_requests_total", labels + (("result", result),))
+        metrics.set_gauge("admission_in_flight", labels, gate.running)
+        metrics.set_gauge("admission_queue_depth", labels, gate.queued)
+
+# Global instance
+admission_control = AdmissionController()
@@ -3,6 +3,9 @@ import json
 from collections import Counter, defaultdict
 from typing import Dict, List, Tuple
 
+from metrics import metrics
+from shared_state import shared_state
+
 class ExpenseCategorizer:
     def __init__(self):
         # Predefined category keywords with weights
@@ -49,9 +52,15 @@ class ExpenseCategorizer:
             }
         }
         
-        # User corrections storage
-        self.user_corrections = defaultdict(list)
+        # User corrections live in shared state so every worker learns from them
+        self.corrections_namespace = 'categorizer_corrections'
+    
+    @property
+    def user_corrections(self) -> Dict[str, List[str]]:
+        """Learned corrections: lowercased description -> corrected categories"""
+        return shared_state.items(self.corrections_namespace)
         
+    @metrics.timed('categorize')
     def categorize(self, description: str, user_id: str = None) -> Dict:
         """
         Categorize expense based on description
@@ -111,7 +120,7 @@ class ExpenseCategorizer:
         Learn from user corrections to improve future categorizations
         """
         # Store the correction
-        self.user_corrections[description.lower()].append(correct_category)
+        shared_state.append(self.corrections_namespace, description.lower(), correct_category)
         
         # You could implement more sophisticated learning here
         # For now, we'll just store the corrections
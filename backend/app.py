@@ -1,32 +1,127 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import json
+from contextlib import contextmanager
+from functools import wraps
+import math
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, date
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; writes are then only serialized within a process
+    fcntl = None
 
 # Import AI modules
 from ai_categorizer import categorizer
 from smart_suggestions import suggestions_engine
 from financial_health import health_calculator
 from budget_manager import budget_manager
+from response_cache import response_cache
+from spending_aggregates import aggregate_cache
+from recurring_detector import recurring_detector
+from expense_columns import ExpenseColumns
+from metrics import metrics
+from profiling import request_profiler
+from serialization import serializer
+from compression import response_compressor
+from dashboard import SECTIONS, Snapshot, build_sections
+from events import event_bus, expense_events
+from admission import Overloaded, admission_control
+from jobs import JobRejected, job_runner
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify and request.json through the shared serializer (orjson when installed).
+
+    Responses are compact and keep insertion order; encoding time is
+    recorded as the 'serialize' stage.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return serializer.loads(s)
+
+    def encode(self, obj) -> bytes:
+        with metrics.stage('serialize'):
+            return serializer.dumps(obj)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b"\n", mimetype=self.mimetype)
 
 app = Flask(__name__)
-CORS(app)
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['ETag', 'X-Profile-File', 'Retry-After'])
 
 # Database file
 DB_FILE = 'db.json'
 
 def load_db():
     """Load expenses from JSON file"""
-    if os.path.exists(DB_FILE):
-        with open(DB_FILE, 'r') as f:
-            return json.load(f)
-    return {"expenses": []}
+    return read_db()[0]
+
+def read_db():
+    """Load expenses together with the data version they belong to"""
+    with metrics.stage('store_read'):
+        while True:
+            version = response_cache.sync_data_version()
+            db = serializer.read_file(DB_FILE) if os.path.exists(DB_FILE) else {"expenses": []}
+            # A save landing mid-read moves the version; read again so data and version match
+            if response_cache.sync_data_version() == version:
+                return db, version
 
 def save_db(data):
-    """Save expenses to JSON file"""
-    with open(DB_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    """Save expenses to JSON file and return the new data version.
+
+    Written to a temp file and renamed so other workers never read a half-written file.
+    """
+    with metrics.stage('store_write'):
+        serializer.write_file(DB_FILE, data)
+        return response_cache.bump_data_version()
+
+_db_write_lock = threading.Lock()
+
+@contextmanager
+def edit_db():
+    """Read db.json for a read-modify-write, holding it exclusively until the block ends.
+
+    Threads are serialized by a lock and worker processes by flock() on a
+    lock file, and the data is read after both are held, so concurrent
+    writers can't hand out the same id or overwrite each other's changes.
+    """
+    with _db_write_lock, open(DB_FILE + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield load_db()
+
+def load_aggregates():
+    """Month/category aggregates for the current data version"""
+    db, version = read_db()
+    return aggregate_cache.get(db['expenses'], version)
+
+def record_mutation(event_type, version, expenses, added=None, removed=None):
+    """Patch the incremental indexes with a committed expense change and push it to /events clients"""
+    aggregate_cache.record(version, added=added, removed=removed)
+    recurring_detector.record(version, added=added, removed=removed)
+    expense_events.record(event_type, version, expenses, added=added, removed=removed)
+
+def parse_amount(value):
+    """value as a float, or None if it isn't a finite number.
+
+    The stores are written by orjson, which saves NaN and Infinity as null,
+    so non-finite numbers are refused before they get that far.
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
 
 def get_next_id(expenses):
     """Get next available ID for new expense"""
@@ -34,6 +129,172 @@ def get_next_id(expenses):
         return 1
     return max(expense.get('id', 0) for expense in expenses) + 1
 
+def commit_import(rows):
+    """Add the rows an import job categorized; runs in this process when the job finishes"""
+    with edit_db() as db:
+        first_id = get_next_id(db['expenses'])
+        for offset, row in enumerate(rows):
+            row['id'] = first_id + offset
+        db['expenses'].extend(rows)
+        version = save_db(db)
+    if event_bus.enabled:
+        # Too many changes for a delta; connected clients reload
+        event_bus.publish('reset', {'version': version})
+    return {'imported': len(rows), 'first_id': first_id, 'last_id': first_id + len(rows) - 1, 'version': version}
+
+job_runner.attach(DB_FILE, commits={'import': commit_import})
+
+def current_user():
+    """Who the request is for: the X-User-Id header set by the frontend, else the client address"""
+    return request.headers.get('X-User-Id') or request.remote_addr or 'anonymous'
+
+def load_snapshot():
+    """Current state for the dashboard sections, read once and only when a section needs it"""
+    return Snapshot(read_db)
+
+def section_response(name):
+    """Serve one dashboard section as a standalone endpoint"""
+    try:
+        return jsonify(SECTIONS[name](load_snapshot(), request.args))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def cached_response(view=None, *, vary=None):
+    """Serve a GET analytics view from the version-keyed response cache.
+
+    The ETag is derived from the cache key alone, so a matching
+    If-None-Match is answered with 304 before anything is computed.
+    Compressed bodies are kept with the entry, so each encoding is
+    produced once per data version. `vary` adds a view-specific part to
+    the key for inputs the data versions don't cover. ?refresh=true is
+    always recomputed, and a response the view marks no-store (e.g. one
+    that is only partly complete) is served but not kept.
+    """
+    if view is None:
+        return lambda view: cached_response(view, vary=vary)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response_cache.sync_data_version()
+        key = (
+            request.path,
+            tuple(sorted(request.args.items(multi=True))),
+            response_cache.data_version,
+            budget_manager.current_version(),
+            # Weekly reports and month filters are relative to today
+            date.today().isoformat(),
+            vary() if vary is not None else None
+        )
+        etag = response_cache.make_etag(key)
+        # A profiled request recomputes so the profile shows the real work
+        profiling = 'profiling.profiler' in request.environ
+        refresh = request.args.get('refresh', default='false').lower() == 'true'
+        # Weak comparison: a compressed variant carries W/"<etag>"
+        if not (profiling or refresh) and request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        entry = None if profiling or refresh else response_cache.get(key)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or refresh or response.cache_control.no_store:
+                return response
+            entry = response_cache.put(key, response.get_data(), response.mimetype, etag)
+
+        response = app.response_class(entry['body'], mimetype=entry['mimetype'])
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = 'no-cache'
+        return response_compressor.apply(response, request.accept_encodings, entry['encoded'])
+    return wrapper
+
+def event_stream_response(open_stream, on_close=None):
+    """Serve the Server-Sent Events generator open_stream() returns, or 503 when this worker can't spare a thread.
+
+    A stream holds a server thread until the client leaves, so open streams
+    are capped by admission control alongside the expensive endpoints.
+    """
+    if not admission_control.open_stream():
+        response = jsonify({"error": "Too many event streams, try again later"})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    response = Response(open_stream(), mimetype='text/event-stream')
+    # Runs when the server closes the stream, also if the client left before the first byte
+    response.call_on_close(admission_control.close_stream)
+    if on_close is not None:
+        response.call_on_close(on_close)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def market_refresh_needed():
+    # Market views are only expensive when they have to fetch: stale stats or ?refresh=true
+    if request.args.get('refresh', default='false').lower() == 'true':
+        return True
+    from market_data import stats_version
+    return stats_version()[1]
+
+def admission_gate(name, when=None):
+    """Run an expensive view under its admission gate, or answer 503 with Retry-After when it's full.
+
+    Place it below @cached_response so cache hits and 304s never queue;
+    `when` limits gating to requests that will actually do the heavy work.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if when is not None and not when():
+                return view(*args, **kwargs)
+            try:
+                with admission_control.admit(name):
+                    return view(*args, **kwargs)
+            except Overloaded as e:
+                response = jsonify({"error": "⏳ Server is busy with other analyses, please retry shortly",
+                                    "retry_after": e.retry_after})
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 503
+        return wrapper
+    return decorator
+
+@app.before_request
+def start_request_timer():
+    request.environ['metrics.started'] = time.perf_counter()
+    metrics.begin_trace()
+    if request_profiler.wants_profile(request.headers.get('X-Profile')):
+        profiler = request_profiler.start()
+        if profiler is not None:
+            request.environ['profiling.profiler'] = profiler
+
+@app.after_request
+def record_request_latency(response):
+    """Record latency per route template (not raw path) so label cardinality stays bounded"""
+    started = request.environ.get('metrics.started')
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    profiler = request.environ.pop('profiling.profiler', None)
+    if profiler is not None:
+        response.headers['X-Profile-File'] = request_profiler.finish(profiler, request.method, route)
+    spans = metrics.end_trace()
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        metrics.observe_request(route, request.method, response.status_code, elapsed)
+        request_profiler.log_if_slow(request.method, route, response.status_code, elapsed, spans)
+    return response
+
+@app.after_request
+def compress_response(response):
+    # Registered after the timing hook, so it runs first and its cost is in the latency
+    return response_compressor.apply(response, request.accept_encodings)
+
+@app.teardown_request
+def stop_request_profiler(error=None):
+    # after_request is skipped when a view raises; don't leave the profiler running
+    profiler = request.environ.pop('profiling.profiler', None)
+    if profiler is not None:
+        request_profiler.finish(profiler, request.method, request.path)
+
 @app.route('/expenses', methods=['GET'])
 def get_expenses():
     """Get all expenses"""
@@ -48,35 +309,43 @@ def add_expense():
     """Add a new expense with AI categorization"""
     try:
         data = request.json
-        db = load_db()
         
         # Validate required fields
         required_fields = ['amount', 'description', 'date']
         for field in required_fields:
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
+        try:
+            expense_date = date.fromisoformat(str(data['date'])).isoformat()
+        except ValueError:
+            return jsonify({"error": "date must be an ISO date (YYYY-MM-DD)"}), 400
+        amount = parse_amount(data['amount'])
+        if amount is None:
+            return jsonify({"error": "amount must be a finite number"}), 400
         
         # AI categorization
         description = data['description']
         categorization = categorizer.categorize(description)
         
-        # Create new expense with AI-suggested category
-        new_expense = {
-            'id': get_next_id(db['expenses']),
-            'amount': float(data['amount']),
-            'category': data.get('category', categorization['category']),  # Use provided or AI-suggested
-            'description': description,
-            'date': data['date'],
-            'timestamp': datetime.now().isoformat(),
-            'ai_categorization': {
-                'suggested_category': categorization['category'],
-                'confidence': categorization['confidence'],
-                'alternatives': categorization['alternatives']
+        with edit_db() as db:
+            # Create new expense with AI-suggested category
+            new_expense = {
+                'id': get_next_id(db['expenses']),
+                'amount': amount,
+                'category': data.get('category', categorization['category']),  # Use provided or AI-suggested
+                'description': description,
+                'date': expense_date,
+                'timestamp': datetime.now().isoformat(),
+                'ai_categorization': {
+                    'suggested_category': categorization['category'],
+                    'confidence': categorization['confidence'],
+                    'alternatives': categorization['alternatives']
+                }
             }
-        }
-        
-        db['expenses'].append(new_expense)
-        save_db(db)
+            
+            db['expenses'].append(new_expense)
+            version = save_db(db)
+            record_mutation('expense.added', version, db['expenses'], added=new_expense)
         
         return jsonify(new_expense), 201
     except Exception as e:
@@ -86,14 +355,14 @@ def add_expense():
 def delete_expense(expense_id):
     """Delete an expense by ID"""
     try:
-        db = load_db()
-        
-        # Find and remove expense
-        for i, expense in enumerate(db['expenses']):
-            if expense.get('id') == expense_id:
-                deleted_expense = db['expenses'].pop(i)
-                save_db(db)
-                return jsonify({"message": "Expense deleted", "expense": deleted_expense})
+        with edit_db() as db:
+            # Find and remove expense
+            for i, expense in enumerate(db['expenses']):
+                if expense.get('id') == expense_id:
+                    deleted_expense = db['expenses'].pop(i)
+                    version = save_db(db)
+                    record_mutation('expense.deleted', version, db['expenses'], removed=deleted_expense)
+                    return jsonify({"message": "Expense deleted", "expense": deleted_expense})
         
         return jsonify({"error": "Expense not found"}), 404
     except Exception as e:
@@ -109,16 +378,17 @@ def recategorize_expense(expense_id):
         if not new_category:
             return jsonify({"error": "Missing category"}), 400
         
-        db = load_db()
-        
-        # Find and update expense
-        for expense in db['expenses']:
-            if expense.get('id') == expense_id:
-                # Learn from the correction
-                categorizer.learn_from_correction(expense['description'], new_category)
-                expense['category'] = new_category
-                save_db(db)
-                return jsonify(expense)
+        with edit_db() as db:
+            # Find and update expense
+            for expense in db['expenses']:
+                if expense.get('id') == expense_id:
+                    # Learn from the correction
+                    categorizer.learn_from_correction(expense['description'], new_category)
+                    previous = dict(expense)
+                    expense['category'] = new_category
+                    version = save_db(db)
+                    record_mutation('expense.recategorized', version, db['expenses'], added=expense, removed=previous)
+                    return jsonify(expense)
         
         return jsonify({"error": "Expense not found"}), 404
     except Exception as e:
@@ -137,8 +407,11 @@ def manage_income():
             income = data.get('income')
             if income is None:
                 return jsonify({"error": "Missing income amount"}), 400
+            income = parse_amount(income)
+            if income is None:
+                return jsonify({"error": "income must be a finite number"}), 400
             
-            result = budget_manager.set_monthly_income(float(income))
+            result = budget_manager.set_monthly_income(income)
             return jsonify(result)
         else:
             data = budget_manager.load_budget_data()
@@ -158,8 +431,11 @@ def manage_fixed_costs():
             
             if not category or amount is None:
                 return jsonify({"error": "Missing category or amount"}), 400
+            amount = parse_amount(amount)
+            if amount is None:
+                return jsonify({"error": "amount must be a finite number"}), 400
             
-            result = budget_manager.add_fixed_cost(category, float(amount), description)
+            result = budget_manager.add_fixed_cost(category, amount, description)
             return jsonify(result)
         
         elif request.method == 'DELETE':
@@ -185,8 +461,11 @@ def manage_savings_target():
             percentage = data.get('percentage')
             if percentage is None:
                 return jsonify({"error": "Missing percentage"}), 400
+            percentage = parse_amount(percentage)
+            if percentage is None:
+                return jsonify({"error": "percentage must be a finite number"}), 400
             
-            result = budget_manager.set_savings_target(float(percentage))
+            result = budget_manager.set_savings_target(percentage)
             return jsonify(result)
         else:
             data = budget_manager.load_budget_data()
@@ -194,210 +473,210 @@ def manage_savings_target():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/budget/summary', methods=['GET'])
-def get_budget_summary():
-    """Get comprehensive budget summary"""
+@app.route('/budget/goals', methods=['GET', 'POST', 'DELETE'])
+def manage_budget_goals():
+    """Manage per-category and overall budget goals"""
     try:
-        db = load_db()
-        expenses = db['expenses']
+        if request.method == 'POST':
+            data = request.json
+            goal_type = data.get('type')
+            amount = data.get('amount')
+            
+            if not goal_type or amount is None:
+                return jsonify({"error": "Missing goal type or amount"}), 400
+            
+            try:
+                result = budget_manager.set_budget_goal(
+                    goal_type, float(amount),
+                    category=data.get('category'),
+                    name=data.get('name'),
+                    saved_amount=float(data.get('saved_amount', 0)),
+                    deadline=data.get('deadline')
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify({'budget_goals': result.get('budget_goals', {})})
         
-        budget_summary = budget_manager.calculate_budget_summary(expenses)
-        budget_alerts = budget_manager.get_budget_alerts(expenses)
+        elif request.method == 'DELETE':
+            goal_id = request.args.get('id')
+            if not goal_id:
+                return jsonify({"error": "Missing goal id"}), 400
+            
+            result = budget_manager.remove_budget_goal(goal_id)
+            return jsonify({'budget_goals': result.get('budget_goals', {})})
         
-        return jsonify({
-            'budget_summary': budget_summary,
-            'alerts': budget_alerts
-        })
+        else:
+            # Usually already built for this version; only a miss reads and parses db.json
+            aggregates = aggregate_cache.peek(response_cache.sync_data_version()) or load_aggregates()
+            goal_status = budget_manager.get_goal_status(aggregates)
+            data = budget_manager.load_budget_data()
+            return jsonify({'budget_goals': data.get('budget_goals', {}), 'status': goal_status})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/budget/summary', methods=['GET'])
+@cached_response
+def get_budget_summary():
+    """Get comprehensive budget summary"""
+    return section_response('summary')
+
 @app.route('/budget/analysis', methods=['GET'])
+@cached_response
+@admission_gate('analysis')
 def get_budget_analysis():
-    """Get long-term budget analysis (3-4 months)"""
-    try:
-        db = load_db()
-        expenses = db['expenses']
-        
-        months = request.args.get('months', type=int, default=4)
-        spending_analysis = budget_manager.analyze_spending_patterns(expenses, months)
-        savings_recommendations = budget_manager.generate_savings_recommendations(expenses)
-        
-        return jsonify({
-            'spending_analysis': spending_analysis,
-            'savings_recommendations': savings_recommendations
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    """Get long-term budget analysis (default 4 months, any window size)"""
+    if request.args.get('months', type=int, default=4) < 1:
+        return jsonify({"error": "months must be at least 1"}), 400
+    return section_response('analysis')
+
+@app.route('/budget/forecast', methods=['GET'])
+@cached_response
+@admission_gate('forecast')
+def get_budget_forecast():
+    """Get per-category month-end and next-N-month spend projections"""
+    return section_response('forecast')
+
+@app.route('/budget/recurring', methods=['GET'])
+@cached_response
+def get_recurring_expenses():
+    """Detect recurring charges and suggest them as fixed costs"""
+    return section_response('recurring')
 
 @app.route('/budget/recommendations', methods=['GET'])
+@cached_response
 def get_savings_recommendations():
     """Get AI-powered savings recommendations"""
-    try:
-        db = load_db()
-        expenses = db['expenses']
-        
-        recommendations = budget_manager.generate_savings_recommendations(expenses)
-        
-        return jsonify(recommendations)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return section_response('recommendations')
 
 
 @app.route('/budget/variable-expenses', methods=['GET'])
 def get_variable_expenses():
     """Get variable expenses for the current month"""
-    try:
-        db = load_db()
-        expenses = db['expenses']
-        
-        # Get current month
-        current_month = datetime.now().strftime('%Y-%m')
-        
-        # Filter expenses for current month (excluding fixed costs)
-        variable_expenses = []
-        for expense in expenses:
-            expense_date = expense.get('date', '')
-            if expense_date.startswith(current_month):
-                # Check if this is not a fixed cost category
-                if expense.get('category') not in ['Rent', 'Mortgage', 'Electricity', 'Water', 'Internet', 'Phone', 'Insurance', 'Subscriptions', 'Loan Payments']:
-                    variable_expenses.append(expense)
-        
-        return jsonify({
-            'variable_expenses': variable_expenses,
-            'month': current_month,
-            'total_amount': sum(exp['amount'] for exp in variable_expenses)
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return section_response('variable_expenses')
 
 
 @app.route('/budget/investment-recommendations', methods=['GET'])
+@admission_gate('market', when=market_refresh_needed)
 def get_investment_recommendations():
     """Get AI-powered investment recommendations with expected returns"""
+    return section_response('investment_recommendations')
+
+@app.route('/budget/projection', methods=['POST'])
+@admission_gate('projection')
+def get_savings_projection():
+    """Simulate a savings plan and return p5/p50/p95 wealth bands per year"""
     try:
-        from market_data import get_market_recommendations
-        db = load_db()
-        expenses = db['expenses']
-        
-        # Get budget data for savings rate
-        budget_data = budget_manager.load_budget_data()
-        monthly_income = budget_data.get('monthly_income', 0)
-        
-        # Calculate current savings rate
-        if monthly_income > 0:
-            total_expenses = sum(exp['amount'] for exp in expenses)
-            current_savings_rate = (monthly_income - total_expenses) / monthly_income
-        else:
-            current_savings_rate = 0.1  # Default 10%
+        from market_data import get_savings_projection as simulate_projection
+        data = request.json or {}
+
+        if 'years' not in data:
+            return jsonify({"error": "years is required"}), 400
+        if 'monthly_contribution' not in data and 'contributions' not in data:
+            return jsonify({"error": "monthly_contribution or contributions is required"}), 400
+
+        years = int(data['years'])
+        paths = data.get('paths')
+        if not 1 <= years <= 60:
+            return jsonify({"error": "years must be between 1 and 60"}), 400
+        if paths is not None and not 100 <= int(paths) <= 200000:
+            return jsonify({"error": "paths must be between 100 and 200000"}), 400
+
+        try:
+            projection = simulate_projection(
+                years,
+                monthly_contribution=float(data.get('monthly_contribution', 0)),
+                risk_level=data.get('risk_level', 'balanced'),
+                initial=float(data.get('initial', 0)),
+                contribution_growth=float(data.get('contribution_growth', 0)),
+                contributions=data.get('contributions'),
+                target=float(data['target']) if data.get('target') is not None else None,
+                method=data.get('method', 'auto'),
+                paths=int(paths) if paths is not None else None,
+                seed=data.get('seed'),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(projection)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/budget/portfolio-analytics', methods=['GET'])
+@admission_gate('market', when=market_refresh_needed)
+def get_portfolio_analytics():
+    """Get multi-horizon ticker metrics, correlations and suggested allocations"""
+    try:
+        from market_data import get_portfolio_analytics as build_portfolio_analytics
         
         refresh = request.args.get('refresh', default='false').lower() == 'true'
-        recommendations = get_market_recommendations(monthly_income, current_savings_rate, refresh=refresh)
-        recommendations['savings_rate'] = round(current_savings_rate * 100, 2)
-        return jsonify(recommendations)
+        return jsonify(build_portfolio_analytics(refresh=refresh))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/analyze', methods=['POST'])
+@admission_gate('analyze')
 def analyze():
-    """Enhanced analyze endpoint with AI insights"""
+    """Enhanced analyze endpoint with AI insights.
+    
+    Accepts JSON with parallel `expenses`/`categories` (and optional `dates`)
+    arrays, NDJSON (one [amount, category, date] per line) or a NumPy .npz
+    body; for the latter two, income comes from the query string.
+    """
     try:
-        data = request.json
-        expenses = data.get('expenses', [])
-        categories = data.get('categories', [])
-        income = data.get('income')
-
-        if not expenses:
+        mimetype = request.mimetype
+        try:
+            if mimetype in ('application/x-ndjson', 'application/jsonl'):
+                columns = ExpenseColumns.from_ndjson(request.get_data())
+                income = request.args.get('income', type=float)
+            elif mimetype in ('application/x-npz', 'application/octet-stream'):
+                columns = ExpenseColumns.from_npz(request.get_data())
+                income = request.args.get('income', type=float)
+            else:
+                data = request.json
+                columns = ExpenseColumns.from_lists(
+                    data.get('expenses', []), data.get('categories', []), data.get('dates')
+                )
+                income = data.get('income')
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid expense data: {e}"}), 400
+
+        if not len(columns):
             return jsonify({"error": "No expenses to analyze"}), 400
 
         # Basic calculations
-        total = sum(expenses)
-        average = total / len(expenses) if expenses else 0
-
-        # Category breakdown
-        category_totals = {}
-        for i, category in enumerate(categories):
-            if category in category_totals:
-                category_totals[category] += expenses[i]
-            else:
-                category_totals[category] = expenses[i]
+        total = float(columns.amounts.sum())
+        average = total / len(columns)
 
-        # Convert to expense objects for AI analysis
-        expense_objects = []
-        for i, amount in enumerate(expenses):
-            expense_objects.append({
-                'amount': amount,
-                'category': categories[i] if i < len(categories) else 'Other',
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'description': f'Expense {i+1}'
-            })
+        # Category breakdown and AI analysis work on the arrays directly
+        totals = columns.category_totals()
+        counts = columns.category_counts()
+        category_totals = {name: float(totals[i]) for i, name in enumerate(columns.categories) if counts[i]}
 
-        # Get AI insights
-        insights = suggestions_engine.analyze_spending_patterns(expense_objects, income)
-        
-        # Get financial health score
-        health_data = health_calculator.calculate_comprehensive_health(expense_objects, income)
+        insights = suggestions_engine.analyze_columns(columns, income)
+        health_data = health_calculator.calculate_health_columns(columns, income)
 
         return jsonify({
             "total": round(total, 2),
             "average": round(average, 2),
             "categories": category_totals,
+            **columns.summary(),
             "insights": insights['insights'],
             "suggestions": insights['suggestions'],
             "health_score": health_data['overall_score'],
             "health_grade": health_data['grade'],
             "health_status": health_data['status'],
-            "health_recommendations": health_data['recommendations']
+            "health_recommendations": health_data['recommendations'],
+            "health_trend": health_data['trend']
         })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/ai/insights', methods=['GET'])
+@cached_response
+@admission_gate('insights')
 def get_ai_insights():
     """Get comprehensive AI insights for all expenses"""
-    try:
-        db = load_db()
-        expenses = db['expenses']
-        
-        if not expenses:
-            return jsonify({
-                "message": "No expenses to analyze",
-                "insights": [],
-                "suggestions": [],
-                "health_score": 0
-            })
-        
-        # Get income from request (you might want to store this in user profile)
-        income = request.args.get('income', type=float)
-        
-        # Get AI insights
-        insights = suggestions_engine.analyze_spending_patterns(expenses, income)
-        
-        # Get financial health
-        health_data = health_calculator.calculate_comprehensive_health(expenses, income)
-        
-        # Get weekly report
-        weekly_report = suggestions_engine.generate_weekly_report(expenses, income)
-        
-        # Get anomalies
-        anomalies = suggestions_engine.detect_anomalies(expenses)
-        
-        return jsonify({
-            "insights": insights['insights'],
-            "suggestions": insights['suggestions'],
-            "health_score": health_data['overall_score'],
-            "health_grade": health_data['grade'],
-            "health_status": health_data['status'],
-            "health_components": health_data['components'],
-            "health_recommendations": health_data['recommendations'],
-            "health_trend": health_data['trend'],
-            "weekly_report": weekly_report,
-            "anomalies": anomalies,
-            "total_expenses": len(expenses)
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return section_response('insights')
 
 @app.route('/ai/categorize', methods=['POST'])
 def categorize_description():
@@ -417,74 +696,207 @@ def categorize_description():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/ai/health', methods=['GET'])
+@cached_response
+@admission_gate('health')
 def get_financial_health():
     """Get detailed financial health analysis"""
+    return section_response('health')
+
+@app.route('/ai/health/scenarios', methods=['POST'])
+@admission_gate('scenarios')
+def evaluate_health_scenarios():
+    """Score a batch of what-if scenarios against the current expenses"""
     try:
+        data = request.json or {}
+        if 'scenarios' not in data and 'grid' not in data:
+            return jsonify({"error": "Provide scenarios or grid"}), 400
+        
         db = load_db()
         expenses = db['expenses']
         
-        # Get optional parameters
-        income = request.args.get('income', type=float)
-        savings = request.args.get('savings', type=float, default=0)
-        debt = request.args.get('debt', type=float, default=0)
-        
-        health_data = health_calculator.calculate_comprehensive_health(
-            expenses, income, savings, debt
+        base = dict(data.get('base') or {})
+        if base.get('income') is None:
+            monthly_income = budget_manager.load_budget_data().get('monthly_income', 0)
+            base['income'] = monthly_income or None
+        
+        try:
+            columns, categories, multipliers = health_calculator.build_scenarios(
+                base, data.get('scenarios'), data.get('grid')
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Row 0 is the unchanged baseline, the rest are the requested scenarios
+        baseline = {
+            'income': float(base['income']) if base['income'] is not None else np.nan,
+            'savings': float(base.get('savings') or 0),
+            'debt': float(base.get('debt') or 0)
+        }
+        result = health_calculator.evaluate_scenarios(
+            expenses,
+            *(np.concatenate([[baseline[f]], columns[f]]) for f in ('income', 'savings', 'debt')),
+            categories,
+            np.vstack([np.ones((1, len(categories))), multipliers]),
+            data.get('investments')
         )
+        scores = result['overall_score']
+        best = int(np.argmax(scores[1:])) if len(scores) > 1 else 0
         
-        return jsonify(health_data)
+        def column(values):
+            return np.where(np.isnan(values), None, np.round(values, 2)).tolist()
+        
+        return jsonify({
+            "count": len(scores) - 1,
+            "baseline": {
+                "overall_score": round(float(scores[0]), 1),
+                "grade": str(result['grade'][0])
+            },
+            "scores": np.round(scores[1:], 1).tolist(),
+            "grades": result['grade'][1:].tolist(),
+            "components": {name: values[1:].tolist() for name, values in result['components'].items()},
+            "inputs": {
+                "income": column(columns['income']),
+                "savings": column(columns['savings']),
+                "debt": column(columns['debt']),
+                "category_multipliers": {c: multipliers[:, i].tolist() for i, c in enumerate(categories)}
+            },
+            "best": {
+                "index": best,
+                "overall_score": round(float(scores[best + 1]), 1),
+                "grade": str(result['grade'][best + 1]),
+                "improvement": round(float(scores[best + 1] - scores[0]), 1)
+            }
+        })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/stats', methods=['GET'])
+@cached_response
+@admission_gate('stats')
 def get_stats():
     """Get expense statistics with AI insights"""
+    return section_response('stats')
+
+def requested_sections():
+    """Section names from ?sections=a,b (or repeated ?section=), in order and without duplicates"""
+    names = [name.strip() for value in request.args.getlist('sections') for name in value.split(',')]
+    names += request.args.getlist('section')
+    return list(dict.fromkeys(name for name in names if name))
+
+def dashboard_market_version():
+    # Cached dashboards with market data must change when the market stats do
+    if 'investment_recommendations' not in requested_sections():
+        return None
+    from market_data import stats_version
+    return stats_version()
+
+@app.route('/dashboard', methods=['GET'])
+@cached_response(vary=dashboard_market_version)
+@admission_gate('dashboard')
+def get_dashboard():
+    """Several views in one response, computed from a single read of the data.
+
+    ?sections= takes any of the names in SECTIONS; the other query args
+    (income, savings, debt, months) apply as on the standalone endpoints.
+    """
     try:
-        db = load_db()
-        expenses = db['expenses']
-
-        if not expenses:
-            return jsonify({
-                "total_expenses": 0,
-                "average_expense": 0,
-                "total_categories": 0,
-                "most_expensive_category": None,
-                "recent_expenses": [],
-                "ai_insights": []
-            })
-
-        # Calculate totals
-        total_amount = sum(exp['amount'] for exp in expenses)
-        average_amount = total_amount / len(expenses)
-
-        # Category analysis
-        category_totals = {}
-        for exp in expenses:
-            cat = exp['category']
-            category_totals[cat] = category_totals.get(cat, 0) + exp['amount']
-
-        most_expensive_category = max(category_totals.items(), key=lambda x: x[1]) if category_totals else None
-
-        # Recent expenses (last 5)
-        recent_expenses = sorted(expenses, key=lambda x: x['timestamp'], reverse=True)[:5]
+        names = requested_sections()
+        if not names:
+            return jsonify({"error": "Provide sections", "available": list(SECTIONS)}), 400
+        unknown = [name for name in names if name not in SECTIONS]
+        if unknown:
+            return jsonify({"error": f"Unknown sections: {', '.join(unknown)}", "available": list(SECTIONS)}), 400
+        
+        result = build_sections(load_snapshot(), names, request.args)
+        response = jsonify(result)
+        if result['errors']:
+            # Don't keep a partial dashboard for the rest of the data version
+            response.cache_control.no_store = True
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Get AI insights
-        insights = suggestions_engine.analyze_spending_patterns(expenses)
+@app.route('/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events: a compact delta after every committed expense change.
+
+    Each event has the changed expense, updated month/category totals,
+    anomaly flags that appeared or cleared and the health score change.
+    A `reset` event means the client missed changes and should reload.
+    """
+    if not event_bus.enabled:
+        return jsonify({"error": "Events are disabled"}), 404
+    last_event_id = request.headers.get('Last-Event-ID')
+
+    def open_events():
+        event_bus.subscribe()
+        return event_bus.stream(last_event_id)
+    return event_stream_response(open_events, on_close=event_bus.unsubscribe)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Start a background job: {"type": "analysis" | "anomaly_backfill" | "import", "params": {...}}.
+
+    Returns 202 with the job to poll, or 200 when an identical job on the
+    same data has already finished.
+    """
+    try:
+        data = request.json or {}
+        if 'type' not in data:
+            return jsonify({"error": "type is required"}), 400
+        try:
+            job = job_runner.submit(data['type'], data.get('params'), current_user(),
+                                    response_cache.sync_data_version(), budget_manager.current_version())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except JobRejected as e:
+            response = jsonify({"error": f"⏳ Too many jobs in progress ({e}), wait for one to finish"})
+            response.headers['Retry-After'] = '5'
+            return response, 429
+
+        response = jsonify(job)
+        response.headers['Location'] = f"/jobs/{job['id']}"
+        return response, 200 if job['status'] == 'done' else 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        return jsonify({
-            "total_expenses": round(total_amount, 2),
-            "average_expense": round(average_amount, 2),
-            "total_categories": len(category_totals),
-            "most_expensive_category": most_expensive_category[0] if most_expensive_category else None,
-            "category_breakdown": category_totals,
-            "recent_expenses": recent_expenses,
-            "ai_insights": insights['insights'][:3],  # Top 3 insights
-            "ai_suggestions": insights['suggestions'][:3]  # Top 3 suggestions
-        })
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status and progress"""
+    try:
+        job = job_runner.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """A finished job's result; 202 with the job while it is still running"""
+    try:
+        job = job_runner.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        if job['status'] == 'failed':
+            return jsonify({"error": job.get('error', 'Job failed'), "job": job}), 409
+        if job['status'] != 'done':
+            return jsonify(job), 202
+        return jsonify(job_runner.result(job_id))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job(job_id):
+    """Server-Sent Events: `progress` as the job advances, then `done` or `failed`"""
+    return event_stream_response(lambda: job_runner.stream(job_id))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics: request latency, internal stage timings and cache hit ratios"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Development server only; production runs wsgi.py under gunicorn
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1')
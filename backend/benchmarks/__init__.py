@@ -0,0 +1,6 @@
+"""Load and performance benchmarks for the backend.
+
+Run from the backend directory, e.g. ``python -m benchmarks.investment_load``.
+``benchmarks.suite`` covers every engine function and endpoint on histories
+from ``benchmarks.synthetic`` and compares runs against a saved baseline.
+"""
@@ -0,0 +1,144 @@
+"""Drive /budget/investment-recommendations under concurrency against the replay provider.
+
+Each scenario resets the market cache and the on-disk price store, then
+fires requests from a pool of client threads and reports latency
+percentiles, throughput and how many provider calls were made:
+
+    python -m benchmarks.investment_load --threads 16 --requests 400 --latency 0.3
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+import market_data
+from market_providers import ReplayProvider
+
+
+def _reset_market_state(store_dir: str):
+    market_data._CACHE["data"] = None
+    market_data._CACHE["ts"] = 0.0
+    market_data.shared_state.path = os.path.join(store_dir, "shared_state.db")
+    market_data._BREAKER.record_success()
+    market_data.price_store.directory = store_dir
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _drive(client_factory: Callable, path: str, threads: int, requests: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        client = client_factory()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "statuses": statuses,
+    }
+
+
+def run(threads: int = 16, requests: int = 400, latency: float = 0.3, jitter: float = 0.1,
+        error_rate: float = 0.0) -> Dict[str, Any]:
+    """Run every scenario and return their results keyed by scenario name"""
+    from app import app
+
+    path = "/budget/investment-recommendations"
+    results = {}
+
+    def scenario(name: str, provider: ReplayProvider, prepare: Callable = None, query: str = ""):
+        with tempfile.TemporaryDirectory() as store_dir:
+            _reset_market_state(store_dir)
+            market_data.set_provider(provider)
+            if prepare:
+                prepare()
+            provider.calls = 0
+            result = _drive(app.test_client, path + query, threads, requests)
+            # Let a background refresh finish so its provider calls are counted
+            time.sleep(max(0.0, latency + jitter) + 0.05)
+            result["provider_calls"] = provider.calls
+            result["breaker_state"] = market_data._BREAKER.state
+            results[name] = result
+
+    def replay(**overrides) -> ReplayProvider:
+        options = dict(latency=latency, jitter=jitter, error_rate=error_rate, seed=1)
+        options.update(overrides)
+        return ReplayProvider(**options)
+
+    def warm():
+        market_data.get_market_recommendations(1000, 0.2)
+
+    def warm_then_expire():
+        warm()
+        market_data._CACHE["ts"] -= market_data.CACHE_TTL + 1
+
+    scenario("cold_cache", replay())
+    scenario("warm_cache", replay(), prepare=warm)
+    scenario("stale_cache", replay(), prepare=warm_then_expire)
+    scenario("forced_refresh", replay(), prepare=warm, query="?refresh=true")
+    scenario("slow_provider_cold", replay(latency=market_data.TICKER_TIMEOUT + 1, jitter=0.0))
+    scenario("failing_provider_cold", replay(error_rate=1.0))
+
+    market_data.set_provider(market_data.provider_from_env())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.3, help="replay provider latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random latency per call (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of provider calls that fail")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.threads, args.requests, args.latency, args.jitter, args.error_rate)
+
+    print(f"{'scenario':<24}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'calls':>7}  breaker")
+    for name, r in results.items():
+        print(f"{name:<24}{r['throughput_rps']:>8}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['max_ms']:>10}{r['provider_calls']:>7}  {r['breaker_state']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""Benchmark every engine function and HTTP endpoint on seeded synthetic histories.
+
+Each size gets a fresh working directory (db.json, budget file, price
+store) filled from benchmarks.synthetic, market data comes
+from the offline replay provider, and endpoints are driven through the
+Flask test client. GET endpoints are measured cold: the data version is
+bumped before every call (untimed) so caches rebuild as after a write.
+
+    python -m benchmarks.suite --sizes 1k,10k,100k --save baseline.json
+    python -m benchmarks.suite --sizes 1k,10k,100k --compare baseline.json
+
+--compare exits with status 1 when a benchmark's median is more than
+--threshold slower than the baseline (and by more than --min-delta-ms,
+so microsecond jitter doesn't count). Dict-based engines and endpoints
+are skipped above --max-record-rows; the array-based paths (/analyze
+with NPZ, analyze_columns, calculate_health_columns) run at every size,
+up to 10m. Baselines are only comparable on the same machine and Python.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import app as app_module
+import market_data
+from ai_categorizer import categorizer
+from budget_manager import budget_manager
+from financial_health import health_calculator
+from forecasting import spend_forecaster
+from market_providers import ReplayProvider
+from profiling import request_profiler
+from recurring_detector import RecurringDetector
+from response_cache import response_cache
+from smart_suggestions import suggestions_engine
+from spending_aggregates import MonthlyAggregates
+
+from benchmarks.synthetic import SyntheticHistory, generate_history, parse_size
+
+INCOME = 3500.0
+
+# name, callable taking the setup result, optional untimed setup
+Benchmark = Tuple[str, Callable[[Any], Any], Optional[Callable[[], Any]]]
+
+
+def measure(func: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None, min_time: float = 0.5,
+            min_runs: int = 3, max_runs: int = 200) -> Dict[str, float]:
+    """Run func until min_time has been spent (at least min_runs, at most max_runs); stats in ms"""
+    samples: List[float] = []
+    spent = 0.0
+    while len(samples) < max_runs and (len(samples) < min_runs or spent < min_time):
+        state = setup() if setup is not None else None
+        started = time.perf_counter()
+        func(state)
+        elapsed = time.perf_counter() - started
+        samples.append(elapsed)
+        spent += elapsed
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "min_ms": round(min(samples) * 1000, 4),
+    }
+
+
+def _isolate(workdir: str, seed: int, end: str):
+    """Point the stores at workdir and the market layer at the replay provider.
+
+    Shared state stays put for the whole run: data versions must keep
+    increasing or version-keyed caches would serve an earlier size's results.
+    """
+    app_module.DB_FILE = os.path.join(workdir, "db.json")
+    budget_manager.budget_file = os.path.join(workdir, "budget_data.json")
+    market_data.price_store.directory = workdir
+    market_data._CACHE["data"] = None
+    market_data._CACHE["ts"] = 0.0
+    market_data._BREAKER.record_success()
+    market_data.set_provider(ReplayProvider(seed=seed, end=end))
+    response_cache.clear()
+
+
+def _seed_budget():
+    budget_manager.set_monthly_income(INCOME)
+    budget_manager.add_fixed_cost("Rent", 950, "Apartment")
+    budget_manager.add_fixed_cost("Internet", 39.99)
+    budget_manager.set_savings_target(0.2)
+    budget_manager.set_budget_goal("category_cap", 400, category="Food")
+    budget_manager.set_budget_goal("savings_milestone", 5000, name="Emergency fund", saved_amount=1200)
+
+
+def _scenario_grid() -> Dict[str, Any]:
+    # 10 x 10 x 10 = 1000 scenarios
+    return {"income": [2500 + 250 * i for i in range(10)],
+            "savings": [1000 * i for i in range(10)],
+            "category_multipliers": {"Food": [0.5 + 0.1 * i for i in range(10)]}}
+
+
+def fixed_benchmarks(history: SyntheticHistory) -> List[Benchmark]:
+    """Benchmarks whose cost doesn't depend on the history size"""
+    descriptions = history.descriptions_sample(1000, seed=1)
+
+    def categorize_all(_):
+        for description in descriptions:
+            categorizer.categorize(description)
+
+    def add_goal():
+        budget_manager.set_budget_goal("category_cap", 250, category="Shopping")
+        return "category:Shopping"
+
+    return [
+        ("engine/categorizer.categorize x1000", categorize_all, None),
+        ("engine/budget_manager.set_monthly_income", lambda _: budget_manager.set_monthly_income(INCOME), None),
+        ("engine/budget_manager.add_fixed_cost", lambda _: budget_manager.add_fixed_cost("Phone", 25), None),
+        ("engine/budget_manager.remove_fixed_cost", lambda _: budget_manager.remove_fixed_cost("Phone"),
+         lambda: budget_manager.add_fixed_cost("Phone", 25)),
+        ("engine/budget_manager.set_savings_target", lambda _: budget_manager.set_savings_target(0.2), None),
+        ("engine/budget_manager.set_budget_goal", lambda _: add_goal(), None),
+        ("engine/budget_manager.remove_budget_goal",
+         lambda goal_id: budget_manager.remove_budget_goal(goal_id),
+         add_goal),
+        ("engine/market_data.get_savings_projection",
+         lambda _: market_data.get_savings_projection(10, 300, paths=20000, seed=1), None),
+    ]
+
+
+def record_benchmarks(history: SyntheticHistory, records: List[Dict]) -> List[Benchmark]:
+    """Engine functions that take the expense list as dicts"""
+    aggregates = MonthlyAggregates.from_expenses(records)
+    summary = budget_manager.calculate_budget_summary(records)
+    columns, categories, multipliers = health_calculator.build_scenarios({"income": INCOME}, grid=_scenario_grid())
+    return [
+        ("engine/suggestions.analyze_spending_patterns",
+         lambda _: suggestions_engine.analyze_spending_patterns(records, INCOME), None),
+        ("engine/suggestions.generate_weekly_report",
+         lambda _: suggestions_engine.generate_weekly_report(records, INCOME), None),
+        ("engine/suggestions.detect_anomalies", lambda _: suggestions_engine.detect_anomalies(records), None),
+        ("engine/health.calculate_comprehensive_health",
+         lambda _: health_calculator.calculate_comprehensive_health(records, INCOME, 10000, 5000), None),
+        ("engine/health.evaluate_scenarios x1000",
+         lambda _: health_calculator.evaluate_scenarios(records, columns["income"], columns["savings"],
+                                                        columns["debt"], categories, multipliers), None),
+        ("engine/budget_manager.calculate_budget_summary",
+         lambda _: budget_manager.calculate_budget_summary(records), None),
+        ("engine/budget_manager.analyze_spending_patterns",
+         lambda _: budget_manager.analyze_spending_patterns(records, 4, aggregates), None),
+        ("engine/budget_manager.generate_savings_recommendations",
+         lambda _: budget_manager.generate_savings_recommendations(records, summary), None),
+        ("engine/budget_manager.get_budget_alerts", lambda _: budget_manager.get_budget_alerts(records, summary), None),
+        ("engine/budget_manager.get_goal_status", lambda _: budget_manager.get_goal_status(aggregates), None),
+        ("engine/aggregates.from_expenses", lambda _: MonthlyAggregates.from_expenses(records), None),
+        ("engine/forecaster.forecast", lambda _: spend_forecaster.forecast(aggregates), None),
+        ("engine/recurring_detector.scan", lambda _: RecurringDetector().get(records, 1), None),
+    ]
+
+
+def column_benchmarks(history: SyntheticHistory) -> List[Benchmark]:
+    """Array-based engine paths; cheap enough for every size"""
+    columns = history.columns()
+    return [
+        ("engine/suggestions.analyze_columns", lambda _: suggestions_engine.analyze_columns(columns, INCOME), None),
+        ("engine/health.calculate_health_columns",
+         lambda _: health_calculator.calculate_health_columns(columns, INCOME, 10000, 5000), None),
+    ]
+
+
+def _npz_body(history: SyntheticHistory) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(buffer, amounts=history.amounts, codes=history.category_codes,
+             categories=np.array(history.categories), dates=history.dates)
+    return buffer.getvalue()
+
+
+def endpoint_benchmarks(client, history: SyntheticHistory, with_records: bool) -> List[Benchmark]:
+    """Every route through the test client; with_records=False keeps only the array-based ones"""
+    npz = _npz_body(history)
+    benchmarks: List[Benchmark] = [
+        ("http/POST /analyze (npz)",
+         lambda _: client.post("/analyze", data=npz, content_type="application/x-npz",
+                               query_string={"income": INCOME}), None),
+    ]
+    if not with_records:
+        return benchmarks
+
+    def cold():
+        response_cache.bump_data_version()
+
+    def get(path: str, query: Optional[Dict] = None) -> Benchmark:
+        return (f"http/GET {path}", lambda _: client.get(path, query_string=query), cold)
+
+    def post(path: str, body: Dict, label: str = "") -> Benchmark:
+        return (f"http/POST {path}{label}", lambda _: client.post(path, json=body), None)
+
+    analyze_body = {"expenses": history.amounts.tolist(),
+                    "categories": [history.categories[code] for code in history.category_codes.tolist()],
+                    "dates": history.dates.astype(str).tolist(), "income": INCOME}
+    last_id = len(history)
+    new_expense = {"amount": 12.5, "description": "Starbucks coffee", "date": str(history.dates[-1])}
+
+    def add_expense():
+        return client.post("/expenses", json=new_expense).get_json()["id"]
+
+    return benchmarks + [
+        get("/expenses"),
+        post("/expenses", new_expense),
+        ("http/DELETE /expenses/<id>", lambda expense_id: client.delete(f"/expenses/{expense_id}"), add_expense),
+        ("http/PUT /expenses/<id>/categorize",
+         lambda _: client.put(f"/expenses/{last_id}/categorize", json={"category": "Education"}), None),
+        get("/budget/income"),
+        post("/budget/income", {"income": INCOME}),
+        get("/budget/fixed-costs"),
+        post("/budget/fixed-costs", {"category": "Phone", "amount": 25}),
+        ("http/DELETE /budget/fixed-costs", lambda _: client.delete("/budget/fixed-costs?category=Phone"),
+         lambda: client.post("/budget/fixed-costs", json={"category": "Phone", "amount": 25})),
+        get("/budget/savings-target"),
+        post("/budget/savings-target", {"percentage": 0.2}),
+        get("/budget/goals"),
+        post("/budget/goals", {"type": "category_cap", "amount": 250, "category": "Shopping"}),
+        ("http/DELETE /budget/goals", lambda _: client.delete("/budget/goals?id=category:Travel"),
+         lambda: client.post("/budget/goals", json={"type": "category_cap", "amount": 250, "category": "Travel"})),
+        get("/budget/summary"),
+        get("/budget/analysis"),
+        get("/budget/forecast"),
+        get("/budget/recurring"),
+        get("/budget/recommendations"),
+        get("/budget/variable-expenses"),
+        get("/budget/investment-recommendations"),
+        post("/budget/projection", {"years": 10, "monthly_contribution": 300, "paths": 20000, "seed": 1}),
+        get("/budget/portfolio-analytics"),
+        post("/analyze", analyze_body, " (json)"),
+        get("/ai/insights", {"income": INCOME}),
+        post("/ai/categorize", {"description": "Uber ride to airport"}),
+        get("/ai/health", {"income": INCOME, "savings": 10000, "debt": 5000}),
+        post("/ai/health/scenarios", {"base": {"income": INCOME}, "grid": _scenario_grid()}, " x1000"),
+        get("/stats"),
+        get("/metrics"),
+    ]
+
+
+def run(sizes: List[str], seed: int = 7, min_time: float = 0.5, max_record_rows: int = 1_000_000,
+        only: Optional[str] = None, end: Optional[str] = None, log=print) -> Dict[str, Any]:
+    """Run the suite and return {"meta": ..., "results": {"<size>/<group>/<name>": stats}}"""
+    end = end or time.strftime("%Y-%m-%d")
+    results: Dict[str, Dict[str, float]] = {}
+    client = app_module.app.test_client()
+    # Slow-request logging would only add noise (and time) to the measurements
+    request_profiler.slow_ms = 0
+
+    def execute(prefix: str, benchmarks: List[Benchmark]):
+        for name, func, setup in benchmarks:
+            key = f"{prefix}/{name}"
+            if only and only not in key:
+                continue
+            results[key] = measure(func, setup, min_time)
+            log(f"  {key:<64} {results[key]['median_ms']:>11.3f} ms  ({results[key]['runs']} runs)")
+
+    root = tempfile.TemporaryDirectory(prefix="finance-bench-")
+    market_data.shared_state.path = os.path.join(root.name, "shared_state.db")
+    try:
+        for index, label in enumerate(sizes):
+            rows = parse_size(label)
+            workdir = os.path.join(root.name, label)
+            os.makedirs(workdir)
+            _isolate(workdir, seed, end)
+            _seed_budget()
+            started = time.perf_counter()
+            history = generate_history(rows, seed=seed, end=end)
+            with_records = rows <= max_record_rows
+            records = history.records() if with_records else None
+            log(f"{label}: {rows} rows generated in {time.perf_counter() - started:.2f}s"
+                + ("" if with_records else " (dict-based benchmarks skipped)"))
+            app_module.save_db({"expenses": records if with_records else []})
+
+            if index == 0:
+                execute("fixed", fixed_benchmarks(history))
+            if with_records:
+                execute(label, record_benchmarks(history, records))
+            execute(label, column_benchmarks(history))
+            execute(label, endpoint_benchmarks(client, history, with_records))
+    finally:
+        root.cleanup()
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+            "seed": seed,
+            "end": end,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25,
+            min_delta_ms: float = 0.1) -> List[Dict[str, Any]]:
+    """Pair current and baseline medians; status is regression, improvement, ok, new or missing"""
+    rows = []
+    base_results, current_results = baseline["results"], current["results"]
+    for key in sorted(set(base_results) | set(current_results)):
+        before, after = base_results.get(key), current_results.get(key)
+        if before is None or after is None:
+            rows.append({"benchmark": key, "status": "new" if before is None else "missing"})
+            continue
+        old, new = before["median_ms"], after["median_ms"]
+        ratio = new / old if old else float("inf")
+        status = "ok"
+        if abs(new - old) >= min_delta_ms:
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 / (1 + threshold):
+                status = "improvement"
+        rows.append({"benchmark": key, "status": status, "baseline_ms": old, "current_ms": new,
+                     "ratio": round(ratio, 3)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k", help="comma-separated row counts: 1k,10k,100k,1m,10m")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--end", help="last date of the synthetic history (default today)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent per benchmark")
+    parser.add_argument("--max-record-rows", type=int, default=1_000_000,
+                        help="skip dict-based benchmarks for larger sizes")
+    parser.add_argument("--filter", help="only run benchmarks whose key contains this text")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown flagged as regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="ignore differences smaller than this")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    # Compare on the same data the baseline was generated from
+    end = args.end or (baseline["meta"]["end"] if baseline else None)
+    seed = baseline["meta"]["seed"] if baseline and args.seed == parser.get_default("seed") else args.seed
+
+    results = run(args.sizes.split(","), seed, args.min_time, args.max_record_rows, args.filter, end)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {len(results['results'])} results to {args.save}")
+    if baseline is None:
+        return
+
+    rows = compare(results, baseline, args.threshold, args.min_delta_ms)
+    print(f"\n{'benchmark':<64} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}  status")
+    for row in rows:
+        if "ratio" in row:
+            print(f"{row['benchmark']:<64} {row['baseline_ms']:>12.3f} {row['current_ms']:>12.3f} "
+                  f"{row['ratio']:>7.2f}  {row['status']}")
+        elif not args.filter:
+            print(f"{row['benchmark']:<64} {'':>12} {'':>12} {'':>7}  {row['status']}")
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
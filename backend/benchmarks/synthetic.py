@@ -0,0 +1,181 @@
+"""Seeded generator of realistic expense histories for benchmarks.
+
+Histories are built as arrays, so even 10M rows take seconds; dict records
+(the shape db.json and most engines use) are only materialized on request:
+
+    history = generate_history(100_000, seed=7)
+    history.records()      # [{'id', 'amount', 'category', 'description', 'date'}, ...]
+    history.columns()      # ExpenseColumns for the array-based code paths
+
+The same seed, size, years and end date always give the same history.
+Dates run back `years` from `end` (default today, so "this month" and
+"this week" views see data).
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_categorizer import categorizer
+from expense_columns import ExpenseColumns
+
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Share of variable transactions and lognormal (median, sigma) amount per category
+CATEGORY_PROFILES: Dict[str, Tuple[float, float, float]] = {
+    "Food": (0.34, 14.0, 0.7),
+    "Transport": (0.16, 18.0, 0.8),
+    "Shopping": (0.17, 45.0, 1.0),
+    "Entertainment": (0.10, 22.0, 0.8),
+    "Bills": (0.05, 60.0, 0.6),
+    "Healthcare": (0.06, 35.0, 0.9),
+    "Education": (0.04, 55.0, 0.9),
+    "Travel": (0.04, 180.0, 1.0),
+}
+# Descriptions matching no keyword, so the categorizer's fallback path is exercised too
+UNCATEGORIZED = ["POS purchase", "Card payment misc", "Transfer", "ATM withdrawal", "Cash"]
+UNCATEGORIZED_SHARE = 0.04
+
+# Monthly bills: description, category, amount, relative jitter, day of month
+RECURRING_BILLS = [
+    ("Rent", "Bills", 950.0, 0.0, 1),
+    ("Electricity bill", "Bills", 62.0, 0.25, 18),
+    ("Internet subscription", "Bills", 39.99, 0.0, 5),
+    ("Phone bill", "Bills", 25.0, 0.05, 9),
+    ("Netflix", "Entertainment", 15.99, 0.0, 12),
+    ("Spotify", "Entertainment", 10.99, 0.0, 21),
+    ("Gym membership", "Healthcare", 29.9, 0.0, 3),
+]
+
+_CITIES = ["Berlin", "Munich", "Hamburg", "Cologne", "Vienna", "Zurich"]
+
+
+class SyntheticHistory:
+    """An expense history as sorted parallel arrays plus string vocabularies"""
+
+    def __init__(self, amounts: np.ndarray, category_codes: np.ndarray, categories: List[str],
+                 description_codes: np.ndarray, descriptions: List[str], dates: np.ndarray):
+        self.amounts = amounts
+        self.category_codes = category_codes
+        self.categories = categories
+        self.description_codes = description_codes
+        self.descriptions = descriptions
+        self.dates = dates
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def columns(self) -> ExpenseColumns:
+        return ExpenseColumns(self.amounts, self.category_codes, self.categories, self.dates)
+
+    def records(self, limit: Optional[int] = None) -> List[Dict]:
+        """The newest `limit` rows (all by default) as db.json expense dicts"""
+        start = 0 if limit is None else max(0, len(self) - limit)
+        amounts = self.amounts[start:].tolist()
+        categories = [self.categories[code] for code in self.category_codes[start:].tolist()]
+        descriptions = [self.descriptions[code] for code in self.description_codes[start:].tolist()]
+        dates = self.dates[start:].astype(str).tolist()
+        return [
+            {"id": index, "amount": amount, "category": category, "description": description, "date": day}
+            for index, (amount, category, description, day)
+            in enumerate(zip(amounts, categories, descriptions, dates), start=start + 1)
+        ]
+
+    def descriptions_sample(self, count: int, seed: int = 0) -> List[str]:
+        """Random descriptions from the history, e.g. as categorizer inputs"""
+        rng = np.random.default_rng(seed)
+        picks = rng.integers(0, len(self), size=count)
+        return [self.descriptions[code] for code in self.description_codes[picks].tolist()]
+
+
+def _merchant_vocabulary(rng: np.random.Generator) -> Tuple[List[str], List[int], List[str]]:
+    """Merchant-like descriptions built from the categorizer's own keywords"""
+    descriptions, owners = [], []
+    names = list(CATEGORY_PROFILES)
+    for code, category in enumerate(names):
+        keywords = categorizer.category_keywords[category]
+        for merchant in keywords["high_weight"]:
+            title = merchant.title()
+            descriptions.append(title)
+            descriptions.append(f"{title} #{int(rng.integers(100, 9999))}")
+            descriptions.append(f"{title} {_CITIES[int(rng.integers(len(_CITIES)))]}")
+            owners.extend([code] * 3)
+        for word in keywords["medium_weight"]:
+            descriptions.append(f"{word.capitalize()} {rng.choice(keywords['low_weight'])}")
+            owners.append(code)
+    return descriptions, owners, names
+
+
+def generate_history(rows: int, seed: int = 0, years: int = 3, end: Optional[str] = None) -> SyntheticHistory:
+    """Generate `rows` expenses over `years` years ending at `end`, sorted by date"""
+    rng = np.random.default_rng(seed)
+    last_day = np.datetime64(end or date.today().isoformat(), "D")
+    first_day = last_day - np.timedelta64(int(round(365.25 * years)), "D")
+    span = int((last_day - first_day).astype(int)) + 1
+
+    descriptions, owners, categories = _merchant_vocabulary(rng)
+    owners = np.asarray(owners)
+    category_index = {name: code for code, name in enumerate(categories)}
+    other_code = len(categories)
+    categories = categories + ["Other"]
+
+    # Recurring bills: one row per bill per month, at most half the history
+    months = np.arange(first_day.astype("datetime64[M]"), last_day.astype("datetime64[M]") + 1)
+    bill_rows = []
+    for description, category, amount, jitter, day in RECURRING_BILLS:
+        descriptions.append(description)
+        days = months.astype("datetime64[D]") + (day - 1)
+        days = days[(days >= first_day) & (days <= last_day)]
+        amounts = amount * (1 + jitter * rng.uniform(-1, 1, size=len(days)))
+        bill_rows.append((np.round(amounts, 2), np.full(len(days), category_index[category]),
+                          np.full(len(days), len(descriptions) - 1), days))
+    bill_amounts, bill_codes, bill_descriptions, bill_days = (np.concatenate(parts) for parts in zip(*bill_rows))
+    if len(bill_amounts) > rows // 2:
+        keep = np.sort(rng.choice(len(bill_amounts), size=rows // 2, replace=False))
+        bill_amounts, bill_codes, bill_descriptions, bill_days = (
+            bill_amounts[keep], bill_codes[keep], bill_descriptions[keep], bill_days[keep])
+
+    # Variable spending: category by share, amount lognormal around the category median
+    count = rows - len(bill_amounts)
+    shares = np.array([profile[0] for profile in CATEGORY_PROFILES.values()])
+    shares = shares / shares.sum() * (1 - UNCATEGORIZED_SHARE)
+    codes = rng.choice(other_code + 1, size=count, p=np.append(shares, UNCATEGORIZED_SHARE))
+    medians = np.log([profile[1] for profile in CATEGORY_PROFILES.values()] + [30.0])
+    sigmas = np.array([profile[2] for profile in CATEGORY_PROFILES.values()] + [1.0])
+    amounts = np.round(rng.lognormal(medians[codes], sigmas[codes]), 2).clip(0.5)
+
+    # A description owned by the row's category (or a keyword-free one for Other)
+    first_uncategorized = len(descriptions)
+    descriptions.extend(UNCATEGORIZED)
+    description_codes = np.empty(count, dtype=np.intp)
+    for code in range(other_code + 1):
+        rows_in = np.flatnonzero(codes == code)
+        if code == other_code:
+            choices = np.arange(first_uncategorized, len(descriptions))
+        else:
+            choices = np.flatnonzero(owners == code)
+        description_codes[rows_in] = rng.choice(choices, size=len(rows_in))
+
+    # Busier on weekends (weekday 0 = Monday; 1970-01-01 was a Thursday)
+    weekday = (first_day.astype(int) + np.arange(span) + 3) % 7
+    weights = np.where(weekday >= 5, 1.4, 1.0)
+    offsets = rng.choice(span, size=count, p=weights / weights.sum())
+    days = first_day + offsets.astype("timedelta64[D]")
+
+    amounts = np.concatenate([amounts, bill_amounts])
+    codes = np.concatenate([codes, bill_codes]).astype(np.intp)
+    description_codes = np.concatenate([description_codes, bill_descriptions]).astype(np.intp)
+    days = np.concatenate([days, bill_days])
+    order = np.argsort(days, kind="stable")
+    return SyntheticHistory(amounts[order], codes[order], categories, description_codes[order],
+                            descriptions, days[order])
+
+
+def parse_size(text: str) -> int:
+    """'10k' / '1m' / '2500' -> row count"""
+    text = text.strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
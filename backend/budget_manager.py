@@ -1,8 +1,17 @@
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Optional
 from collections import defaultdict
-import json
+import calendar
+import copy
+import math
 import os
+import threading
+
+import numpy as np
+
+from serialization import serializer
+from shared_state import shared_state
+from spending_aggregates import MonthlyAggregates, month_index, month_from_index
 
 class BudgetManager:
     def __init__(self):
@@ -11,28 +20,69 @@ class BudgetManager:
             'Rent', 'Mortgage', 'Electricity', 'Water', 'Internet', 
             'Phone', 'Insurance', 'Subscriptions', 'Loan Payments'
         ]
+        # Shared counter bumped whenever the budget state changes (a save by
+        # any worker or an external edit of the file) so caches can key on it
+        self.version = 0
+        self._data = None
+        self._file_stamp = None
+        self._lock = threading.RLock()
         
+    def _stat_file(self):
+        """Return an (mtime, size) stamp for the budget file, or None if missing"""
+        try:
+            stat = os.stat(self.budget_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
     def load_budget_data(self) -> Dict:
-        """Load budget data from JSON file"""
-        if os.path.exists(self.budget_file):
-            with open(self.budget_file, 'r') as f:
-                return json.load(f)
-        return {
-            'monthly_income': 0,
-            'fixed_costs': {},
-            'budget_goals': {},
-            'savings_target': 0.2,  # 20% default savings target
-            'created_at': datetime.now().isoformat()
-        }
+        """Return the in-memory budget state, reloading only when the file changed on disk.
+
+        The returned dict is shared; callers that modify it must go through
+        save_budget_data (the setters below work on a copy).
+        """
+        with self._lock:
+            version = shared_state.counter('budget')
+            stamp = self._stat_file()
+            if self._data is None or stamp != self._file_stamp or version != self.version:
+                if stamp is not None:
+                    self._data = serializer.read_file(self.budget_file)
+                else:
+                    self._data = {
+                        'monthly_income': 0,
+                        'fixed_costs': {},
+                        'budget_goals': {},
+                        'savings_target': 0.2,  # 20% default savings target
+                        'created_at': datetime.now().isoformat()
+                    }
+                if self._file_stamp is not None and stamp != self._file_stamp and version == self.version:
+                    # Edited outside the app: publish the change to the other workers
+                    version = shared_state.increment('budget')
+                self._file_stamp = stamp
+                self.version = version
+            return self._data
+
+    def current_version(self) -> int:
+        """Return the budget state version after checking the file for external edits"""
+        with self._lock:
+            self.load_budget_data()
+            return self.version
+
+    def _edit_budget_data(self) -> Dict:
+        """Return a private copy of the budget state for a setter to modify and save"""
+        return copy.deepcopy(self.load_budget_data())
     
     def save_budget_data(self, data: Dict):
-        """Save budget data to JSON file"""
-        with open(self.budget_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Atomically persist budget data (temp file + rename) and make it the in-memory state"""
+        with self._lock:
+            serializer.write_file(self.budget_file, data)
+            self._data = data
+            self._file_stamp = self._stat_file()
+            self.version = shared_state.increment('budget')
     
     def set_monthly_income(self, income: float) -> Dict:
         """Set monthly income"""
-        data = self.load_budget_data()
+        data = self._edit_budget_data()
         data['monthly_income'] = income
         data['updated_at'] = datetime.now().isoformat()
         self.save_budget_data(data)
@@ -40,7 +90,7 @@ class BudgetManager:
     
     def add_fixed_cost(self, category: str, amount: float, description: str = "") -> Dict:
         """Add or update a fixed cost"""
-        data = self.load_budget_data()
+        data = self._edit_budget_data()
         data['fixed_costs'][category] = {
             'amount': amount,
             'description': description,
@@ -52,7 +102,7 @@ class BudgetManager:
     
     def remove_fixed_cost(self, category: str) -> Dict:
         """Remove a fixed cost"""
-        data = self.load_budget_data()
+        data = self._edit_budget_data()
         if category in data['fixed_costs']:
             del data['fixed_costs'][category]
             data['updated_at'] = datetime.now().isoformat()
@@ -61,12 +111,135 @@ class BudgetManager:
     
     def set_savings_target(self, percentage: float) -> Dict:
         """Set savings target percentage"""
-        data = self.load_budget_data()
+        data = self._edit_budget_data()
         data['savings_target'] = max(0, min(1, percentage))  # Ensure between 0-1
         data['updated_at'] = datetime.now().isoformat()
         self.save_budget_data(data)
         return data
     
+    def set_budget_goal(self, goal_type: str, amount: float, category: str = None,
+                        name: str = None, saved_amount: float = 0, deadline: str = None) -> Dict:
+        """Add or update a budget goal
+
+        Goal types:
+            category_cap      - monthly spending cap for one category
+            monthly_cap       - monthly spending cap across all categories
+            monthly_savings   - amount to keep unspent each month
+            savings_milestone - named savings target (e.g. 5000€ emergency fund)
+        """
+        goal_id = self._goal_id(goal_type, category, name)
+        if not math.isfinite(amount) or amount < 0:
+            raise ValueError('amount must be a non-negative number')
+        if not math.isfinite(saved_amount) or saved_amount < 0:
+            raise ValueError('saved_amount must be a non-negative number')
+        if deadline is not None:
+            try:
+                deadline = date.fromisoformat(str(deadline)).isoformat()
+            except ValueError:
+                raise ValueError('deadline must be an ISO date (YYYY-MM-DD)') from None
+        data = self._edit_budget_data()
+        goals = data.setdefault('budget_goals', {})
+        goal = {
+            'type': goal_type,
+            'amount': amount,
+            'created_at': goals.get(goal_id, {}).get('created_at', datetime.now().isoformat())
+        }
+        if goal_type == 'category_cap':
+            goal['category'] = category
+        if goal_type == 'savings_milestone':
+            goal['name'] = name
+            goal['saved_amount'] = saved_amount
+            goal['deadline'] = deadline
+        goals[goal_id] = goal
+        data['updated_at'] = datetime.now().isoformat()
+        self.save_budget_data(data)
+        return data
+    
+    def remove_budget_goal(self, goal_id: str) -> Dict:
+        """Remove a budget goal"""
+        data = self._edit_budget_data()
+        if goal_id in data.get('budget_goals', {}):
+            del data['budget_goals'][goal_id]
+            data['updated_at'] = datetime.now().isoformat()
+            self.save_budget_data(data)
+        return data
+    
+    def _goal_id(self, goal_type: str, category: str = None, name: str = None) -> str:
+        """Stable key for a goal so setting it again updates instead of duplicating"""
+        if goal_type == 'category_cap':
+            if not category:
+                raise ValueError('category_cap goals need a category')
+            return f'category:{category}'
+        if goal_type == 'monthly_cap':
+            return 'overall'
+        if goal_type == 'monthly_savings':
+            return 'savings'
+        if goal_type == 'savings_milestone':
+            if not name:
+                raise ValueError('savings_milestone goals need a name')
+            return f'milestone:{name}'
+        raise ValueError(f'Unknown goal type: {goal_type}')
+    
+    def get_goal_status(self, aggregates: MonthlyAggregates, today: Optional[date] = None) -> List[Dict]:
+        """Progress of every goal for the current month
+
+        Reads month/category totals from the incrementally maintained
+        aggregates, so the cost is O(goals) regardless of expense count.
+        """
+        data = self.load_budget_data()
+        goals = data.get('budget_goals', {})
+        today = today or date.today()
+        month = today.strftime('%Y-%m')
+        month_totals = aggregates.totals.get(month, {})
+        month_spent = sum(month_totals.values())
+        fixed_total = sum(cost['amount'] for cost in data.get('fixed_costs', {}).values())
+        month_elapsed = today.day / calendar.monthrange(today.year, today.month)[1]
+        
+        status = []
+        for goal_id, goal in goals.items():
+            amount = goal['amount']
+            entry = {'id': goal_id, 'type': goal['type'], 'target': amount, 'month': month}
+            if goal['type'] in ('category_cap', 'monthly_cap'):
+                if goal['type'] == 'category_cap':
+                    spent = month_totals.get(goal['category'], 0.0)
+                    entry['category'] = goal['category']
+                else:
+                    spent = month_spent
+                entry['current'] = round(spent, 2)
+                entry['remaining'] = round(amount - spent, 2)
+                entry['progress'] = round(spent / amount * 100, 1) if amount > 0 else None
+                if spent > amount:
+                    entry['status'] = 'breached'
+                elif amount > 0 and spent / amount > max(0.8, month_elapsed):
+                    # Ahead of the month's pace and close to the cap
+                    entry['status'] = 'at_risk'
+                else:
+                    entry['status'] = 'on_track'
+            elif goal['type'] == 'monthly_savings':
+                saved = data.get('monthly_income', 0) - fixed_total - month_spent
+                entry['current'] = round(saved, 2)
+                entry['remaining'] = round(amount - saved, 2)
+                entry['progress'] = round(saved / amount * 100, 1) if amount > 0 else None
+                entry['status'] = 'breached' if saved < amount else 'on_track'
+            else:
+                saved = goal.get('saved_amount', 0)
+                entry['name'] = goal.get('name')
+                entry['current'] = round(saved, 2)
+                entry['remaining'] = round(max(0.0, amount - saved), 2)
+                entry['progress'] = round(saved / amount * 100, 1) if amount > 0 else None
+                entry['deadline'] = goal.get('deadline')
+                entry['status'] = 'achieved' if saved >= amount else 'in_progress'
+                if goal.get('deadline') and saved < amount:
+                    deadline = date.fromisoformat(goal['deadline'])
+                    months_left = (deadline.year - today.year) * 12 + deadline.month - today.month
+                    if months_left <= 0:
+                        entry['status'] = 'breached'
+                    else:
+                        entry['required_monthly'] = round((amount - saved) / months_left, 2)
+            status.append(entry)
+        
+        return status
+    
     def calculate_budget_summary(self, expenses: List[Dict]) -> Dict[str, Any]:
         """Calculate comprehensive budget summary"""
         data = self.load_budget_data()
@@ -106,20 +279,22 @@ class BudgetManager:
         
         return budget_breakdown
     
-    def analyze_spending_patterns(self, expenses: List[Dict], months: int = 4) -> Dict[str, Any]:
-        """Analyze spending patterns over multiple months"""
+    def analyze_spending_patterns(self, expenses: List[Dict], months: int = 4,
+                                  aggregates: Optional[MonthlyAggregates] = None) -> Dict[str, Any]:
+        """Analyze spending patterns over multiple months
+
+        Works on month/category aggregates, so the cost depends on the number
+        of months and categories, not expenses. Pass cached aggregates to
+        skip even the single bucketing pass.
+        """
         if not expenses:
             return {'message': 'No expenses to analyze'}
         
-        # Group expenses by month
-        monthly_expenses = defaultdict(list)
-        for exp in expenses:
-            date = datetime.fromisoformat(exp['date'])
-            month_key = f"{date.year}-{date.month:02d}"
-            monthly_expenses[month_key].append(exp)
+        if aggregates is None:
+            aggregates = MonthlyAggregates.from_expenses(expenses)
         
         # Get last N months
-        sorted_months = sorted(monthly_expenses.keys(), reverse=True)[:months]
+        sorted_months = aggregates.months()[::-1][:months]
         
         analysis = {
             'months_analyzed': len(sorted_months),
@@ -128,13 +303,18 @@ class BudgetManager:
             'trends': {},
             'recommendations': []
         }
-        
+        if not sorted_months:
+            # months < 1, or no expense has a usable date
+            analysis.update(category_trends={}, month_over_month={}, year_over_year={},
+                            category_slopes={}, seasonality={})
+            return analysis
+
         # Calculate monthly totals and averages
         for month in sorted_months:
-            month_expenses = monthly_expenses[month]
-            total = sum(exp['amount'] for exp in month_expenses)
+            total = aggregates.month_total(month)
+            count = aggregates.month_count(month)
             analysis['monthly_totals'][month] = total
-            analysis['monthly_averages'][month] = total / len(month_expenses) if month_expenses else 0
+            analysis['monthly_averages'][month] = total / count if count else 0
         
         # Analyze trends
         if len(sorted_months) >= 2:
@@ -152,22 +332,80 @@ class BudgetManager:
                 analysis['recommendations'].append("📊 Your spending is stable. Consider setting savings goals.")
         
         # Category analysis over time
-        category_trends = defaultdict(list)
+        analysis['category_trends'] = {
+            month: dict(aggregates.totals[month]) for month in sorted_months
+        }
+        
+        # Month-over-month and year-over-year deltas against the calendar
+        # month one month / twelve months earlier, when it has data
+        analysis['month_over_month'] = {}
+        analysis['year_over_year'] = {}
         for month in sorted_months:
-            month_expenses = monthly_expenses[month]
-            category_totals = defaultdict(float)
-            for exp in month_expenses:
-                category_totals[exp['category']] += exp['amount']
-            category_trends[month] = dict(category_totals)
+            total = analysis['monthly_totals'][month]
+            for key, offset in (('month_over_month', 1), ('year_over_year', 12)):
+                reference = month_from_index(month_index(month) - offset)
+                if reference in aggregates.totals:
+                    reference_total = aggregates.month_total(reference)
+                    analysis[key][month] = {
+                        'compared_to': reference,
+                        'change': round(total - reference_total, 2),
+                        'change_percent': round((total - reference_total) / reference_total * 100, 1) if reference_total else None
+                    }
+        
+        # Per-category slopes (EUR/month) and seasonality over the analyzed
+        # calendar window, zero-filling months without spending
+        categories, window, matrix = aggregates.category_matrix(sorted_months[-1], sorted_months[0])
+        analysis['category_slopes'] = {}
+        if len(window) >= 2:
+            x = np.arange(len(window), dtype=float)
+            x -= x.mean()
+            slopes = (matrix - matrix.mean(axis=1, keepdims=True)) @ x / (x @ x)
+            analysis['category_slopes'] = {
+                cat: round(float(slope), 2) for cat, slope in zip(categories, slopes)
+            }
+            rising = [cat for cat, slope in analysis['category_slopes'].items() if slope > 0 and slope * len(window) > matrix[categories.index(cat)].mean()]
+            if rising:
+                analysis['recommendations'].append(f"📈 Steadily rising categories: {', '.join(rising)}")
         
-        analysis['category_trends'] = dict(category_trends)
+        analysis['seasonality'] = {}
+        if len(window) >= 12:
+            month_of_year = np.array([month_index(m) % 12 for m in window])
+            seen = np.bincount(month_of_year, minlength=12)
+            observed = seen > 0
+            # Average spend per calendar month, relative to the overall monthly mean
+            overall = np.bincount(month_of_year, weights=matrix.sum(axis=0), minlength=12)
+            overall_mean = matrix.sum() / len(window)
+            by_category = np.zeros((len(categories), 12))
+            for moy in range(12):
+                if seen[moy]:
+                    by_category[:, moy] = matrix[:, month_of_year == moy].sum(axis=1) / seen[moy]
+            category_means = matrix.mean(axis=1)
+            analysis['seasonality'] = {
+                'overall': {
+                    f"{moy + 1:02d}": round(float(overall[moy] / seen[moy] / overall_mean), 2)
+                    for moy in range(12) if observed[moy] and overall_mean > 0
+                },
+                'by_category': {
+                    cat: {
+                        'peak_month': f"{int(np.argmax(by_category[row])) + 1:02d}",
+                        'peak_index': round(float(by_category[row].max() / category_means[row]), 2)
+                    }
+                    for row, cat in enumerate(categories) if category_means[row] > 0
+                }
+            }
         
         return analysis
     
-    def generate_savings_recommendations(self, expenses: List[Dict]) -> Dict[str, Any]:
-        """Generate AI-powered savings recommendations"""
+    def generate_savings_recommendations(self, expenses: List[Dict],
+                                         budget_summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate AI-powered savings recommendations
+
+        Pass a precomputed budget_summary to share it with other computations
+        in the same request.
+        """
         data = self.load_budget_data()
-        budget_summary = self.calculate_budget_summary(expenses)
+        if budget_summary is None:
+            budget_summary = self.calculate_budget_summary(expenses)
         
         recommendations = {
             'immediate_actions': [],
@@ -229,10 +467,18 @@ class BudgetManager:
         
         return recommendations
     
-    def get_budget_alerts(self, expenses: List[Dict]) -> List[Dict]:
-        """Get budget alerts and warnings"""
-        data = self.load_budget_data()
-        budget_summary = self.calculate_budget_summary(expenses)
+    def get_budget_alerts(self, expenses: List[Dict],
+                          budget_summary: Optional[Dict[str, Any]] = None,
+                          forecast: Optional[Dict[str, Any]] = None,
+                          goal_status: Optional[List[Dict]] = None) -> List[Dict]:
+        """Get budget alerts and warnings
+
+        With a spend forecast (see forecasting.py) this also warns about
+        month-end overspending before it happens; with goal_status (from
+        get_goal_status) it reports breached and at-risk goals.
+        """
+        if budget_summary is None:
+            budget_summary = self.calculate_budget_summary(expenses)
         alerts = []
         
         # Low savings rate alert
@@ -263,6 +509,57 @@ class BudgetManager:
                 'severity': 'medium'
             })
         
+        if forecast and 'month_end' in forecast:
+            alerts.extend(self._forecast_alerts(budget_summary, forecast))
+        
+        for goal in goal_status or []:
+            label = goal.get('category') or goal.get('name') or goal['type'].replace('_', ' ')
+            if goal['status'] == 'breached':
+                alerts.append({
+                    'type': 'danger',
+                    'title': f'Goal Breached: {label}',
+                    'message': f"{label} is at {goal['current']:.2f}€ against a goal of {goal['target']:.2f}€.",
+                    'severity': 'high',
+                    'goal_id': goal['id']
+                })
+            elif goal['status'] == 'at_risk':
+                alerts.append({
+                    'type': 'warning',
+                    'title': f'Goal At Risk: {label}',
+                    'message': f"{label} has used {goal['progress']:.1f}% of its {goal['target']:.2f}€ cap this month.",
+                    'severity': 'medium',
+                    'goal_id': goal['id']
+                })
+        
+        return alerts
+    
+    def _forecast_alerts(self, budget_summary: Dict[str, Any], forecast: Dict[str, Any]) -> List[Dict]:
+        """Alerts for projected (not yet realised) overspending"""
+        alerts = []
+        month_end = forecast['month_end']
+        
+        projected_total = budget_summary['fixed_costs'] + month_end['total']['projected']
+        if budget_summary['income'] > 0 and projected_total > budget_summary['income']:
+            alerts.append({
+                'type': 'warning',
+                'title': 'Projected Overspending',
+                'message': f"At your current pace you'll spend {projected_total:.2f}€ this month, "
+                           f"{projected_total - budget_summary['income']:.2f}€ more than your income.",
+                'severity': 'high'
+            })
+        
+        for category, projection in month_end['by_category'].items():
+            expected = projection.get('expected_month')
+            # Only flag categories whose whole projected band, lower bound included, is above a typical month
+            if expected and projection['lower'] > expected:
+                alerts.append({
+                    'type': 'warning',
+                    'title': f'{category} Trending High',
+                    'message': f"{category} is on pace for {projection['projected']:.2f}€ this month "
+                               f"(usually about {expected:.2f}€).",
+                    'severity': 'medium'
+                })
+        
         return alerts
 
 # Global instance
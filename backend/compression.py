@@ -0,0 +1,82 @@
+import gzip
+import os
+from typing import Dict, Optional
+
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+
+# Bodies smaller than this are sent as-is; compressing them saves less than the headers cost
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+# Fast levels: JSON compresses well even at low effort, and latency matters more than the last few %
+GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/plain", "text/csv")
+
+
+class ResponseCompressor:
+    """gzip/brotli Content-Encoding for responses over a size threshold.
+
+    Brotli is preferred when the client accepts it and the brotli package
+    is installed, otherwise gzip. A compressed response gets a weak ETag
+    (the bytes differ from the identity encoding, the content doesn't) and
+    Vary: Accept-Encoding so shared caches keep the variants apart.
+    """
+
+    def __init__(self):
+        self.min_bytes = COMPRESS_MIN_BYTES
+        self.gzip_level = GZIP_LEVEL
+        self.brotli_quality = BROTLI_QUALITY
+
+    def choose(self, accept_encodings) -> Optional[str]:
+        """Best encoding the client accepts (werkzeug MIMEAccept-style quality values)"""
+        if brotli is not None and accept_encodings['br'] > 0:
+            return 'br'
+        if accept_encodings['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        with metrics.stage('compress'):
+            if encoding == 'br':
+                return brotli.compress(body, quality=self.brotli_quality)
+            return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def apply(self, response, accept_encodings, variants: Optional[Dict[str, bytes]] = None):
+        """Compress response in place when worthwhile.
+
+        `variants` caches compressed bodies by encoding, for callers that
+        serve the same bytes repeatedly (the response cache).
+        """
+        if (self.min_bytes < 0 or response.direct_passthrough or response.is_streamed
+                or not 200 <= response.status_code < 300 or response.status_code == 204
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < self.min_bytes:
+            return response
+        encoding = self.choose(accept_encodings)
+        if encoding is None:
+            return response
+
+        compressed = variants.get(encoding) if variants is not None else None
+        if compressed is None:
+            compressed = self.compress(body, encoding)
+            if variants is not None:
+                variants[encoding] = compressed
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+# Global instance
+response_compressor = ResponseCompressor()
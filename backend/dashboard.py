@@ -0,0 +1,266 @@
+from datetime import datetime
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Tuple
+
+from budget_manager import budget_manager
+from financial_health import health_calculator
+from forecasting import spend_forecaster
+from metrics import metrics
+from recurring_detector import recurring_detector
+from smart_suggestions import suggestions_engine
+from spending_aggregates import MonthlyAggregates, aggregate_cache
+
+
+FIXED_COST_CATEGORIES = ['Rent', 'Mortgage', 'Electricity', 'Water', 'Internet', 'Phone', 'Insurance',
+                         'Subscriptions', 'Loan Payments']
+
+
+class Snapshot:
+    """One read of the expense and budget state plus everything derived from it.
+
+    Expenses and budget data are read on first use, and every shared
+    statistic (aggregates, budget summary, forecast, suggestions, health) is
+    computed once and reused by all sections built from the snapshot.
+    """
+
+    def __init__(self, read_db: Callable[[], Tuple[Dict, int]]):
+        self._read_db = read_db
+        self._insights: Dict[Any, Dict] = {}
+        self._health: Dict[Tuple, Dict] = {}
+
+    @cached_property
+    def _state(self) -> Tuple[Dict, int]:
+        """The expense file and the data version it was read at"""
+        return self._read_db()
+
+    @cached_property
+    def expenses(self) -> List[Dict]:
+        return self._state[0]['expenses']
+
+    @cached_property
+    def budget_data(self) -> Dict:
+        return budget_manager.load_budget_data()
+
+    @property
+    def data_version(self) -> int:
+        return self._state[1]
+
+    @cached_property
+    def aggregates(self) -> MonthlyAggregates:
+        return aggregate_cache.get(self.expenses, self.data_version)
+
+    @cached_property
+    def budget_summary(self) -> Dict[str, Any]:
+        return budget_manager.calculate_budget_summary(self.expenses)
+
+    @cached_property
+    def forecast(self) -> Dict[str, Any]:
+        return spend_forecaster.forecast(self.aggregates)
+
+    @cached_property
+    def goal_status(self) -> List[Dict]:
+        return budget_manager.get_goal_status(self.aggregates)
+
+    @cached_property
+    def total_spent(self) -> float:
+        return sum(exp['amount'] for exp in self.expenses)
+
+    def insights(self, income: float = None) -> Dict[str, Any]:
+        if income not in self._insights:
+            self._insights[income] = suggestions_engine.analyze_spending_patterns(self.expenses, income)
+        return self._insights[income]
+
+    def health(self, income: float = None, savings: float = 0, debt: float = 0) -> Dict[str, Any]:
+        key = (income, savings, debt)
+        if key not in self._health:
+            self._health[key] = health_calculator.calculate_comprehensive_health(self.expenses, income, savings, debt)
+        return self._health[key]
+
+
+# Section builders: (snapshot, request args) -> payload of the matching GET endpoint
+
+def expenses_section(snapshot: Snapshot, args) -> List[Dict]:
+    return snapshot.expenses
+
+
+def insights_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    expenses = snapshot.expenses
+    if not expenses:
+        return {
+            "message": "No expenses to analyze",
+            "insights": [],
+            "suggestions": [],
+            "health_score": 0
+        }
+
+    income = args.get('income', type=float)
+    insights = snapshot.insights(income)
+    health_data = snapshot.health(income)
+    return {
+        "insights": insights['insights'],
+        "suggestions": insights['suggestions'],
+        "health_score": health_data['overall_score'],
+        "health_grade": health_data['grade'],
+        "health_status": health_data['status'],
+        "health_components": health_data['components'],
+        "health_recommendations": health_data['recommendations'],
+        "health_trend": health_data['trend'],
+        "weekly_report": suggestions_engine.generate_weekly_report(expenses, income),
+        "anomalies": suggestions_engine.detect_anomalies(expenses),
+        "total_expenses": len(expenses)
+    }
+
+
+def health_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    return snapshot.health(
+        args.get('income', type=float),
+        args.get('savings', type=float, default=0),
+        args.get('debt', type=float, default=0)
+    )
+
+
+def stats_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    expenses = snapshot.expenses
+    if not expenses:
+        return {
+            "total_expenses": 0,
+            "average_expense": 0,
+            "total_categories": 0,
+            "most_expensive_category": None,
+            "recent_expenses": [],
+            "ai_insights": []
+        }
+
+    category_totals = {}
+    for exp in expenses:
+        cat = exp['category']
+        category_totals[cat] = category_totals.get(cat, 0) + exp['amount']
+    most_expensive_category = max(category_totals.items(), key=lambda x: x[1]) if category_totals else None
+    recent_expenses = sorted(expenses, key=lambda x: x['timestamp'], reverse=True)[:5]
+    insights = snapshot.insights()
+    return {
+        "total_expenses": round(snapshot.total_spent, 2),
+        "average_expense": round(snapshot.total_spent / len(expenses), 2),
+        "total_categories": len(category_totals),
+        "most_expensive_category": most_expensive_category[0] if most_expensive_category else None,
+        "category_breakdown": category_totals,
+        "recent_expenses": recent_expenses,
+        "ai_insights": insights['insights'][:3],  # Top 3 insights
+        "ai_suggestions": insights['suggestions'][:3]  # Top 3 suggestions
+    }
+
+
+def summary_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    alerts = budget_manager.get_budget_alerts(snapshot.expenses, snapshot.budget_summary,
+                                              snapshot.forecast, snapshot.goal_status)
+    return {
+        'budget_summary': snapshot.budget_summary,
+        'goals': snapshot.goal_status,
+        'alerts': alerts
+    }
+
+
+def analysis_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    months = args.get('months', type=int, default=4)
+    return {
+        'spending_analysis': budget_manager.analyze_spending_patterns(
+            snapshot.expenses, months, aggregates=snapshot.aggregates
+        ),
+        'savings_recommendations': recommendations_section(snapshot, args)
+    }
+
+
+def forecast_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    if not snapshot.expenses:
+        return {'message': 'No expenses to forecast'}
+    months = args.get('months', type=int, default=3)
+    horizon = min(max(months, 1), 24)
+    if horizon == 3:
+        return snapshot.forecast
+    return spend_forecaster.forecast(snapshot.aggregates, horizon=horizon)
+
+
+def recurring_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    patterns = recurring_detector.get(snapshot.expenses, snapshot.data_version)
+    return recurring_detector.summarize(patterns, snapshot.budget_data.get('fixed_costs', {}))
+
+
+def recommendations_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    return budget_manager.generate_savings_recommendations(snapshot.expenses, snapshot.budget_summary)
+
+
+def variable_expenses_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    current_month = datetime.now().strftime('%Y-%m')
+    variable_expenses = [
+        expense for expense in snapshot.expenses
+        if expense.get('date', '').startswith(current_month)
+        and expense.get('category') not in FIXED_COST_CATEGORIES
+    ]
+    return {
+        'variable_expenses': variable_expenses,
+        'month': current_month,
+        'total_amount': sum(exp['amount'] for exp in variable_expenses)
+    }
+
+
+def investment_recommendations_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    from market_data import get_market_recommendations
+    monthly_income = snapshot.budget_data.get('monthly_income', 0)
+    if monthly_income > 0:
+        current_savings_rate = (monthly_income - snapshot.total_spent) / monthly_income
+    else:
+        current_savings_rate = 0.1  # Default 10%
+    refresh = args.get('refresh', default='false').lower() == 'true'
+    recommendations = get_market_recommendations(monthly_income, current_savings_rate, refresh=refresh)
+    recommendations['savings_rate'] = round(current_savings_rate * 100, 2)
+    return recommendations
+
+
+def income_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    return {'monthly_income': snapshot.budget_data.get('monthly_income', 0)}
+
+
+def fixed_costs_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    return {'fixed_costs': snapshot.budget_data.get('fixed_costs', {})}
+
+
+def savings_target_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    return {'savings_target': snapshot.budget_data.get('savings_target', 0.2)}
+
+
+def goals_section(snapshot: Snapshot, args) -> Dict[str, Any]:
+    return {'budget_goals': snapshot.budget_data.get('budget_goals', {}), 'status': snapshot.goal_status}
+
+
+SECTIONS: Dict[str, Callable[[Snapshot, Any], Any]] = {
+    'expenses': expenses_section,
+    'insights': insights_section,
+    'health': health_section,
+    'stats': stats_section,
+    'summary': summary_section,
+    'analysis': analysis_section,
+    'forecast': forecast_section,
+    'recurring': recurring_section,
+    'recommendations': recommendations_section,
+    'variable_expenses': variable_expenses_section,
+    'investment_recommendations': investment_recommendations_section,
+    'income': income_section,
+    'fixed_costs': fixed_costs_section,
+    'savings_target': savings_target_section,
+    'goals': goals_section,
+}
+
+
+def build_sections(snapshot: Snapshot, names: List[str], args) -> Dict[str, Any]:
+    """{'sections': {name: payload}, 'errors': {name: message}} for the requested sections.
+
+    A failing section is reported under errors instead of failing the rest.
+    """
+    sections, errors = {}, {}
+    for name in names:
+        try:
+            with metrics.stage(f'dashboard_{name}'):
+                sections[name] = SECTIONS[name](snapshot, args)
+        except Exception as e:
+            errors[name] = str(e)
+    return {'sections': sections, 'errors': errors}
@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from financial_health import health_calculator
+from serialization import serializer
+from shared_state import shared_state
+from smart_suggestions import suggestions_engine
+from spending_aggregates import MonthlyAggregates, aggregate_cache, month_key
+
+
+# Events kept in the shared log for clients that reconnect (0 = no events are published)
+EVENTS_RETAIN = int(os.environ.get("EVENTS_RETAIN", "1000"))
+# How often each worker checks the shared log for events published by other workers
+EVENTS_POLL_INTERVAL = float(os.environ.get("EVENTS_POLL_INTERVAL", "0.25"))
+# Seconds between keep-alive comments on an idle stream; a client that left is only noticed
+# (and its thread freed) on the next write
+EVENTS_HEARTBEAT = float(os.environ.get("EVENTS_HEARTBEAT", "5"))
+
+STREAM = "events"
+
+
+class EventBus:
+    """Server-Sent Events fan-out through a shared append-only log.
+
+    publish() appends to the log in shared state, so an event gets one
+    sequence number no matter which worker produced it. Every worker with
+    open streams tails the log (one counter lookup per poll interval) and
+    wakes its streams; the sequence number is the SSE id, so a client that
+    reconnects with Last-Event-ID is replayed what it missed. Event data is
+    encoded once at publish time and written to every client as-is.
+    """
+
+    def __init__(self):
+        self.retain = EVENTS_RETAIN
+        self.poll_interval = EVENTS_POLL_INTERVAL
+        self.heartbeat = EVENTS_HEARTBEAT
+        self.clients = 0
+        self._head = 0
+        self._changed = threading.Condition()
+        self._poller_pid = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.retain > 0
+
+    def publish(self, event_type: str, data: Dict) -> int:
+        """Append an event for every connected client and return its id"""
+        seq = shared_state.log_append(STREAM, {"type": event_type, "data": serializer.dumps(data).decode("utf-8")},
+                                      keep=self.retain)
+        self._advance(seq)
+        return seq
+
+    def head(self) -> int:
+        return shared_state.log_head(STREAM)
+
+    def subscribe(self):
+        """Register an open stream; this worker tails the shared log while it has any"""
+        with self._changed:
+            self.clients += 1
+        if self._poller_pid != os.getpid():
+            self._start_poller()
+
+    def unsubscribe(self):
+        """Unregister a stream added by subscribe()"""
+        with self._changed:
+            self.clients -= 1
+
+    def stream(self, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """SSE text for a subscribed stream: missed events (if resuming), then new ones as they arrive.
+
+        Runs until the client disconnects; the caller then calls unsubscribe().
+        """
+        head = self.head()
+        cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else head
+        yield f"retry: 3000\nid: {min(cursor, head)}\n\n"
+        if cursor > head:
+            # The log was reset since the client's last event; its state can't be patched
+            cursor = head
+            yield self._format(head, "reset", "{}")
+        while True:
+            events = shared_state.log_since(STREAM, cursor)
+            if events and events[0][0] > cursor + 1:
+                # Older than the retained log: the client has to reload instead of patching
+                yield self._format(events[0][0] - 1, "reset", "{}")
+            for seq, event in events:
+                yield self._format(seq, event["type"], event["data"])
+                cursor = seq
+            if events:
+                continue
+            with self._changed:
+                woken = self._changed.wait_for(lambda: self._head > cursor, timeout=self.heartbeat)
+            if not woken:
+                yield ": keep-alive\n\n"
+
+    @staticmethod
+    def _format(seq: int, event_type: str, data: str) -> str:
+        return f"id: {seq}\nevent: {event_type}\ndata: {data}\n\n"
+
+    def _advance(self, seq: int):
+        with self._changed:
+            if seq > self._head:
+                self._head = seq
+                self._changed.notify_all()
+
+    def _start_poller(self):
+        with self._changed:
+            if self._poller_pid == os.getpid():
+                return
+            self._poller_pid = os.getpid()
+        threading.Thread(target=self._poll_loop, name="events-poll", daemon=True).start()
+
+    def _poll_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            if self.clients:
+                try:
+                    self._advance(self.head())
+                except Exception:
+                    pass
+
+
+class ExpenseEvents:
+    """Publishes a compact delta for each committed expense mutation.
+
+    The delta carries the changed expense, the month and category totals it
+    touched, anomaly flags that appeared or cleared, and the health score
+    change. Totals come from the already-patched aggregates; anomalies and
+    health need a pass over all expenses, so the event is built on a
+    background thread (one per worker, keeping that worker's events in
+    commit order) and the mutating request doesn't wait for it.
+    """
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="expense-events")
+
+    def record(self, event_type: str, version: int, expenses: List[Dict],
+               added: Optional[Dict] = None, removed: Optional[Dict] = None):
+        """Queue the event for a mutation that produced data version `version`"""
+        if self.bus.enabled:
+            self._executor.submit(self._publish, event_type, version, expenses, added, removed)
+
+    def _publish(self, event_type: str, version: int, expenses: List[Dict],
+                 added: Optional[Dict], removed: Optional[Dict]):
+        try:
+            self.bus.publish(event_type, self.build(event_type, version, expenses, added, removed))
+        except Exception:
+            # Clients can't patch past a change they never saw; tell them to reload instead
+            try:
+                self.bus.publish('reset', {'version': version})
+            except Exception:
+                pass
+
+    def build(self, event_type: str, version: int, expenses: List[Dict],
+              added: Optional[Dict] = None, removed: Optional[Dict] = None) -> Dict:
+        """The event payload for a mutation from version - 1 to `version`"""
+        current = self._derived(expenses, version)
+        stored = shared_state.get("events", "derived")
+        if stored is not None and stored["version"] == version - 1:
+            previous = stored
+        else:
+            # No state for the version before this one (first event, or a mutation
+            # published elsewhere in between): rebuild it by undoing this change
+            before = [exp for exp in expenses if added is None or exp.get('id') != added.get('id')]
+            if removed is not None:
+                before.append(removed)
+            previous = self._derived(before, version - 1)
+        if stored is None or stored["version"] < version:
+            shared_state.set("events", "derived", {key: current[key] for key in ('version', 'anomaly_ids', 'health')})
+
+        previous_flags = set(previous["anomaly_ids"])
+        current_flags = set(current["anomaly_ids"])
+        payload = {
+            'version': version,
+            'expense': added if added is not None else removed,
+            'totals': self._totals(expenses, version, added, removed),
+            'anomalies': {
+                'added': [anomaly for anomaly in current["anomalies"]
+                          if anomaly['expense'].get('id') not in previous_flags],
+                'cleared': sorted(previous_flags - current_flags),
+            },
+            'health': {
+                'overall_score': current["health"]["overall_score"],
+                'grade': current["health"]["grade"],
+                'status': current["health"]["status"],
+                'change': round(current["health"]["overall_score"] - previous["health"]["overall_score"], 1),
+            },
+            'total_expenses': len(expenses),
+        }
+        if event_type == 'expense.recategorized':
+            payload['previous'] = removed
+        return payload
+
+    @staticmethod
+    def _derived(expenses: List[Dict], version: int) -> Dict:
+        """The expensive whole-history results the deltas are taken against"""
+        anomalies = suggestions_engine.detect_anomalies(expenses)
+        health = health_calculator.calculate_comprehensive_health(expenses)
+        return {
+            'version': version,
+            'anomalies': anomalies,
+            'anomaly_ids': [anomaly['expense'].get('id') for anomaly in anomalies],
+            'health': {key: health[key] for key in ('overall_score', 'grade', 'status')},
+        }
+
+    @staticmethod
+    def _totals(expenses: List[Dict], version: int, added: Optional[Dict], removed: Optional[Dict]) -> Dict:
+        """New totals for the months and categories the mutation touched"""
+        aggregates = aggregate_cache.peek(version) or MonthlyAggregates.from_expenses(expenses)
+        touched = [exp for exp in (removed, added) if exp is not None]
+        categories = sorted({exp['category'] for exp in touched})
+        months = {}
+        for month in sorted({month_key(exp['date']) for exp in touched} - {None}):
+            cells = aggregates.totals.get(month, {})
+            months[month] = {
+                'total': round(aggregates.month_total(month), 2),
+                'count': aggregates.month_count(month),
+                'categories': {category: round(cells.get(category, 0), 2) for category in categories},
+            }
+        return {
+            'months': months,
+            'categories': {
+                category: round(sum(cells.get(category, 0) for cells in aggregates.totals.values()), 2)
+                for category in categories
+            },
+        }
+
+# Global instances
+event_bus = EventBus()
+expense_events = ExpenseEvents(event_bus)
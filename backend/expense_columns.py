@@ -0,0 +1,115 @@
+import io
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class ExpenseColumns:
+    """Expenses held as parallel arrays instead of one dict per expense.
+
+    `amounts` is float64, `codes` indexes into `categories` (in first-seen
+    order) and `dates` is an optional datetime64[D] array. Analysis code
+    works on these with bincount/reductions, so large client payloads are
+    never expanded into per-element Python objects.
+    """
+
+    def __init__(self, amounts: np.ndarray, codes: np.ndarray, categories: List[str],
+                 dates: Optional[np.ndarray] = None):
+        if len(codes) != len(amounts):
+            raise ValueError("amounts and categories must have the same length")
+        if dates is not None and len(dates) != len(amounts):
+            raise ValueError("amounts and dates must have the same length")
+        if len(codes) and (codes.min() < 0 or codes.max() >= len(categories)):
+            raise ValueError("category codes out of range")
+        # Null or missing amounts arrive as NaN and would silently poison every total
+        if not np.isfinite(amounts).all():
+            raise ValueError("every amount must be a finite number")
+        self.amounts = amounts
+        self.codes = codes
+        self.categories = categories
+        self.dates = dates
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @classmethod
+    def from_lists(cls, amounts: Sequence[float], categories: Optional[Sequence[str]] = None,
+                   dates: Optional[Sequence[str]] = None) -> "ExpenseColumns":
+        """Build from parallel JSON lists; expenses without a category count as Other"""
+        amounts = np.asarray(amounts, dtype=np.float64)
+        categories = list(categories or [])
+        if len(categories) < len(amounts):
+            categories.extend(['Other'] * (len(amounts) - len(categories)))
+        codes, names = cls._encode(categories[:len(amounts)])
+        return cls(amounts, codes, names, cls._parse_dates(dates))
+
+    @classmethod
+    def from_ndjson(cls, body: bytes) -> "ExpenseColumns":
+        """One expense per line: [amount, category, date?] or {"amount", "category", "date"}"""
+        amounts, categories, dates = [], [], []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                amount, category, day = record.get('amount'), record.get('category', 'Other'), record.get('date')
+            else:
+                amount = record[0]
+                category = record[1] if len(record) > 1 else 'Other'
+                day = record[2] if len(record) > 2 else None
+            amounts.append(amount)
+            categories.append(category)
+            dates.append(day)
+        has_dates = any(day is not None for day in dates)
+        if has_dates and None in dates:
+            raise ValueError("Either every line has a date or none does")
+        return cls.from_lists(amounts, categories, dates if has_dates else None)
+
+    @classmethod
+    def from_npz(cls, body: bytes) -> "ExpenseColumns":
+        """NumPy .npz body with `amounts`, and optionally `codes` + `categories`, and `dates`"""
+        with np.load(io.BytesIO(body), allow_pickle=False) as npz:
+            amounts = npz['amounts'].astype(np.float64)
+            if 'codes' in npz.files:
+                codes = npz['codes'].astype(np.intp)
+                names = [str(name) for name in npz['categories']]
+            else:
+                codes, names = np.zeros(len(amounts), dtype=np.intp), ['Other']
+            dates = npz['dates'].astype('datetime64[D]') if 'dates' in npz.files else None
+        return cls(amounts, codes, names, dates)
+
+    @staticmethod
+    def _encode(categories: List[str]):
+        lookup: Dict[str, int] = {}
+        codes = np.fromiter((lookup.setdefault(c, len(lookup)) for c in categories),
+                            dtype=np.intp, count=len(categories))
+        return codes, list(lookup)
+
+    @staticmethod
+    def _parse_dates(dates: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if dates is None:
+            return None
+        return np.array([str(d)[:10] for d in dates], dtype='datetime64[D]')
+
+    def category_totals(self) -> np.ndarray:
+        return np.bincount(self.codes, weights=self.amounts, minlength=len(self.categories))
+
+    def category_counts(self) -> np.ndarray:
+        return np.bincount(self.codes, minlength=len(self.categories))
+
+    def category_squares(self) -> np.ndarray:
+        return np.bincount(self.codes, weights=self.amounts ** 2, minlength=len(self.categories))
+
+    def chronological(self) -> np.ndarray:
+        """Amounts in date order (input order when there are no dates)"""
+        if self.dates is None:
+            return self.amounts
+        return self.amounts[np.argsort(self.dates, kind='stable')]
+
+    def summary(self) -> Dict[str, Any]:
+        out = {'count': len(self)}
+        if self.dates is not None and len(self):
+            out['first_date'] = str(self.dates.min())
+            out['last_date'] = str(self.dates.max())
+        return out
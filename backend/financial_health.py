@@ -1,7 +1,11 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import math
 
+import numpy as np
+
+from metrics import metrics
+
 class FinancialHealthCalculator:
     def __init__(self):
         # Weight factors for different health components
@@ -20,7 +24,11 @@ class FinancialHealthCalculator:
             'debt_to_income_max': 0.36,   # 36% maximum
             'spending_variance_max': 0.5  # 50% variance acceptable
         }
+        
+        # Upper bound on scenarios evaluated in one batch
+        self.max_scenarios = 100000
     
+    @metrics.timed('health_calc')
     def calculate_comprehensive_health(self, expenses: List[Dict], income: float = None, 
                                      savings: float = 0, debt: float = 0, 
                                      investments: Dict = None) -> Dict[str, Any]:
@@ -43,6 +51,40 @@ class FinancialHealthCalculator:
         emergency_score = self._calculate_emergency_fund(expenses, savings)
         investment_score = self._calculate_investment_diversity(investments)
         
+        return self._health_report({
+            'spending_control': spending_score,
+            'savings_rate': savings_score,
+            'debt_management': debt_score,
+            'emergency_fund': emergency_score,
+            'investment_diversity': investment_score
+        }, self._calculate_trend(expenses))
+    
+    @metrics.timed('health_calc')
+    def calculate_health_columns(self, columns, income: float = None, savings: float = 0,
+                                 debt: float = 0, investments: Dict = None) -> Dict[str, Any]:
+        """
+        calculate_comprehensive_health for an ExpenseColumns batch, without per-expense dicts
+        """
+        if not len(columns):
+            return self.calculate_comprehensive_health([], income, savings, debt, investments)
+        
+        scored = self._score_moments(
+            columns.category_totals(), columns.category_squares(), len(columns),
+            np.ones((1, len(columns.categories))),
+            np.array([income if income else np.nan]), np.array([float(savings or 0)]),
+            np.array([float(debt or 0)]), investments
+        )
+        scores = {name: float(values[0]) for name, values in scored['components'].items()}
+        return self._health_report(scores, self._trend_from_amounts(columns.chronological()))
+    
+    def _health_report(self, scores: Dict[str, float], trend: str) -> Dict[str, Any]:
+        """Overall score, grade, component breakdown and recommendations from component scores"""
+        spending_score = scores['spending_control']
+        savings_score = scores['savings_rate']
+        debt_score = scores['debt_management']
+        emergency_score = scores['emergency_fund']
+        investment_score = scores['investment_diversity']
+        
         # Calculate weighted overall score
         overall_score = (
             spending_score * self.weights['spending_control'] +
@@ -96,7 +138,156 @@ class FinancialHealthCalculator:
                 }
             },
             'recommendations': recommendations,
-            'trend': self._calculate_trend(expenses)
+            'trend': trend
+        }
+    
+    def build_scenarios(self, base: Dict[str, Any], scenarios: List[Dict] = None,
+                        grid: Dict[str, Any] = None) -> Tuple[Dict[str, np.ndarray], List[str], np.ndarray]:
+        """
+        Turn a scenario list or grid into column arrays for evaluate_scenarios.
+        
+        Each scenario may set income/savings/debt outright, shift them with
+        income_change/savings_change/debt_change, and scale categories with
+        category_multipliers. A grid takes a list of values per field (or
+        per category multiplier) and expands to every combination.
+        Returns ({'income', 'savings', 'debt'}, categories, multipliers).
+        """
+        fields = ('income', 'savings', 'debt')
+        base_values = {f: float(base[f]) if base.get(f) is not None else (np.nan if f == 'income' else 0.0)
+                       for f in fields}
+        
+        if grid is not None:
+            axes = []
+            for f in fields:
+                if grid.get(f) is not None:
+                    axes.append(np.asarray(grid[f], dtype=float))
+                elif grid.get(f'{f}_change') is not None:
+                    axes.append(base_values[f] + np.asarray(grid[f'{f}_change'], dtype=float))
+                else:
+                    axes.append(np.array([base_values[f]]))
+            category_axes = grid.get('category_multipliers') or {}
+            categories = list(category_axes)
+            axes.extend(np.asarray(category_axes[c], dtype=float) for c in categories)
+            count = int(np.prod([len(axis) for axis in axes]))
+            if count == 0:
+                raise ValueError("Grid has an empty axis")
+            if count > self.max_scenarios:
+                raise ValueError(f"Grid expands to {count} scenarios (max {self.max_scenarios})")
+            mesh = [m.reshape(-1) for m in np.meshgrid(*axes, indexing='ij')]
+            columns = dict(zip(fields, mesh[:3]))
+            multipliers = np.column_stack(mesh[3:]) if categories else np.ones((count, 0))
+            return columns, categories, multipliers
+        
+        scenarios = scenarios or []
+        if not scenarios:
+            raise ValueError("Provide scenarios or grid")
+        if len(scenarios) > self.max_scenarios:
+            raise ValueError(f"Too many scenarios: {len(scenarios)} (max {self.max_scenarios})")
+        columns = {}
+        for f in fields:
+            columns[f] = np.array([
+                float(s[f]) if s.get(f) is not None else base_values[f] + float(s.get(f'{f}_change', 0))
+                for s in scenarios
+            ])
+        categories = list(dict.fromkeys(c for s in scenarios for c in (s.get('category_multipliers') or {})))
+        column_of = {c: i for i, c in enumerate(categories)}
+        multipliers = np.ones((len(scenarios), len(categories)))
+        for row, s in enumerate(scenarios):
+            for category, value in (s.get('category_multipliers') or {}).items():
+                multipliers[row, column_of[category]] = float(value)
+        return columns, categories, multipliers
+    
+    @metrics.timed('health_scenarios')
+    def evaluate_scenarios(self, expenses: List[Dict], income: np.ndarray, savings: np.ndarray,
+                           debt: np.ndarray, categories: List[str] = None,
+                           multipliers: np.ndarray = None, investments: Dict = None) -> Dict[str, Any]:
+        """
+        Score many what-if scenarios in one vectorized pass.
+        
+        Scenario i has income[i] (NaN for unknown), savings[i], debt[i] and
+        scales each category's expenses by multipliers[i]. Scores follow the
+        same rules as calculate_comprehensive_health; the spending statistics
+        come from per-category sums and sums of squares, so the expense list
+        is read once however many scenarios there are.
+        """
+        income = np.asarray(income, dtype=float)
+        savings = np.asarray(savings, dtype=float)
+        debt = np.asarray(debt, dtype=float)
+        count = len(income)
+        if not expenses:
+            return {
+                'overall_score': np.zeros(count),
+                'grade': np.full(count, 'F'),
+                'components': {}
+            }
+        
+        categories = categories or []
+        column_of = {c: i for i, c in enumerate(categories)}
+        # Last column collects categories no scenario touches (multiplier 1)
+        sums = np.zeros(len(categories) + 1)
+        squares = np.zeros(len(categories) + 1)
+        for exp in expenses:
+            col = column_of.get(exp.get('category', 'Other'), len(categories))
+            sums[col] += exp['amount']
+            squares[col] += exp['amount'] ** 2
+        scale = np.ones((count, len(categories) + 1))
+        if categories:
+            scale[:, :-1] = multipliers
+        return self._score_moments(sums, squares, len(expenses), scale, income, savings, debt, investments)
+    
+    def _score_moments(self, sums: np.ndarray, squares: np.ndarray, n: int, scale: np.ndarray,
+                       income: np.ndarray, savings: np.ndarray, debt: np.ndarray,
+                       investments: Dict = None) -> Dict[str, Any]:
+        """Component and overall scores per row of `scale` from per-category sums and sums of squares"""
+        count = len(income)
+        total = scale @ sums
+        mean = total / n
+        variance = np.maximum((scale * scale) @ squares / n - mean ** 2, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cv = np.where(mean > 0, np.sqrt(variance) / mean, 1.0)
+        spending = np.select([cv < 0.3, cv < 0.5, cv < 0.7, cv < 1.0], [100, 80, 60, 40], 20)
+        spending = np.where(mean < 50, np.minimum(100, spending + 20),
+                            np.where(mean > 200, np.maximum(0, spending - 20), spending))
+        
+        has_income = income > 0
+        safe_income = np.where(has_income, income, 1.0)
+        rate = np.where(has_income, savings / safe_income, 0.0)
+        savings_score = np.select(
+            [rate >= self.benchmarks['savings_rate_target'], rate >= 0.15, rate >= 0.10, rate >= 0.05],
+            [100, 80, 60, 40], 20
+        )
+        savings_score = np.where(savings > total * 0.5, np.minimum(100, savings_score + 10), savings_score)
+        savings_score = np.where(has_income, savings_score, 50)
+        
+        dti = np.where(has_income, debt / safe_income, 0.0)
+        debt_score = np.select(
+            [dti == 0, dti <= 0.1, dti <= 0.2, dti <= 0.3, dti <= self.benchmarks['debt_to_income_max']],
+            [100, 90, 80, 60, 40], 20
+        )
+        debt_score = np.where(has_income, debt_score, 70)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            months = np.where(total > 0, savings / np.where(total > 0, total, 1.0), 0.0)
+        emergency_score = np.select(
+            [months >= self.benchmarks['emergency_fund_months'], months >= 4, months >= 2, months >= 1],
+            [100, 80, 60, 40], 20
+        )
+        investment_score = np.full(count, float(self._calculate_investment_diversity(investments)))
+        
+        components = {
+            'spending_control': spending.astype(float),
+            'savings_rate': savings_score.astype(float),
+            'debt_management': debt_score.astype(float),
+            'emergency_fund': emergency_score.astype(float),
+            'investment_diversity': investment_score
+        }
+        overall = sum(components[name] * weight for name, weight in self.weights.items())
+        grade = np.select([overall >= 90, overall >= 80, overall >= 70, overall >= 60],
+                          ['A', 'B', 'C', 'D'], 'F')
+        return {
+            'overall_score': overall,
+            'grade': grade,
+            'components': components
         }
     
     def _calculate_spending_control(self, expenses: List[Dict]) -> float:
@@ -279,13 +470,16 @@ class FinancialHealthCalculator:
         
         # Sort by date and get recent vs older expenses
         sorted_expenses = sorted(expenses, key=lambda x: x['date'])
-        mid_point = len(sorted_expenses) // 2
-        
-        recent_expenses = sorted_expenses[mid_point:]
-        older_expenses = sorted_expenses[:mid_point]
+        return self._trend_from_amounts([exp['amount'] for exp in sorted_expenses])
+    
+    def _trend_from_amounts(self, amounts) -> str:
+        """Compare the average of the recent half of chronologically ordered amounts to the older half"""
+        if len(amounts) < 10:
+            return "Insufficient data for trend analysis"
         
-        recent_avg = sum(exp['amount'] for exp in recent_expenses) / len(recent_expenses)
-        older_avg = sum(exp['amount'] for exp in older_expenses) / len(older_expenses)
+        mid_point = len(amounts) // 2
+        recent_avg = float(np.mean(amounts[mid_point:]))
+        older_avg = float(np.mean(amounts[:mid_point]))
         
         if recent_avg < older_avg * 0.9:
             return "📉 Decreasing - Great job reducing expenses!"
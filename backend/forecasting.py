@@ -0,0 +1,144 @@
+import calendar
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from spending_aggregates import MonthlyAggregates, month_from_index, month_index
+
+
+class SpendForecaster:
+    """Per-category spend forecasts from month/category aggregates.
+
+    Every model runs on a (categories x months) matrix, so all categories
+    are forecast together with a handful of NumPy operations per month of
+    history.
+    """
+
+    def __init__(self):
+        self.alpha = 0.4            # smoothing factor for simple exponential smoothing
+        self.history_months = 36    # completed months fed to the models
+        self.seasonal_min_months = 24
+        self.z = 1.645              # 90% prediction interval
+
+    def forecast(self, aggregates: MonthlyAggregates, horizon: int = 3,
+                 today: Optional[date] = None) -> Dict[str, Any]:
+        """Project the current month's month-end spend and the next `horizon` months"""
+        today = today or date.today()
+        horizon = max(1, horizon)
+        current_month = today.strftime('%Y-%m')
+        current_index = month_index(current_month)
+        categories = aggregates.categories()
+        if not categories:
+            return {'message': 'No expenses to forecast'}
+
+        # Completed months only; the current month is handled as month-to-date
+        months = aggregates.months()
+        history_end = current_index - 1
+        history_start = max(month_index(months[0]), history_end - self.history_months + 1)
+        if history_start <= history_end:
+            _, _, history = aggregates.category_matrix(
+                month_from_index(history_start), month_from_index(history_end), categories
+            )
+        else:
+            history = np.zeros((len(categories), 0))
+
+        # Row 0 predicts the current month, rows 1..horizon the months after
+        steps = horizon + 1
+        if history.shape[1] >= self.seasonal_min_months:
+            method = 'seasonal_naive'
+            mean, sigma = self._seasonal_naive(history, steps)
+        elif history.shape[1] >= 2:
+            method = 'exponential_smoothing'
+            mean, sigma = self._exponential_smoothing(history, steps)
+        else:
+            method = 'pace'
+            mean, sigma = None, None
+
+        days_in_month = calendar.monthrange(today.year, today.month)[1]
+        elapsed = today.day / days_in_month
+        spent = np.array([aggregates.totals.get(current_month, {}).get(cat, 0.0) for cat in categories])
+
+        if mean is None:
+            # No usable history: extrapolate the month-to-date pace
+            month_end = spent / elapsed
+            month_end_sigma = np.zeros(len(categories))
+            future = np.repeat(month_end[:, None], horizon, axis=1)
+            future_sigma = np.zeros_like(future)
+        else:
+            remaining = 1 - elapsed
+            month_end = spent + mean[:, 0] * remaining
+            month_end_sigma = sigma[:, 0] * remaining
+            future, future_sigma = mean[:, 1:], sigma[:, 1:]
+
+        result = {
+            'as_of': today.isoformat(),
+            'method': method,
+            'history_months': int(history.shape[1]),
+            'month_end': {
+                'month': current_month,
+                'spent_so_far': round(float(spent.sum()), 2),
+                'total': self._band(month_end.sum(), np.sqrt((month_end_sigma ** 2).sum()), floor=spent.sum()),
+                'by_category': {
+                    cat: dict(self._band(month_end[row], month_end_sigma[row], floor=spent[row]),
+                              spent_so_far=round(float(spent[row]), 2),
+                              expected_month=round(float(mean[row, 0]), 2) if mean is not None else None)
+                    for row, cat in enumerate(categories)
+                }
+            },
+            'projections': []
+        }
+        for step in range(horizon):
+            column, column_sigma = future[:, step], future_sigma[:, step]
+            result['projections'].append({
+                'month': month_from_index(current_index + step + 1),
+                'total': self._band(column.sum(), np.sqrt((column_sigma ** 2).sum())),
+                'by_category': {
+                    cat: self._band(column[row], column_sigma[row])
+                    for row, cat in enumerate(categories)
+                }
+            })
+        return result
+
+    def _exponential_smoothing(self, history: np.ndarray, steps: int):
+        """Simple exponential smoothing for every row at once.
+
+        Returns (mean, sigma) arrays of shape (categories, steps); sigma comes
+        from the one-step-ahead residuals and widens with the horizon.
+        """
+        alpha = self.alpha
+        level = history[:, 0].copy()
+        squared_errors = np.zeros(history.shape[0])
+        for t in range(1, history.shape[1]):
+            error = history[:, t] - level
+            squared_errors += error ** 2
+            level += alpha * error
+        residual_sigma = np.sqrt(squared_errors / (history.shape[1] - 1))
+        h = np.arange(1, steps + 1)
+        mean = np.repeat(level[:, None], steps, axis=1)
+        sigma = residual_sigma[:, None] * np.sqrt(1 + (h - 1) * alpha ** 2)[None, :]
+        return mean, sigma
+
+    def _seasonal_naive(self, history: np.ndarray, steps: int):
+        """Seasonal-naive forecast (same month last year) for every row at once"""
+        season = 12
+        residuals = history[:, season:] - history[:, :-season]
+        residual_sigma = np.sqrt((residuals ** 2).mean(axis=1))
+        h = np.arange(1, steps + 1)
+        # Forecast h reuses the observation from the last season that covers it
+        source = history.shape[1] - season + (h - 1) % season
+        mean = history[:, source]
+        sigma = residual_sigma[:, None] * np.sqrt((h - 1) // season + 1)[None, :]
+        return mean, sigma
+
+    def _band(self, value: float, sigma: float, floor: float = 0.0) -> Dict[str, float]:
+        """Point forecast with its prediction interval, never below floor"""
+        value = max(float(value), float(floor))
+        return {
+            'projected': round(value, 2),
+            'lower': round(max(float(floor), value - self.z * float(sigma)), 2),
+            'upper': round(value + self.z * float(sigma), 2)
+        }
+
+# Global instance
+spend_forecaster = SpendForecaster()
@@ -0,0 +1,73 @@
+"""gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app`; every tunable reads an env var.
+
+WEB_BIND              listen address (default 0.0.0.0:5000)
+WEB_CONCURRENCY       worker processes (default 2 x CPUs + 1, at most 8)
+WEB_THREADS           threads per worker (default 4)
+WEB_TIMEOUT           seconds before a silent worker is killed (default 60)
+WEB_GRACEFUL_TIMEOUT  seconds in-flight requests get on shutdown/reload (default 30)
+WEB_KEEPALIVE         keep-alive seconds (default 5)
+WEB_MAX_REQUESTS      recycle a worker after this many requests, 0 = never (default 0)
+WEB_PRELOAD           import and warm the app once in the master (default true)
+WEB_ACCESS_LOG        access log path, "-" for stdout (default off)
+WARM_MARKET_STATS     fetch market statistics as each worker starts (default off)
+SHARED_STATE_DB       SQLite file for state shared by the workers (default shared_state.db)
+METRICS_FLUSH_INTERVAL  seconds between each worker publishing its /metrics numbers (default 5)
+SLOW_REQUEST_MS       log requests slower than this with their span breakdown, 0 = off (default 500)
+SLOW_REQUEST_LOG      file for the slow-request log (default: the error log)
+PROFILE_TOKEN         requests sending this in X-Profile run under cProfile (default off)
+PROFILE_SAMPLE_RATE   fraction of requests profiled at random (default 0)
+PROFILE_DIR           where .prof files are written (default profiles)
+JSON_ENCODER          auto (orjson when installed), orjson or stdlib (default auto)
+COMPRESS_MIN_BYTES    gzip/brotli responses at least this large, -1 = off (default 1024)
+EVENTS_RETAIN         /events deltas kept for reconnecting clients, 0 = no events (default 1000)
+EVENTS_POLL_INTERVAL  seconds between workers checking for events from other workers (default 0.25)
+ADMISSION_HEAVY_THREADS      threads expensive endpoints may hold per worker, 0 = no admission control
+                             (default WEB_THREADS - 2, at least 1)
+ADMISSION_STREAM_THREADS     open event streams (/events, /jobs/<id>/events) per worker; each holds a
+                             thread while connected (default WEB_THREADS - ADMISSION_HEAVY_THREADS - 1)
+ADMISSION_HEAVY_CONCURRENCY  expensive requests running at once per worker (default 1)
+ADMISSION_QUEUE_TIMEOUT      seconds a queued expensive request waits before a 503 (default 2)
+ADMISSION_LIMITS             per-gate concurrency:queue overrides, e.g. "analysis=1:4,dashboard=2:2"
+JOBS_PROCESSES        background job processes per worker (default CPUs / WEB_CONCURRENCY, at least 1)
+JOBS_PER_USER         queued plus running jobs per user (X-User-Id, else client address; default 2)
+JOBS_DB               SQLite file with the job records (default jobs.db)
+JOBS_DIR              where job results are written (default jobs)
+JOBS_TTL              seconds finished jobs and results are kept (default 86400)
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get("WEB_BIND", "0.0.0.0:5000")
+workers = _env_int("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8))
+worker_class = "gthread"
+threads = _env_int("WEB_THREADS", 4)
+timeout = _env_int("WEB_TIMEOUT", 60)
+graceful_timeout = _env_int("WEB_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("WEB_KEEPALIVE", 5)
+max_requests = _env_int("WEB_MAX_REQUESTS", 0)
+max_requests_jitter = max_requests // 10
+# Warm once in the master so workers fork with the engines already in place
+preload_app = os.environ.get("WEB_PRELOAD", "true").lower() in ("1", "true", "yes")
+accesslog = os.environ.get("WEB_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("WEB_LOG_LEVEL", "info")
+
+# The app sizes per-worker resources from these (job pools, admission limits); the config is
+# read before the app is imported, so they see the same values gunicorn uses
+os.environ["WEB_CONCURRENCY"] = str(workers)
+os.environ["WEB_THREADS"] = str(threads)
+
+
+def post_fork(server, worker):
+    from serving import start_worker
+    start_worker()
+
+
+def worker_exit(server, worker):
+    from serving import shutdown
+    shutdown()
@@ -0,0 +1,481 @@
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from serialization import serializer
+from shared_state import shared_state
+
+
+# SQLite file with the job records, shared by all worker processes
+JOBS_DB = os.environ.get("JOBS_DB", "jobs.db")
+# Where finished job results are written, one JSON file per job
+JOBS_DIR = os.environ.get("JOBS_DIR", "jobs")
+# Server worker processes, each with its own job pool (gunicorn.conf.py exports its count)
+WEB_WORKERS = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# Job processes per worker process (default: the cores shared out among the workers, at least 1)
+JOBS_PROCESSES = int(os.environ.get("JOBS_PROCESSES", str(max(1, (os.cpu_count() or 1) // max(1, WEB_WORKERS)))))
+# Queued plus running jobs one user may have at a time
+JOBS_PER_USER = int(os.environ.get("JOBS_PER_USER", "2"))
+# Finished jobs and their results are deleted after this many seconds
+JOBS_TTL = float(os.environ.get("JOBS_TTL", str(24 * 60 * 60)))
+MAX_IMPORT_ROWS = int(os.environ.get("JOBS_MAX_IMPORT_ROWS", "1000000"))
+
+ACTIVE = ("queued", "running")
+# Progress is written to the job record at most this often
+PROGRESS_INTERVAL = 0.5
+# Seconds between keep-alive comments on a job stream that has nothing new
+STREAM_HEARTBEAT = 15
+
+
+class JobRejected(Exception):
+    """Raised when a user already has as many active jobs as allowed."""
+
+
+class JobStore:
+    """Job records in a local SQLite file, readable and writable from every process.
+
+    Job processes write their own progress here, so status reads never have
+    to reach the process running the job.
+    """
+
+    def __init__(self, path: str = JOBS_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY, type TEXT NOT NULL, params TEXT NOT NULL, user TEXT NOT NULL,
+                    status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT,
+                    cache_key TEXT, data_version INTEGER, owner INTEGER NOT NULL, error TEXT,
+                    created_at REAL NOT NULL, started_at REAL, finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_user_status ON jobs (user, status);
+                CREATE INDEX IF NOT EXISTS jobs_cache_key ON jobs (cache_key, status);
+            """)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._connection().execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def find(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """The newest job with this cache key that is finished or still active"""
+        row = self._connection().execute(
+            "SELECT * FROM jobs WHERE cache_key = ? AND status IN ('done', 'queued', 'running') "
+            "ORDER BY created_at DESC LIMIT 1",
+            (cache_key,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def create(self, job: Dict[str, Any], per_user: int):
+        """Insert a queued job unless its user is at the active-job cap (checked atomically)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            active = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE user = ? AND status IN ('queued', 'running')", (job["user"],)
+            ).fetchone()[0]
+            if active >= per_user:
+                raise JobRejected(f"{active} jobs already queued or running")
+            conn.execute(
+                "INSERT INTO jobs (id, type, params, user, status, message, cache_key, data_version, owner, created_at) "
+                "VALUES (:id, :type, :params, :user, 'queued', 'Waiting for a job process', :cache_key, "
+                ":data_version, :owner, :created_at)",
+                job,
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def reap(self):
+        """Fail active jobs whose owning server process is gone (crash or restart)"""
+        conn = self._connection()
+        owners = [row[0] for row in conn.execute("SELECT DISTINCT owner FROM jobs WHERE status IN ('queued', 'running')")]
+        for owner in owners:
+            if not _process_alive(owner):
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Interrupted by a server restart', finished_at = ? "
+                    "WHERE owner = ? AND status IN ('queued', 'running')",
+                    (time.time(), owner),
+                )
+
+    def expire(self, before: float) -> List[str]:
+        """Delete jobs finished before `before` and return their ids"""
+        conn = self._connection()
+        ids = [row[0] for row in conn.execute("SELECT id FROM jobs WHERE finished_at < ?", (before,))]
+        conn.execute("DELETE FROM jobs WHERE finished_at < ?", (before,))
+        return ids
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Job bodies. These run in the job processes: they read the data themselves
+# and report progress straight to the job store.
+
+class JobContext:
+    """What a running job gets: its id, progress reporting and the data it works on"""
+
+    def __init__(self, job_id: str, store_path: str, db_path: str):
+        self.job_id = job_id
+        self.store = JobStore(store_path)
+        self.db_path = db_path
+        self.data_version = None
+        self._reported = 0.0
+
+    def progress(self, fraction: float, message: str, force: bool = False):
+        now = time.monotonic()
+        if force or now - self._reported >= PROGRESS_INTERVAL:
+            self._reported = now
+            self.store.update(self.job_id, progress=round(min(max(fraction, 0.0), 1.0), 3), message=message)
+
+    def load_db(self) -> Dict:
+        """The expense file and the data version it belongs to"""
+        while True:
+            version = shared_state.counter("expenses")
+            db = serializer.read_file(self.db_path) if os.path.exists(self.db_path) else {"expenses": []}
+            # A save landing mid-read moves the counter; read again so data and version match
+            if shared_state.counter("expenses") == version:
+                self.data_version = version
+                return db
+
+
+def run_analysis(context: JobContext, params: Dict) -> Dict:
+    from dashboard import Snapshot, analysis_section
+    from werkzeug.datastructures import MultiDict
+
+    context.progress(0.05, "Loading expenses", force=True)
+    snapshot = Snapshot(lambda: (context.load_db(), context.data_version))
+    snapshot.expenses
+    context.progress(0.3, "Aggregating months", force=True)
+    snapshot.aggregates
+    context.progress(0.6, f"Analyzing {params['months']} months", force=True)
+    return analysis_section(snapshot, MultiDict({'months': params['months']}))
+
+
+def run_anomaly_backfill(context: JobContext, params: Dict) -> Dict:
+    from smart_suggestions import suggestions_engine
+
+    context.progress(0.05, "Loading expenses", force=True)
+    expenses = context.load_db()['expenses']
+    by_category: Dict[str, List[Dict]] = {}
+    for exp in expenses:
+        by_category.setdefault(exp['category'], []).append(exp)
+
+    context.progress(0.1, "Scanning full history", force=True)
+    result = {'overall': suggestions_engine.detect_anomalies(expenses), 'by_category': {}}
+    for done, (category, rows) in enumerate(sorted(by_category.items()), start=1):
+        result['by_category'][category] = suggestions_engine.detect_anomalies(rows)
+        context.progress(0.1 + 0.9 * done / len(by_category), f"Scanned {category}")
+    result['total_expenses'] = len(expenses)
+    result['flagged'] = len(result['overall'])
+    return result
+
+
+def run_import(context: JobContext, params: Dict) -> List[Dict]:
+    """Categorize rows for import; the server process adds them to the data when this finishes"""
+    from ai_categorizer import categorizer
+
+    rows = params['expenses']
+    imported = []
+    timestamp = datetime.now().isoformat()
+    for index, row in enumerate(rows, start=1):
+        categorization = categorizer.categorize(row['description'])
+        imported.append({
+            'amount': float(row['amount']),
+            'category': row.get('category') or categorization['category'],
+            'description': row['description'],
+            'date': row['date'],
+            'timestamp': timestamp,
+            'ai_categorization': {
+                'suggested_category': categorization['category'],
+                'confidence': categorization['confidence'],
+                'alternatives': categorization['alternatives']
+            }
+        })
+        if index % 1000 == 0:
+            context.progress(0.95 * index / len(rows), f"Categorized {index:,} of {len(rows):,} rows")
+    context.progress(0.95, "Saving expenses", force=True)
+    return imported
+
+
+def validate_analysis(params: Dict) -> Dict:
+    months = int(params.get('months', 12))
+    if not 1 <= months <= 600:
+        raise ValueError("months must be between 1 and 600")
+    return {'months': months}
+
+
+def validate_anomaly_backfill(params: Dict) -> Dict:
+    return {}
+
+
+def validate_import(params: Dict) -> Dict:
+    rows = params.get('expenses')
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("expenses must be a non-empty list")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f"At most {MAX_IMPORT_ROWS:,} expenses per import")
+    cleaned = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {index}: expected an object")
+        missing = [field for field in ('amount', 'description', 'date') if field not in row]
+        if missing:
+            raise ValueError(f"Row {index}: missing {', '.join(missing)}")
+        try:
+            amount = float(row['amount'])
+        except (TypeError, ValueError):
+            amount = math.nan
+        # NaN and Infinity would be stored as null
+        if not math.isfinite(amount):
+            raise ValueError(f"Row {index}: amount must be a finite number")
+        try:
+            day = date.fromisoformat(str(row['date'])).isoformat()
+        except ValueError:
+            raise ValueError(f"Row {index}: date must be an ISO date (YYYY-MM-DD)") from None
+        description = row['description']
+        if not isinstance(description, str) or not description.strip():
+            raise ValueError(f"Row {index}: description must be a non-empty string")
+        category = row.get('category')
+        if category is not None and not isinstance(category, str):
+            raise ValueError(f"Row {index}: category must be a string")
+        # Only the known fields are kept; anything else in a row never reaches db.json
+        cleaned.append({'amount': amount, 'description': description, 'category': category, 'date': day})
+    return {'expenses': cleaned}
+
+
+class JobType:
+    """How to validate, run and (optionally) cache one kind of job"""
+
+    def __init__(self, run: Callable, validate: Callable, cacheable: bool = True,
+                 summary: Callable[[Dict], Dict] = None):
+        self.run = run
+        self.validate = validate
+        self.cacheable = cacheable
+        # What gets stored and shown as the job's params (imports don't store every row)
+        self.summary = summary or (lambda params: params)
+
+
+JOB_TYPES: Dict[str, JobType] = {
+    'analysis': JobType(run_analysis, validate_analysis),
+    'anomaly_backfill': JobType(run_anomaly_backfill, validate_anomaly_backfill),
+    'import': JobType(run_import, validate_import, cacheable=False,
+                      summary=lambda params: {'rows': len(params['expenses'])}),
+}
+
+
+def _execute(job_type: str, job_id: str, params: Dict, store_path: str, db_path: str) -> Tuple[Any, Optional[int]]:
+    """Entry point in the job process"""
+    context = JobContext(job_id, store_path, db_path)
+    context.store.update(job_id, status="running", started_at=time.time(), message="Started")
+    result = JOB_TYPES[job_type].run(context, params)
+    return result, context.data_version
+
+
+class JobRunner:
+    """Background jobs for heavy analyses and imports, run in a process pool.
+
+    Jobs are persisted in a SQLite job store, so any worker can report on
+    any job. A job runs in one of this worker's job processes, which keeps
+    CPU-bound analytics off the HTTP threads and spreads them over all
+    cores. Results are cached by (job type, params, data version, budget
+    version): submitting a job whose result is already known, or is being
+    computed, returns that job instead of starting another. Each user may
+    have `per_user` jobs queued or running.
+    """
+
+    def __init__(self):
+        self.store = JobStore(JOBS_DB)
+        self.results_dir = JOBS_DIR
+        self.processes = max(1, JOBS_PROCESSES)
+        self.per_user = JOBS_PER_USER
+        self.ttl = JOBS_TTL
+        self.db_path = None
+        self._commits: Dict[str, Callable[[Any], Any]] = {}
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self._next_expiry = 0.0
+
+    def attach(self, db_path: str, commits: Dict[str, Callable[[Any], Any]] = None):
+        """Point jobs at the expense file; commits[type] turns a job's output into its result in this process"""
+        self.db_path = os.path.abspath(db_path)
+        self._commits.update(commits or {})
+
+    def submit(self, job_type: str, params: Dict, user: str, data_version: int, budget_version: int) -> Dict:
+        """Start (or reuse) a job and return its public record; raises ValueError or JobRejected"""
+        kind = JOB_TYPES.get(job_type)
+        if kind is None:
+            raise ValueError(f"Unknown job type: {job_type}")
+        params = kind.validate(params or {})
+        self._housekeeping()
+
+        cache_key = None
+        if kind.cacheable:
+            cache_key = self._cache_key(job_type, params, data_version, budget_version)
+            existing = self.store.find(cache_key)
+            if existing is not None and (existing["status"] != "done" or os.path.exists(self._result_path(existing["id"]))):
+                return self.describe(existing, cached=True)
+
+        job = {
+            "id": uuid.uuid4().hex, "type": job_type, "params": json.dumps(kind.summary(params)), "user": user,
+            "cache_key": cache_key, "data_version": data_version, "owner": os.getpid(), "created_at": time.time(),
+        }
+        self.store.create(job, self.per_user)
+        try:
+            future = self._executor().submit(_execute, job_type, job["id"], params, self.store.path, self.db_path)
+        except Exception as e:
+            self._fail(job["id"], e)
+            raise
+        future.add_done_callback(lambda done: self._finish(job["id"], job_type, budget_version, done))
+        return self.describe(self.store.get(job["id"]))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self.store.get(job_id)
+        return self.describe(job) if job else None
+
+    def result(self, job_id: str) -> Any:
+        return serializer.read_file(self._result_path(job_id))
+
+    def stream(self, job_id: str) -> Iterator[str]:
+        """Server-Sent Events with the job's record whenever it changes, until it finishes"""
+        last, quiet_since = None, time.monotonic()
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                yield "event: failed\ndata: {\"error\": \"Job not found\"}\n\n"
+                return
+            state = (job["status"], job["progress"], job["message"])
+            if state != last:
+                event = "progress" if job["status"] in ACTIVE else job["status"]
+                yield f"event: {event}\ndata: {serializer.dumps(self.describe(job)).decode('utf-8')}\n\n"
+                last, quiet_since = state, time.monotonic()
+            elif time.monotonic() - quiet_since >= STREAM_HEARTBEAT:
+                yield ": keep-alive\n\n"
+                quiet_since = time.monotonic()
+            if job["status"] not in ACTIVE:
+                return
+            time.sleep(PROGRESS_INTERVAL)
+
+    def describe(self, job: Dict, cached: bool = False) -> Dict:
+        """The public view of a job record"""
+        described = {
+            "id": job["id"],
+            "type": job["type"],
+            "params": json.loads(job["params"]),
+            "status": job["status"],
+            "progress": job["progress"],
+            "message": job["message"],
+            "data_version": job["data_version"],
+            "created_at": _iso(job["created_at"]),
+            "started_at": _iso(job["started_at"]),
+            "finished_at": _iso(job["finished_at"]),
+            "cached": cached,
+        }
+        if job["error"]:
+            described["error"] = job["error"]
+        return described
+
+    def _finish(self, job_id: str, job_type: str, budget_version: int, future):
+        """Runs in this process when the job process is done"""
+        try:
+            result, data_version = future.result()
+            commit = self._commits.get(job_type)
+            if commit is not None:
+                result = commit(result)
+            serializer.write_file(self._result_path(job_id), result)
+            fields = {"status": "done", "progress": 1.0, "message": "Finished", "finished_at": time.time()}
+            job = self.store.get(job_id)
+            if job["cache_key"] is not None and data_version != job["data_version"]:
+                # Computed on newer data than was current at submission: file it under that version
+                params = JOB_TYPES[job_type].summary(json.loads(job["params"]))
+                fields.update(data_version=data_version,
+                              cache_key=self._cache_key(job_type, params, data_version, budget_version))
+            self.store.update(job_id, **fields)
+        except BrokenProcessPool as e:
+            with self._lock:
+                self._pool = None
+            self._fail(job_id, e)
+        except Exception as e:
+            self._fail(job_id, e)
+
+    def _fail(self, job_id: str, error: Exception):
+        self.store.update(job_id, status="failed", error=str(error) or type(error).__name__,
+                          message="Failed", finished_at=time.time())
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                # forkserver: job processes start from a clean single-threaded server, not
+                # by forking this multi-threaded worker
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context(method))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _housekeeping(self):
+        """Fail orphaned jobs and drop expired ones, at most once a minute"""
+        now = time.time()
+        if now < self._next_expiry:
+            return
+        self._next_expiry = now + 60
+        self.store.reap()
+        for job_id in self.store.expire(now - self.ttl):
+            path = self._result_path(job_id)
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _result_path(self, job_id: str) -> str:
+        os.makedirs(self.results_dir, exist_ok=True)
+        return os.path.join(self.results_dir, f"{job_id}.json")
+
+    @staticmethod
+    def _cache_key(job_type: str, params: Dict, data_version: int, budget_version: int) -> str:
+        text = json.dumps([job_type, params, data_version, budget_version], sort_keys=True)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+# Global instance
+job_runner = JobRunner()
@@ -1,8 +1,18 @@
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
-import yfinance as yf
+import numpy as np
+
+from market_providers import MarketDataProvider, provider_from_env
+from metrics import metrics
+from monte_carlo import monte_carlo, portfolio_monthly_returns, unit_projection
+from portfolio import analyze_universe, load_universe
+from price_store import cagr_and_volatility, price_store
+from shared_state import shared_state
 
 
 _CACHE: Dict[str, Any] = {
@@ -10,6 +20,93 @@ _CACHE: Dict[str, Any] = {
     "ts": 0.0,
 }
 
+# Fan-out settings for live fetches; overridable from the environment
+FETCH_WORKERS = int(os.environ.get("MARKET_FETCH_WORKERS", "8"))
+TICKER_TIMEOUT = float(os.environ.get("MARKET_TICKER_TIMEOUT", "8"))
+FETCH_DEADLINE = float(os.environ.get("MARKET_FETCH_DEADLINE", "12"))
+CACHE_TTL = 60 * 60  # 1 hour
+# Minimum seconds between honoured ?refresh=true requests
+FORCED_REFRESH_INTERVAL = float(os.environ.get("MARKET_FORCED_REFRESH_INTERVAL", "60"))
+# Horizon of the per-user projection bands, and annual volatility (%) assumed
+# per risk level when there is no portfolio analytics to take it from
+PROJECTION_YEARS = int(os.environ.get("MARKET_PROJECTION_YEARS", "5"))
+DEFAULT_VOLATILITY = {"conservative": 6.0, "balanced": 11.0, "aggressive": 17.0}
+# Serve only from the local price store, never touching the network
+MARKET_OFFLINE = os.environ.get("MARKET_OFFLINE", "").lower() in ("1", "true", "yes")
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="market-fetch")
+
+# Single-flight refresh state: the in-flight refresh's completion event.
+# Across worker processes the shared leases below play the same role, and
+# fetched stats are published in shared state for the other workers.
+_REFRESH: Dict[str, Any] = {
+    "event": None,
+}
+_REFRESH_LOCK = threading.Lock()
+REFRESH_LEASE = "market-refresh"
+FORCED_REFRESH_LEASE = "market-forced-refresh"
+UNIVERSE_LEASE = "market-universe-top-up"
+
+# Where price history comes from; MARKET_PROVIDER=replay serves local files
+_PROVIDER: Dict[str, MarketDataProvider] = {
+    "provider": provider_from_env(),
+}
+
+
+class ProviderUnavailable(Exception):
+    """Raised when live market data cannot be fetched (circuit open or every ticker failed)."""
+
+
+class CircuitBreaker:
+    """Stop calling a failing provider for a while instead of waiting on it every request.
+
+    closed -> open after `failure_threshold` consecutive failed builds; after
+    `reset_timeout` seconds one trial call is let through (half-open) and its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.time()
+
+
+_BREAKER = CircuitBreaker()
+
 
 @dataclass
 class Sector:
@@ -28,37 +125,129 @@ SECTORS: List[Sector] = [
 ]
 
 
-def _compute_cagr_and_volatility(ticker: str, years: int = 5) -> Tuple[float, float]:
-    """Return CAGR% and annualized volatility% based on daily history."""
-    try:
-        ticker_obj = yf.Ticker(ticker)
-        hist = ticker_obj.history(period=f"{years}y")
-        if hist is None or hist.empty:
-            return 0.0, 0.0
-
-        start_price = float(hist["Close"].iloc[0])
-        end_price = float(hist["Close"].iloc[-1])
-        if start_price <= 0 or end_price <= 0:
-            return 0.0, 0.0
-
-        cagr = (end_price / start_price) ** (1 / years) - 1
-
-        # Daily returns -> annualized volatility (sqrt(252))
-        daily_returns = hist["Close"].pct_change().dropna()
-        if daily_returns.empty:
-            vol = 0.0
+def get_provider() -> MarketDataProvider:
+    return _PROVIDER["provider"]
+
+
+def set_provider(provider: MarketDataProvider):
+    """Swap the market data source (e.g. a ReplayProvider for load tests)."""
+    _PROVIDER["provider"] = provider
+
+
+@metrics.timed("market_ticker_fetch")
+def _fetch_history(ticker: str, start: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Download daily closes from the configured provider: the full history, or from `start` on."""
+    return get_provider().fetch_history(ticker, start, timeout=TICKER_TIMEOUT)
+
+
+def _load_ticker_series(ticker: str, online: bool) -> Tuple[Tuple[np.ndarray, np.ndarray], bool]:
+    """Return ((dates, closes), provider_ok) for a ticker.
+
+    Online, the local price store is topped up with the missing trailing
+    days first; if the provider fails (or we are offline) the stored
+    history is used as-is. Raises only when there is no data at all.
+    """
+    provider_ok = False
+    series = None
+    if online:
+        try:
+            series = price_store.refresh(ticker, _fetch_history)
+            provider_ok = True
+        except Exception:
+            series = None
+    if series is None:
+        series = price_store.load(ticker)
+    if series is None:
+        raise ProviderUnavailable(f"No stored or live price history for {ticker}")
+    return series, provider_ok
+
+
+def _fetch_all_series(tickers: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Load price series for all tickers concurrently within FETCH_DEADLINE.
+
+    While the circuit is open (or MARKET_OFFLINE is set) no network calls
+    are made and series come from the local price store only. Tickers with
+    neither live nor stored data, or that miss the deadline, are left out;
+    if none are left ProviderUnavailable is raised so the caller can serve
+    fallback data immediately.
+    """
+    online = not MARKET_OFFLINE and _BREAKER.allow()
+
+    futures = {_EXECUTOR.submit(_load_ticker_series, t, online): t for t in tickers}
+    done, not_done = wait(futures, timeout=FETCH_DEADLINE)
+
+    results = {}
+    provider_ok = 0
+    for future in done:
+        if future.exception() is None:
+            series, ok = future.result()
+            results[futures[future]] = series
+            provider_ok += ok
+    for future in not_done:
+        future.cancel()
+        # Too slow online; whatever is already on disk is still good enough
+        stored = price_store.load(futures[future])
+        if stored is not None:
+            results[futures[future]] = stored
+
+    if online:
+        if provider_ok:
+            _BREAKER.record_success()
         else:
-            vol = float(daily_returns.std() * (252 ** 0.5))
+            _BREAKER.record_failure()
+    if not results:
+        raise ProviderUnavailable("no ticker data available live or on disk")
+    return results
 
-        return round(cagr * 100, 2), round(vol * 100, 2)
-    except Exception:
-        return 0.0, 0.0
 
+STRATEGIES: List[Dict[str, Any]] = [
+    {
+        "name": "Dollar-Cost Averaging",
+        "description": "Invest fixed amounts at regular intervals to reduce timing risk",
+        "time_horizon": "5-10 years",
+        "success_rate": 85,
+    },
+    {
+        "name": "Portfolio Rebalancing",
+        "description": "Rebalance quarterly to maintain target allocations and risk",
+        "time_horizon": "Quarterly",
+        "success_rate": 78,
+    },
+    {
+        "name": "Dividend Reinvestment",
+        "description": "Automatically reinvest dividends to compound returns",
+        "time_horizon": "Long-term",
+        "success_rate": 88,
+    },
+]
+
+# Static market statistics used when no live or stored data is available
+FALLBACK_STATS: Dict[str, Any] = {
+    "top_sectors": [
+        {"name": "S&P 500 Index", "ticker": "VOO", "description": "Broad U.S. market", "risk_level": "Medium", "expected_return": 9.0, "volatility": 18.0, "min_investment": 50.0},
+        {"name": "Government Bonds (7-10y)", "ticker": "IEF", "description": "Lower-risk bonds", "risk_level": "Low", "expected_return": 4.0, "volatility": 6.0, "min_investment": 500.0},
+    ],
+    "strategies": [],
+    "return_bands": {"conservative": 5.0, "balanced": 7.0, "aggressive": 10.0},
+}
+
+
+@metrics.timed("market_fetch")
+def _build_market_stats() -> Dict[str, Any]:
+    """User-independent sector statistics and portfolio analytics; this is what gets cached."""
+    sector_tickers = [s.ticker for s in SECTORS]
+    universe = [entry["ticker"] for entry in load_universe()] or sector_tickers
+    # Only the sectors are fetched against FETCH_DEADLINE; the rest of the universe is read
+    # from the price store and topped up in the background, missing tickers first
+    stored = {t: price_store.load(t) for t in universe if t not in sector_tickers}
+    _start_universe_top_up([t for t, hist in stored.items() if hist is None],
+                           [t for t, hist in stored.items() if hist is not None])
+    series = _fetch_all_series(sector_tickers)
+    series.update({t: hist for t, hist in stored.items() if hist is not None})
 
-def _build_live_recommendations(monthly_income: float, current_savings_rate: float) -> Dict[str, Any]:
     sectors_out = []
     for s in SECTORS:
-        cagr, vol = _compute_cagr_and_volatility(s.ticker)
+        cagr, vol = cagr_and_volatility(*series[s.ticker]) if s.ticker in series else (0.0, 0.0)
         # Minimum investment is a heuristic here; could be broker-specific
         min_inv = 100.0 if s.risk_level != "Low" else 500.0
         sectors_out.append({
@@ -70,6 +259,24 @@ def _build_live_recommendations(monthly_income: float, current_savings_rate: flo
             "volatility": vol,
             "min_investment": min_inv,
         })
+    portfolio = analyze_universe({t: series[t] for t in universe if t in series})
+    # Monthly returns of each suggested allocation, for bootstrapped projections
+    return_history = {
+        level: portfolio_monthly_returns(series, allocation["weights"]).round(6).tolist()
+        for level, allocation in portfolio.get("allocations", {}).items()
+    }
+    return {
+        "top_sectors": sectors_out,
+        "strategies": STRATEGIES,
+        "return_bands": None,
+        "portfolio": portfolio,
+        "return_history": return_history,
+    }
+
+
+def _project_for_user(stats: Dict[str, Any], monthly_income: float, current_savings_rate: float) -> Dict[str, Any]:
+    """Per-user ranking, return bands and simulated future values from cached market stats."""
+    sectors_out = [dict(s) for s in stats["top_sectors"]]
 
     # Sort by expected return desc while avoiding extreme risk for conservative savers
     if current_savings_rate < 0.1:
@@ -77,89 +284,250 @@ def _build_live_recommendations(monthly_income: float, current_savings_rate: flo
     else:
         sectors_out = sorted(sectors_out, key=lambda x: x["expected_return"], reverse=True)
 
-    # Expected returns bands derived from blended sector results
-    avg_return = sum(s["expected_return"] for s in sectors_out[:3]) / max(1, len(sectors_out[:3]))
-    conservative = max(3.0, round(avg_return * 0.55, 1))
-    balanced = max(conservative + 1.0, round(avg_return * 0.8, 1))
-    aggressive = max(balanced + 1.0, round(avg_return * 1.05, 1))
+    if stats.get("return_bands"):
+        conservative = stats["return_bands"]["conservative"]
+        balanced = stats["return_bands"]["balanced"]
+        aggressive = stats["return_bands"]["aggressive"]
+    else:
+        # Expected returns bands derived from blended sector results
+        avg_return = sum(s["expected_return"] for s in sectors_out[:3]) / max(1, len(sectors_out[:3]))
+        conservative = max(3.0, round(avg_return * 0.55, 1))
+        balanced = max(conservative + 1.0, round(avg_return * 0.8, 1))
+        aggressive = max(balanced + 1.0, round(avg_return * 1.05, 1))
 
     annual_savings = max(0.0, float(monthly_income) * float(current_savings_rate) * 12.0)
+    rates = {"conservative": conservative, "balanced": balanced, "aggressive": aggressive}
+    allocations = stats.get("portfolio", {}).get("allocations", {})
 
-    def future_value(rate_pct: float, years: int = 5) -> float:
-        r = rate_pct / 100.0
-        # FV of a yearly contribution at end of each year, approximate
-        fv = 0.0
-        for _ in range(years):
-            fv = (fv + annual_savings) * (1 + r)
-        return round(fv, 2)
+    # Percentile bands come from one cached simulation per risk level with a
+    # contribution of 1/month; wealth scales linearly with the contribution
+    projections = {}
+    for level, rate in rates.items():
+        vol = allocations.get(level, {}).get("volatility") or DEFAULT_VOLATILITY[level]
+        unit = unit_projection(round(rate / 100.0, 4), round(vol / 100.0, 4), PROJECTION_YEARS)
+        scale = annual_savings / 12.0
+        projections[level] = {
+            "volatility": vol,
+            "years": unit["years"],
+            **{name: [round(v * scale, 2) for v in band] for name, band in unit["bands"].items()},
+        }
+
+    expected_returns = dict(rates)
+    for level in rates:
+        expected_returns[f"{level}_amount"] = projections[level]["p50"][-1]
 
     return {
         "top_sectors": sectors_out,
-        "strategies": [
-            {
-                "name": "Dollar-Cost Averaging",
-                "description": "Invest fixed amounts at regular intervals to reduce timing risk",
-                "time_horizon": "5-10 years",
-                "success_rate": 85,
-            },
-            {
-                "name": "Portfolio Rebalancing",
-                "description": "Rebalance quarterly to maintain target allocations and risk",
-                "time_horizon": "Quarterly",
-                "success_rate": 78,
-            },
-            {
-                "name": "Dividend Reinvestment",
-                "description": "Automatically reinvest dividends to compound returns",
-                "time_horizon": "Long-term",
-                "success_rate": 88,
-            },
-        ],
-        "expected_returns": {
-            "conservative": conservative,
-            "balanced": balanced,
-            "aggressive": aggressive,
-            "conservative_amount": future_value(conservative),
-            "balanced_amount": future_value(balanced),
-            "aggressive_amount": future_value(aggressive),
-        },
+        "suggested_allocations": allocations,
+        "strategies": [dict(s) for s in stats["strategies"]],
+        "expected_returns": expected_returns,
+        "projections": projections,
     }
 
 
-def get_market_recommendations(monthly_income: float, current_savings_rate: float, refresh: bool = False) -> Dict[str, Any]:
-    """Return cached or fresh market-backed recommendations."""
-    cache_ttl = 60 * 60  # 1 hour
-    now = time.time()
-    if not refresh and _CACHE["data"] and now - _CACHE["ts"] < cache_ttl:
-        data = dict(_CACHE["data"])  # shallow copy
-        data["last_updated"] = _CACHE["ts"]
-        return data
+def _build_live_recommendations(monthly_income: float, current_savings_rate: float) -> Dict[str, Any]:
+    return _project_for_user(_build_market_stats(), monthly_income, current_savings_rate)
+
 
+def _start_universe_top_up(missing: List[str], stored: List[str]):
+    """Fetch universe tickers into the price store on a background thread, missing ones first.
+
+    Runs without a deadline, so every ticker is eventually stored however
+    large the universe is; once a missing ticker arrives the stats are
+    rebuilt to include it. One worker tops up at a time, and the lease is
+    then held for half a cache lifetime so the rebuild doesn't fetch again.
+    """
+    tickers = missing + stored
+    if MARKET_OFFLINE or not tickers or _BREAKER.state != "closed":
+        return
+    if not shared_state.acquire(UNIVERSE_LEASE, len(tickers) * TICKER_TIMEOUT + 30):
+        return
+    threading.Thread(target=_run_universe_top_up, args=(tickers, set(missing)),
+                     name="market-universe", daemon=True).start()
+
+
+def _run_universe_top_up(tickers: List[str], missing: set):
+    added = False
+    failures = 0
     try:
-        data = _build_live_recommendations(monthly_income, current_savings_rate)
-    except Exception:
-        # Fallback minimal static data if live fetch fails
-        data = {
-            "top_sectors": [
-                {"name": "S&P 500 Index", "ticker": "VOO", "description": "Broad U.S. market", "risk_level": "Medium", "expected_return": 9.0, "volatility": 18.0, "min_investment": 50.0},
-                {"name": "Government Bonds (7-10y)", "ticker": "IEF", "description": "Lower-risk bonds", "risk_level": "Low", "expected_return": 4.0, "volatility": 6.0, "min_investment": 500.0},
-            ],
-            "strategies": [],
-            "expected_returns": {
-                "conservative": 5.0,
-                "balanced": 7.0,
-                "aggressive": 10.0,
-                "conservative_amount": 0.0,
-                "balanced_amount": 0.0,
-                "aggressive_amount": 0.0,
-            },
-        }
+        for ticker in tickers:
+            # A provider that keeps failing is left to the circuit breaker's next trial
+            if _BREAKER.state != "closed" or failures >= _BREAKER.failure_threshold:
+                break
+            try:
+                price_store.refresh(ticker, _fetch_history)
+            except Exception:
+                failures += 1
+                continue
+            failures = 0
+            added = added or ticker in missing
+    finally:
+        shared_state.acquire(UNIVERSE_LEASE, CACHE_TTL / 2)
+    if added:
+        _start_refresh()
+
 
-    _CACHE["data"] = data
-    _CACHE["ts"] = now
-    out = dict(data)
-    out["last_updated"] = now
+def _start_refresh() -> threading.Event:
+    """Start a background stats refresh unless one is already running (single-flight).
+
+    Returns the completion event of the refresh that will update the cache.
+    """
+    with _REFRESH_LOCK:
+        if _REFRESH["event"] is not None:
+            return _REFRESH["event"]
+        event = threading.Event()
+        _REFRESH["event"] = event
+    threading.Thread(target=_run_refresh, args=(event,), name="market-refresh", daemon=True).start()
+    return event
+
+
+def _run_refresh(event: threading.Event):
+    try:
+        previous_ts = _CACHE["ts"]
+        stats, fetched_at = None, None
+        if shared_state.acquire(REFRESH_LEASE, FETCH_DEADLINE + 30):
+            try:
+                stats = _build_market_stats()
+            except Exception:
+                stats = None
+            finally:
+                shared_state.release(REFRESH_LEASE)
+            if stats is not None:
+                fetched_at = time.time()
+                shared_state.set("market", "stats", {"data": stats, "ts": fetched_at})
+        else:
+            # Another worker is already fetching: wait for its result instead
+            # of calling the provider again
+            deadline = time.time() + FETCH_DEADLINE + 5
+            while time.time() < deadline and not _adopt_shared_stats(newer_than=previous_ts):
+                time.sleep(0.1)
+        with _REFRESH_LOCK:
+            if stats is not None:
+                _CACHE["data"] = stats
+                _CACHE["ts"] = fetched_at
+            elif _CACHE["data"] is None:
+                # Fallback minimal static data if live fetch fails on a cold cache;
+                # otherwise keep serving the last good stats and retry next time.
+                # The fallback is stored already expired so the next request retries.
+                _CACHE["data"] = FALLBACK_STATS
+                _CACHE["ts"] = 0.0
+    finally:
+        with _REFRESH_LOCK:
+            _REFRESH["event"] = None
+        event.set()
+
+
+def _adopt_shared_stats(newer_than: float = 0.0) -> bool:
+    """Take stats another worker published if they are newer than ours"""
+    shared = shared_state.get("market", "stats")
+    if not shared or shared["ts"] <= newer_than:
+        return False
+    with _REFRESH_LOCK:
+        if shared["ts"] > _CACHE["ts"] or _CACHE["data"] is FALLBACK_STATS:
+            _CACHE["data"] = shared["data"]
+            _CACHE["ts"] = shared["ts"]
+    return True
+
+
+def _current_stats(refresh: bool = False) -> Tuple[Dict[str, Any], float, bool, bool]:
+    """Return (stats, fetched_at, stale, refreshing) from the market stats cache.
+
+    Expired stats are served immediately while one background refresh runs
+    (stale-while-revalidate); only a cold cache makes callers wait, and they
+    all wait on the same refresh. Forced refreshes are rate-limited.
+    """
+    now = time.time()
+    _adopt_shared_stats(newer_than=_CACHE["ts"])
+    with _REFRESH_LOCK:
+        data, ts = _CACHE["data"], _CACHE["ts"]
+    # The lease is never released, so at most one forced refresh per
+    # interval gets through across all workers
+    refresh = refresh and shared_state.acquire(FORCED_REFRESH_LEASE, FORCED_REFRESH_INTERVAL,
+                                               owner=f"{os.getpid()}:{now}")
+
+    if data is None:
+        _start_refresh().wait(FETCH_DEADLINE + 5)
+        data, ts = _CACHE["data"], _CACHE["ts"]
+        if data is None:
+            data, ts = FALLBACK_STATS, now
+
+    stale = now - ts >= CACHE_TTL
+    metrics.cache_lookup("market_stats", data is not FALLBACK_STATS and not stale)
+    refreshing = False
+    if stale or refresh:
+        _start_refresh()
+        refreshing = True
+    return data, ts, stale, refreshing
+
+
+def stats_version() -> Tuple[float, bool]:
+    """(fetched_at, stale) of the stats this worker would serve; changes on refresh and on expiry"""
+    _adopt_shared_stats(newer_than=_CACHE["ts"])
+    ts = _CACHE["ts"]
+    return ts, time.time() - ts >= CACHE_TTL
+
+
+def get_market_recommendations(monthly_income: float, current_savings_rate: float, refresh: bool = False) -> Dict[str, Any]:
+    """Return recommendations projected for this user from cached or fresh market stats.
+
+    Only the user-independent market statistics are cached, so every
+    caller gets their own ranking and amounts.
+    """
+    data, ts, stale, refreshing = _current_stats(refresh)
+    out = _project_for_user(data, monthly_income, current_savings_rate)
+    out["last_updated"] = ts
+    out["stale"] = stale
+    out["refreshing"] = refreshing
+    return out
+
+
+def get_portfolio_analytics(refresh: bool = False) -> Dict[str, Any]:
+    """Per-ticker horizon metrics, correlations and risk-level allocations for the universe."""
+    data, ts, stale, refreshing = _current_stats(refresh)
+    out = dict(data.get("portfolio") or {})
+    out["last_updated"] = ts
+    out["stale"] = stale
+    out["refreshing"] = refreshing
     return out
 
 
+def get_savings_projection(years: int, monthly_contribution: float = 0.0, risk_level: str = "balanced",
+                           initial: float = 0.0, contribution_growth: float = 0.0,
+                           contributions: Optional[List[float]] = None, target: Optional[float] = None,
+                           method: str = "auto", paths: Optional[int] = None,
+                           seed: Optional[int] = None) -> Dict[str, Any]:
+    """Monte Carlo wealth bands for a savings plan invested at one risk level.
+
+    method "bootstrap" resamples the level's historical monthly returns,
+    "lognormal" draws from its expected return and volatility, and "auto"
+    bootstraps whenever at least two years of history are available.
+    """
+    if risk_level not in DEFAULT_VOLATILITY:
+        raise ValueError(f"risk_level must be one of {', '.join(DEFAULT_VOLATILITY)}")
+    if method not in ("auto", "bootstrap", "lognormal"):
+        raise ValueError("method must be auto, bootstrap or lognormal")
 
+    data, ts, stale, refreshing = _current_stats()
+    history = (data.get("return_history") or {}).get(risk_level) or []
+    if method == "bootstrap" and len(history) < 24:
+        raise ValueError("Not enough return history to bootstrap; use lognormal")
+    use_history = method != "lognormal" and len(history) >= 24
+
+    baseline = _project_for_user(data, 0.0, 0.1)
+    out = monte_carlo.simulate(
+        years,
+        monthly_contribution=monthly_contribution,
+        initial=initial,
+        contribution_growth=contribution_growth,
+        contributions=contributions,
+        history=history if use_history else None,
+        annual_return=baseline["expected_returns"][risk_level] / 100.0,
+        annual_volatility=baseline["projections"][risk_level]["volatility"] / 100.0,
+        paths=paths,
+        target=target,
+        seed=seed,
+    )
+    out["risk_level"] = risk_level
+    out["last_updated"] = ts
+    out["stale"] = stale
+    return out
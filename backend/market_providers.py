@@ -0,0 +1,149 @@
+import os
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class MarketDataProvider(ABC):
+    """Source of daily close prices.
+
+    fetch_history returns (dates as datetime64[D], closes as float64) for
+    the full history, or from `start` (ISO date) on. Implementations raise
+    on provider errors and return empty arrays when there is simply no data.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def fetch_history(self, ticker: str, start: Optional[str] = None,
+                      timeout: float = 10.0) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+
+def _empty() -> Tuple[np.ndarray, np.ndarray]:
+    return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance via yfinance."""
+
+    name = "yfinance"
+
+    def fetch_history(self, ticker: str, start: Optional[str] = None,
+                      timeout: float = 10.0) -> Tuple[np.ndarray, np.ndarray]:
+        import yfinance as yf
+
+        ticker_obj = yf.Ticker(ticker)
+        if start is None:
+            hist = ticker_obj.history(period="max", timeout=timeout)
+        else:
+            hist = ticker_obj.history(start=start, timeout=timeout)
+        if hist is None or hist.empty:
+            return _empty()
+        index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        return index.values.astype("datetime64[D]"), hist["Close"].to_numpy(dtype=np.float64)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Offline provider for load tests and CI.
+
+    Serves series recorded in `<directory>/<TICKER>.npz` (arrays `dates` and
+    `close`, as written by record()). Tickers without a recording get a
+    deterministic synthetic random walk seeded from the ticker name. Latency
+    and failures can be injected to exercise timeouts and the circuit breaker.
+    """
+
+    name = "replay"
+
+    def __init__(self, directory: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, synthesize: bool = True, seed: Optional[int] = None,
+                 end: Optional[str] = None):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.synthesize = synthesize
+        self.end = np.datetime64(end or date.today().isoformat(), "D")
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    @classmethod
+    def from_env(cls) -> "ReplayProvider":
+        return cls(
+            directory=os.environ.get("MARKET_REPLAY_DIR"),
+            latency=float(os.environ.get("MARKET_REPLAY_LATENCY", "0")),
+            jitter=float(os.environ.get("MARKET_REPLAY_JITTER", "0")),
+            error_rate=float(os.environ.get("MARKET_REPLAY_ERROR_RATE", "0")),
+        )
+
+    def record(self, ticker: str, dates: np.ndarray, close: np.ndarray):
+        """Save a series so later runs replay it"""
+        os.makedirs(self.directory, exist_ok=True)
+        np.savez_compressed(os.path.join(self.directory, f"{ticker.upper()}.npz"),
+                            dates=np.asarray(dates, dtype="datetime64[D]"),
+                            close=np.asarray(close, dtype=np.float64))
+
+    def fetch_history(self, ticker: str, start: Optional[str] = None,
+                      timeout: float = 10.0) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+            fail = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(min(delay, timeout))
+            if delay > timeout:
+                raise TimeoutError(f"replay latency {delay:.2f}s exceeded timeout for {ticker}")
+        if fail:
+            raise ConnectionError(f"injected provider error for {ticker}")
+
+        dates, close = self._load(ticker)
+        if start is not None:
+            keep = dates >= np.datetime64(start, "D")
+            dates, close = dates[keep], close[keep]
+        return dates, close
+
+    def _load(self, ticker: str) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if ticker in self._series:
+                return self._series[ticker]
+        series = None
+        if self.directory:
+            path = os.path.join(self.directory, f"{ticker.upper()}.npz")
+            if os.path.exists(path):
+                with np.load(path) as npz:
+                    series = npz["dates"].astype("datetime64[D]"), npz["close"].astype(np.float64)
+        if series is None:
+            series = self._synthetic(ticker) if self.synthesize else _empty()
+        with self._lock:
+            self._series[ticker] = series
+        return series
+
+    def _synthetic(self, ticker: str, years: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """Geometric random walk over business days, reproducible per ticker"""
+        rng = np.random.default_rng(zlib.crc32(ticker.upper().encode("utf-8")))
+        start = self.end - np.timedelta64(int(years * 365.25), "D")
+        days = np.arange(start, self.end + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        days = days[np.is_busday(days)]
+        drift = rng.uniform(0.02, 0.12) / 252
+        vol = rng.uniform(0.05, 0.30) / np.sqrt(252)
+        log_returns = rng.normal(drift - vol ** 2 / 2, vol, size=len(days))
+        close = rng.uniform(20, 400) * np.exp(np.cumsum(log_returns))
+        return days, close
+
+
+def provider_from_env() -> MarketDataProvider:
+    """Provider selected by MARKET_PROVIDER (yfinance by default, or replay)"""
+    name = os.environ.get("MARKET_PROVIDER", "yfinance").lower()
+    if name == "replay":
+        return ReplayProvider.from_env()
+    if name == "yfinance":
+        return YFinanceProvider()
+    raise ValueError(f"Unknown MARKET_PROVIDER: {name}")
@@ -0,0 +1,258 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Tuple
+
+from shared_state import shared_state
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# How often each worker publishes its numbers for /metrics to merge (0 = never)
+FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+# Snapshots of workers that stopped publishing are dropped after this long
+STALE_AFTER = float(os.environ.get("METRICS_STALE_AFTER", "60"))
+
+HELP = {
+    "http_request_duration_seconds": ("histogram", "Request latency by route, method and status"),
+    "stage_duration_seconds": ("histogram", "Time spent in internal stages"),
+    "cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "admission_wait_seconds": ("histogram", "Time admitted requests waited in an admission queue"),
+    "admission_requests_total": ("counter", "Admission decisions for expensive endpoints by gate and result"),
+    "admission_in_flight": ("gauge", "Requests running under each admission gate"),
+    "admission_queue_depth": ("gauge", "Requests waiting in each admission queue"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Spans of the request being traced on this thread: (trace start, [(stage, start offset, seconds)])
+_trace: contextvars.ContextVar = contextvars.ContextVar("metrics_trace", default=None)
+
+
+class Metrics:
+    """In-process latency histograms, stage timers, counters and gauges in Prometheus text format.
+
+    Recording is a bucket bisect plus a dict update under a lock, a couple
+    of microseconds. Each worker process keeps its own numbers and, once
+    start_worker() has run after fork, publishes a snapshot to shared state
+    every FLUSH_INTERVAL seconds; /metrics adds up the snapshots of all live
+    workers.
+    """
+
+    def __init__(self):
+        # (name, labels) -> [per-bucket counts (+Inf last), sum]
+        self._histograms: Dict[Tuple[str, Labels], list] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def observe(self, name: str, labels: Labels, seconds: float):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            entry = self._histograms.get((name, labels))
+            if entry is None:
+                entry = self._histograms[(name, labels)] = [[0] * (len(BUCKETS) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += seconds
+
+    def inc(self, name: str, labels: Labels, amount: float = 1):
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, labels: Labels, value: float):
+        with self._lock:
+            self._gauges[(name, labels)] = value
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        self.observe("http_request_duration_seconds",
+                     (("route", route), ("method", method), ("status", str(status))), seconds)
+
+    def cache_lookup(self, cache: str, hit: bool):
+        self.inc("cache_requests_total", (("cache", cache), ("result", "hit" if hit else "miss")))
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as an internal stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stage_done(name, started)
+
+    def timed(self, name: str):
+        """Decorator timing every call of a function as an internal stage"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._stage_done(name, started)
+            return wrapper
+        return decorator
+
+    def _stage_done(self, name: str, started: float):
+        seconds = time.perf_counter() - started
+        self.observe("stage_duration_seconds", (("stage", name),), seconds)
+        trace = _trace.get()
+        if trace is not None:
+            trace[1].append((name, started - trace[0], seconds))
+
+    # Per-request span traces
+
+    def begin_trace(self):
+        """Collect the stages run by the current request from here on"""
+        _trace.set((time.perf_counter(), []))
+
+    def end_trace(self) -> List[Dict[str, float]]:
+        """Stop collecting and return the spans in start order, times in milliseconds"""
+        trace = _trace.get()
+        _trace.set(None)
+        if trace is None:
+            return []
+        return [
+            {"stage": name, "start_ms": round(offset * 1000, 3), "ms": round(seconds * 1000, 3)}
+            for name, offset, seconds in sorted(trace[1], key=lambda span: span[1])
+        ]
+
+    # Cross-worker aggregation
+
+    def snapshot(self) -> Dict[str, list]:
+        with self._lock:
+            return {
+                "histograms": [[name, list(labels), list(counts), total]
+                               for (name, labels), (counts, total) in self._histograms.items()],
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "gauges": [[name, list(labels), value] for (name, labels), value in self._gauges.items()],
+            }
+
+    def flush(self):
+        """Publish this worker's numbers to shared state"""
+        shared_state.set("metrics", str(os.getpid()), {"ts": time.time(), **self.snapshot()})
+
+    def start_worker(self):
+        """Per-worker setup after fork: drop numbers inherited from the parent and start publishing.
+
+        Only called from the post_fork hook, so the gunicorn master never runs
+        a flusher and warm-up numbers aren't counted once per worker.
+        """
+        self._lock = threading.Lock()
+        self._histograms, self._counters, self._gauges = {}, {}, {}
+        self._start_flusher()
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        if FLUSH_INTERVAL > 0:
+            threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def collect(self) -> Tuple[Dict, Dict, Dict]:
+        """Histograms, counters and gauges summed over this worker and every live worker's snapshot"""
+        now, own = time.time(), str(os.getpid())
+        snapshots = [self.snapshot()]
+        if FLUSH_INTERVAL > 0:
+            for pid, snapshot in shared_state.items("metrics").items():
+                if pid == own:
+                    continue
+                if now - snapshot["ts"] > STALE_AFTER:
+                    shared_state.delete("metrics", pid)
+                    continue
+                snapshots.append(snapshot)
+
+        histograms: Dict[Tuple[str, Labels], list] = {}
+        counters: Dict[Tuple[str, Labels], float] = {}
+        gauges: Dict[Tuple[str, Labels], float] = {}
+        for snapshot in snapshots:
+            for name, labels, counts, total in snapshot["histograms"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                entry = histograms.setdefault(key, [[0] * len(counts), 0.0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, value in snapshot.get("gauges", []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                gauges[key] = gauges.get(key, 0) + value
+        return histograms, counters, gauges
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        histograms, counters, gauges = self.collect()
+        lines: List[str] = []
+
+        def header(name: str):
+            kind, text = HELP[name]
+            lines.append(f"# HELP finance_{name} {text}")
+            lines.append(f"# TYPE finance_{name} {kind}")
+
+        def label_text(labels: Labels, extra: str = "") -> str:
+            parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        for name in ("http_request_duration_seconds", "stage_duration_seconds", "admission_wait_seconds"):
+            series = sorted((labels, entry) for (n, labels), entry in histograms.items() if n == name)
+            if not series:
+                continue
+            header(name)
+            for labels, (counts, total) in series:
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), counts):
+                    cumulative += count
+                    bucket_labels = label_text(labels, 'le="%s"' % bound)
+                    lines.append(f"finance_{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"finance_{name}_sum{label_text(labels)} {total:.6f}")
+                lines.append(f"finance_{name}_count{label_text(labels)} {cumulative}")
+
+        cache_series = sorted((labels, value) for (n, labels), value in counters.items() if n == "cache_requests_total")
+        if cache_series:
+            header("cache_requests_total")
+            totals: Dict[str, List[float]] = {}
+            for labels, value in cache_series:
+                lines.append(f"finance_cache_requests_total{label_text(labels)} {value:g}")
+                cache, result = dict(labels)["cache"], dict(labels)["result"]
+                hits_misses = totals.setdefault(cache, [0, 0])
+                hits_misses[0 if result == "hit" else 1] += value
+            lines.append("# HELP finance_cache_hit_ratio Share of cache lookups that were hits")
+            lines.append("# TYPE finance_cache_hit_ratio gauge")
+            for cache, (hits, misses) in sorted(totals.items()):
+                ratio = hits / (hits + misses) if hits + misses else 0.0
+                lines.append(f'finance_cache_hit_ratio{{cache="{_escape(cache)}"}} {ratio:.4f}')
+
+        for name, values in (("admission_requests_total", counters), ("admission_in_flight", gauges),
+                             ("admission_queue_depth", gauges)):
+            series = sorted((labels, value) for (n, labels), value in values.items() if n == name)
+            if not series:
+                continue
+            header(name)
+            for labels, value in series:
+                lines.append(f"finance_{name}{label_text(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# Global instance
+metrics = Metrics()
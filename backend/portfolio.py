@@ -0,0 +1,235 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+TRADING_DAYS = 252
+HORIZONS = (1, 3, 5, 10)
+
+# Where each risk level sits between the minimum- and maximum-volatility
+# ends of the efficient frontier
+RISK_LEVEL_POSITIONS = {
+    "conservative": 0.15,
+    "balanced": 0.5,
+    "aggressive": 0.85,
+}
+
+
+def load_universe(path: Optional[str] = None) -> List[Dict[str, str]]:
+    """Read the analytics universe: a JSON list of {"ticker", "name", ...} objects.
+
+    Path defaults to MARKET_UNIVERSE_FILE; without a file the universe is empty
+    and callers fall back to their own ticker list.
+    """
+    path = path or os.environ.get("MARKET_UNIVERSE_FILE")
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        entries = json.load(f)
+    return [e if isinstance(e, dict) else {"ticker": e} for e in entries]
+
+
+def align_prices(series: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 since: Optional[np.datetime64] = None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Stack per-ticker (dates, closes) into one (days x tickers) matrix.
+
+    Rows are the union of trading days (from `since` on, if given); a
+    ticker's price is carried forward over days it did not trade and is NaN
+    before its first close.
+    """
+    tickers = [t for t in sorted(series) if len(series[t][0])]
+    if not tickers:
+        return [], np.array([], dtype="datetime64[D]"), np.zeros((0, 0))
+    day_numbers = [series[t][0].astype("datetime64[D]").astype(np.int64) for t in tickers]
+    if since is not None:
+        cutoff = np.datetime64(since, "D").astype(np.int64)
+        keep = [days >= cutoff for days in day_numbers]
+    else:
+        keep = [slice(None)] * len(tickers)
+    first = min(int(days[k][0]) for days, k in zip(day_numbers, keep) if len(days[k]))
+    last = max(int(days[-1]) for days in day_numbers)
+
+    # Union of trading days via a calendar bitmap instead of sorting every date
+    calendar = np.zeros(last - first + 1, dtype=bool)
+    for days, k in zip(day_numbers, keep):
+        calendar[days[k] - first] = True
+    row_of_day = np.cumsum(calendar) - 1
+    dates = (np.flatnonzero(calendar) + first).astype("datetime64[D]")
+
+    prices = np.full((len(dates), len(tickers)), np.nan)
+    for col, (days, k) in enumerate(zip(day_numbers, keep)):
+        prices[row_of_day[days[k] - first], col] = series[tickers[col]][1][k]
+
+    # Forward fill, vectorized: index of the last valid row at or before each row
+    valid = ~np.isnan(prices)
+    last_valid = np.where(valid, np.arange(len(dates))[:, None], 0)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    filled = prices[last_valid, np.arange(len(tickers))]
+    filled[np.cumsum(valid, axis=0) == 0] = np.nan
+    return tickers, dates, filled
+
+
+def horizon_metrics(dates: np.ndarray, prices: np.ndarray, horizons: Sequence[int] = HORIZONS,
+                    risk_free: float = 0.02) -> Dict[int, Dict[str, np.ndarray]]:
+    """CAGR, volatility, Sharpe and max drawdown per ticker for each horizon (years).
+
+    Every metric is a vector over tickers; tickers without a full horizon of
+    history get NaN for that horizon.
+    """
+    metrics = {}
+    last = dates[-1]
+    for years in horizons:
+        start = np.searchsorted(dates, last - np.timedelta64(int(round(years * 365.25)), "D"))
+        window = prices[start:]
+        if len(window) < 2:
+            continue
+        span_years = (dates[-1] - dates[start]).astype(int) / 365.25
+        first, end = window[0], window[-1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cagr = (end / first) ** (1 / span_years) - 1
+            daily = window[1:] / window[:-1] - 1
+            vol = np.nanstd(daily, axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+            sharpe = (cagr - risk_free) / vol
+            running_max = np.fmax.accumulate(window, axis=0)
+            drawdown = np.nanmin(window / running_max - 1, axis=0)
+        # A ticker only gets metrics for horizons its history fully covers
+        incomplete = np.isnan(first)
+        vol[incomplete] = np.nan
+        drawdown[incomplete] = np.nan
+        metrics[years] = {
+            "cagr": cagr,
+            "volatility": vol,
+            "sharpe": np.where(vol > 0, sharpe, np.nan),
+            "max_drawdown": drawdown,
+        }
+    return metrics
+
+
+def return_moments(prices: np.ndarray, years: int = 5) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Annualized mean returns, covariance and correlation over the trailing window.
+
+    Missing observations are handled pairwise: each covariance entry uses the
+    days on which both tickers have a return.
+    """
+    window = prices[-int(years * TRADING_DAYS) - 1:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily = window[1:] / window[:-1] - 1
+    mask = ~np.isnan(daily)
+    counts = mask.sum(axis=0)
+    mean = np.where(counts > 0, np.nansum(daily, axis=0) / np.maximum(counts, 1), 0.0)
+    centered = np.where(mask, daily - mean, 0.0)
+    pair_counts = mask.T.astype(float) @ mask.astype(float)
+    cov = (centered.T @ centered) / np.maximum(pair_counts - 1, 1)
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.outer(std, std)
+    corr[~np.isfinite(corr)] = 0.0
+    np.fill_diagonal(corr, 1.0)
+    return mean * TRADING_DAYS, cov * TRADING_DAYS, corr
+
+
+def _project_to_simplex(v: np.ndarray) -> np.ndarray:
+    """Euclidean projection of every column of v onto {w >= 0, sum(w) = 1}"""
+    n = v.shape[0]
+    u = -np.sort(-v, axis=0)
+    css = np.cumsum(u, axis=0) - 1
+    index = np.arange(1, n + 1)[:, None]
+    rho = np.count_nonzero(u - css / index > 0, axis=0)
+    theta = css[rho - 1, np.arange(v.shape[1])] / rho
+    return np.maximum(v - theta, 0)
+
+
+def efficient_frontier(mean: np.ndarray, cov: np.ndarray, points: int = 16,
+                       iterations: int = 400, tolerance: float = 1e-6) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Long-only mean-variance frontier.
+
+    Solves max w.mu - (lambda / 2) w'Sigma w on the simplex for a grid of
+    risk aversions at once (one column of W per lambda) with accelerated
+    projected gradient. Returns (weights N x points, returns, volatilities).
+    """
+    n = len(mean)
+    # Clip tiny/negative eigenvalues from pairwise estimation so the problem stays convex
+    eigenvalues, vectors = np.linalg.eigh((cov + cov.T) / 2)
+    eigenvalues = np.maximum(eigenvalues, 1e-10)
+    cov = (vectors * eigenvalues) @ vectors.T
+    lambdas = np.logspace(-1, 3, points)
+    step = 1.0 / (lambdas * eigenvalues.max())
+
+    weights = np.full((n, points), 1.0 / n)
+    momentum = weights.copy()
+    t = 1.0
+    for _ in range(iterations):
+        gradient = mean[:, None] - (cov @ momentum) * lambdas
+        updated = _project_to_simplex(momentum + gradient * step)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum = updated + (updated - weights) * ((t - 1) / t_next)
+        converged = np.abs(updated - weights).max() < tolerance
+        weights, t = updated, t_next
+        if converged:
+            break
+
+    returns = mean @ weights
+    volatility = np.sqrt(np.einsum("ik,ij,jk->k", weights, cov, weights))
+    return weights, returns, volatility
+
+
+def allocate(tickers: List[str], mean: np.ndarray, cov: np.ndarray, top: int = 10) -> Dict[str, Any]:
+    """Suggested weights per risk level, picked from the efficient frontier"""
+    usable = np.isfinite(mean) & np.isfinite(np.diag(cov)) & (np.diag(cov) > 0)
+    if usable.sum() == 0:
+        return {}
+    index = np.flatnonzero(usable)
+    weights, returns, volatility = efficient_frontier(mean[index], cov[np.ix_(index, index)])
+
+    low, high = volatility.min(), volatility.max()
+    allocations = {}
+    for level, position in RISK_LEVEL_POSITIONS.items():
+        column = int(np.argmin(np.abs(volatility - (low + (high - low) * position))))
+        w = weights[:, column]
+        order = np.argsort(-w)[:top]
+        allocations[level] = {
+            "expected_return": round(float(returns[column]) * 100, 2),
+            "volatility": round(float(volatility[column]) * 100, 2),
+            "weights": {tickers[index[i]]: round(float(w[i]), 4) for i in order if w[i] >= 0.005},
+        }
+    return allocations
+
+
+def analyze_universe(series: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                     horizons: Sequence[int] = HORIZONS, risk_free: float = 0.02) -> Dict[str, Any]:
+    """Full analytics for a set of price series: per-horizon metrics, correlations and allocations"""
+    # Only the longest horizon (plus a few days of slack) is ever needed
+    latest = max((s[0][-1] for s in series.values() if len(s[0])), default=None)
+    since = None
+    if latest is not None:
+        since = latest.astype("datetime64[D]") - np.timedelta64(int(round(max(horizons) * 365.25)) + 7, "D")
+    tickers, dates, prices = align_prices(series, since)
+    if len(tickers) == 0 or len(dates) < 2:
+        return {}
+    metrics = horizon_metrics(dates, prices, horizons, risk_free)
+    mean, cov, corr = return_moments(prices)
+
+    def pct(value: float) -> Optional[float]:
+        return round(float(value) * 100, 2) if np.isfinite(value) else None
+
+    per_ticker = {}
+    for col, ticker in enumerate(tickers):
+        per_ticker[ticker] = {
+            f"{years}y": {
+                "cagr": pct(m["cagr"][col]),
+                "volatility": pct(m["volatility"][col]),
+                "sharpe": round(float(m["sharpe"][col]), 2) if np.isfinite(m["sharpe"][col]) else None,
+                "max_drawdown": pct(m["max_drawdown"][col]),
+            }
+            for years, m in metrics.items()
+        }
+
+    return {
+        "as_of": str(dates[-1]),
+        "tickers": tickers,
+        "metrics": per_ticker,
+        "correlation": np.round(corr, 3).tolist(),
+        "allocations": allocate(tickers, mean, cov),
+    }
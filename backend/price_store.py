@@ -0,0 +1,133 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+# A fetch function takes (ticker, start) where start is an ISO date string
+# (fetch from that day on) or None (fetch the full history) and returns
+# (dates as datetime64[D], closes as float64).
+FetchFn = Callable[[str, Optional[str]], Tuple[np.ndarray, np.ndarray]]
+
+
+class PriceStore:
+    """On-disk daily close history, one compressed NPZ file per ticker.
+
+    Refreshes only download the days after the last stored date. Stored
+    series are periodically re-downloaded in full because the provider
+    returns dividend/split-adjusted closes, which shift older prices.
+    """
+
+    def __init__(self, directory: str = None, full_refresh_days: float = 30):
+        self.directory = directory or os.environ.get("MARKET_CACHE_DIR", "market_cache")
+        self.full_refresh_seconds = full_refresh_days * 24 * 3600
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.directory, f"{ticker.upper()}.npz")
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def load(self, ticker: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return stored (dates, closes) or None"""
+        record = self._load_record(ticker)
+        if record is None:
+            return None
+        return record["dates"], record["close"]
+
+    def _load_record(self, ticker: str) -> Optional[dict]:
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as npz:
+                return {key: npz[key] for key in npz.files}
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, ticker: str, dates: np.ndarray, close: np.ndarray, full_fetched_at: float):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{ticker}.", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    dates=dates.astype("datetime64[D]"),
+                    close=close.astype(np.float64),
+                    fetched_at=np.float64(time.time()),
+                    full_fetched_at=np.float64(full_fetched_at),
+                )
+            os.replace(tmp_path, self._path(ticker))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def refresh(self, ticker: str, fetch: FetchFn) -> Tuple[np.ndarray, np.ndarray]:
+        """Bring a ticker up to date and return its full (dates, closes).
+
+        Provider errors propagate; callers decide whether to fall back to
+        load() for offline operation.
+        """
+        with self._lock_for(ticker):
+            record = self._load_record(ticker)
+            now = time.time()
+            if record is None or now - float(record["full_fetched_at"]) > self.full_refresh_seconds:
+                dates, close = fetch(ticker, None)
+                dates, close = self._clean(dates, close)
+                if len(dates) == 0:
+                    raise ValueError(f"No price history for {ticker}")
+                self._save(ticker, dates, close, full_fetched_at=now)
+                return dates, close
+
+            dates, close = record["dates"], record["close"]
+            start = (dates[-1].astype(object) + timedelta(days=1)).isoformat()
+            new_dates, new_close = self._clean(*fetch(ticker, start))
+            keep = new_dates > dates[-1]
+            if keep.any():
+                dates = np.concatenate([dates, new_dates[keep]])
+                close = np.concatenate([close, new_close[keep]])
+            self._save(ticker, dates, close, full_fetched_at=float(record["full_fetched_at"]))
+            return dates, close
+
+    @staticmethod
+    def _clean(dates: np.ndarray, close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted, de-duplicated, finite, positive closes"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        close = np.asarray(close, dtype=np.float64)
+        valid = np.isfinite(close) & (close > 0)
+        dates, close = dates[valid], close[valid]
+        dates, first = np.unique(dates, return_index=True)
+        return dates, close[first]
+
+
+def cagr_and_volatility(dates: np.ndarray, close: np.ndarray, years: int = 5) -> Tuple[float, float]:
+    """CAGR% and annualized volatility% over the trailing `years` of a stored series"""
+    if len(close) < 2:
+        return 0.0, 0.0
+    cutoff = dates[-1] - np.timedelta64(int(round(years * 365.25)), "D")
+    window = close[dates >= cutoff]
+    window_dates = dates[dates >= cutoff]
+    if len(window) < 2:
+        return 0.0, 0.0
+
+    span_years = (window_dates[-1] - window_dates[0]).astype(int) / 365.25
+    if span_years <= 0:
+        return 0.0, 0.0
+    cagr = (window[-1] / window[0]) ** (1 / span_years) - 1
+
+    # Daily returns -> annualized volatility (sqrt(252))
+    daily_returns = window[1:] / window[:-1] - 1
+    vol = float(daily_returns.std(ddof=1) * (252 ** 0.5)) if len(daily_returns) > 1 else 0.0
+
+    return round(float(cagr) * 100, 2), round(vol * 100, 2)
+
+# Global instance
+price_store = PriceStore()
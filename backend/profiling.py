@@ -0,0 +1,114 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger("slow_requests")
+
+# Where profiles of sampled/requested requests are written
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# Fraction of requests profiled at random (0 = only on request)
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+# A request sending this value in the X-Profile header is profiled; unset = header ignored
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+# Requests slower than this are logged with their span breakdown (0 = off)
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+# Optional file for the slow-request log, one JSON object per line (default: stderr)
+SLOW_REQUEST_LOG = os.environ.get("SLOW_REQUEST_LOG", "")
+
+
+class RequestProfiler:
+    """Opt-in cProfile runs for single requests and a slow-request span log.
+
+    A request is profiled when it carries X-Profile matching PROFILE_TOKEN or
+    is picked by PROFILE_SAMPLE_RATE. cProfile only sees the thread that
+    enabled it, so concurrent requests are unaffected; one profile runs per
+    process at a time and others are simply not profiled.
+    """
+
+    def __init__(self):
+        self.profile_dir = PROFILE_DIR
+        self.sample_rate = PROFILE_SAMPLE_RATE
+        self.token = PROFILE_TOKEN
+        self.slow_ms = SLOW_REQUEST_MS
+        self._busy = threading.Lock()
+        # Without a handler of its own only warnings would reach stderr and profile summaries would be lost
+        handler = logging.FileHandler(SLOW_REQUEST_LOG) if SLOW_REQUEST_LOG else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    def wants_profile(self, header: Optional[str]) -> bool:
+        if self.token and header == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Enable a profiler on this thread, or None if another request is being profiled"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool already owns this interpreter
+            self._busy.release()
+            return None
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, method: str, route: str) -> str:
+        """Stop the profiler, write its stats and return the file name"""
+        profiler.disable()
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{method.lower()}-{slug}-{os.getpid()}.prof"
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+            logger.info("📊 Profiled %s %s -> %s\n%s", method, route, name, self.summary(profiler))
+            return name
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def summary(profiler: cProfile.Profile, limit: int = 15) -> str:
+        """Top functions by cumulative time, as printed by pstats"""
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def log_if_slow(self, method: str, route: str, status: int, seconds: float,
+                    spans: List[Dict[str, float]]) -> bool:
+        """Log a request over the threshold with the stages it ran and the time they don't explain"""
+        elapsed_ms = seconds * 1000
+        if self.slow_ms <= 0 or elapsed_ms < self.slow_ms:
+            return False
+        # Nested stages (e.g. categorize inside an engine) are listed but not double counted
+        covered, end = 0.0, 0.0
+        for span in spans:
+            span_end = span["start_ms"] + span["ms"]
+            if span_end > end:
+                covered += span_end - max(span["start_ms"], end)
+                end = span_end
+        logger.warning(json.dumps({
+            "event": "slow_request",
+            "method": method,
+            "route": route,
+            "status": status,
+            "ms": round(elapsed_ms, 3),
+            "spans": spans,
+            "unattributed_ms": round(max(0.0, elapsed_ms - covered), 3),
+            "pid": os.getpid(),
+            "ts": time.time(),
+        }))
+        return True
+
+# Global instance
+request_profiler = RequestProfiler()
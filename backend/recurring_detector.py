@@ -0,0 +1,235 @@
+import bisect
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+
+# (name, period in days, allowed jitter in days)
+PERIODS = [
+    ('weekly', 7, 2),
+    ('monthly', 30.44, 4),
+    ('yearly', 365.25, 10),
+]
+
+
+class RecurringDetector:
+    """Find recurring charges (subscriptions, bills) in the expense history.
+
+    Expenses are hashed by normalized description, then each group is sorted
+    by date and split into amount bands, so a full scan is O(n log n). The
+    per-description groups are kept between calls: a new expense only
+    re-analyzes its own group.
+    """
+
+    def __init__(self):
+        self.band_ratio = 1.3       # amounts further apart than this are different charges
+        self.min_occurrences = 3
+        self.min_match_ratio = 0.75  # share of gaps that must fit the period
+        self.price_change_threshold = 0.01
+
+        self._groups: Dict[str, List[Tuple[int, float, Any, str, str]]] = defaultdict(list)
+        self._patterns: Dict[str, List[Dict[str, Any]]] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_description(description: str) -> str:
+        """Lowercase and strip digits/punctuation so 'NETFLIX.COM 0423' matches 'Netflix.com'"""
+        text = re.sub(r'[^a-z ]+', ' ', description.lower())
+        return ' '.join(text.split())
+
+    def get(self, expenses: List[Dict], version: int) -> List[Dict[str, Any]]:
+        """Return detected patterns for expenses at the given data version"""
+        with self._lock:
+            hit = self._version == version
+            if not hit:
+                self._rebuild(expenses)
+                self._version = version
+            patterns = [pattern for patterns in self._patterns.values() for pattern in patterns]
+        metrics.cache_lookup('recurring', hit)
+        return patterns
+
+    def record(self, version: int, added: Optional[Dict] = None, removed: Optional[Dict] = None):
+        """Apply a committed mutation that moved the data from version - 1 to version"""
+        with self._lock:
+            if self._version != version - 1:
+                self._version = None
+                return
+            touched = set()
+            if removed is not None:
+                touched.add(self._remove(removed))
+            if added is not None:
+                touched.add(self._add(added))
+            for key in touched:
+                self._analyze_group(key)
+            self._version = version
+
+    def summarize(self, patterns: List[Dict[str, Any]], fixed_costs: Dict[str, Any],
+                  today: Optional[date] = None) -> Dict[str, Any]:
+        """Build the /budget/recurring payload: patterns, fixed-cost suggestions and price changes"""
+        today = today or date.today()
+        recurring = []
+        for pattern in patterns:
+            pattern = dict(pattern)
+            pattern['is_active'] = (today - date.fromisoformat(pattern['last_date'])).days <= pattern['interval_days'] * 1.5 + 7
+            recurring.append(pattern)
+        recurring.sort(key=lambda p: p['monthly_equivalent'], reverse=True)
+
+        suggested = []
+        seen_categories = set(fixed_costs)
+        for pattern in recurring:
+            if not pattern['is_active'] or pattern['frequency'] == 'weekly':
+                continue
+            if pattern['category'] in seen_categories:
+                continue
+            seen_categories.add(pattern['category'])
+            suggested.append({
+                'category': pattern['category'],
+                'amount': pattern['monthly_equivalent'],
+                'description': pattern['description'],
+                'reason': f"Charged {pattern['frequency']} {pattern['occurrences']} times"
+            })
+
+        return {
+            'recurring': recurring,
+            'suggested_fixed_costs': suggested,
+            'price_changes': [p for p in recurring if p['price_change'] and p['is_active']],
+            'monthly_total': round(sum(p['monthly_equivalent'] for p in recurring if p['is_active']), 2)
+        }
+
+    def _rebuild(self, expenses: List[Dict]):
+        self._groups = defaultdict(list)
+        for exp in expenses:
+            key = self.normalize_description(exp.get('description', ''))
+            entry = self._entry(exp)
+            if key and entry is not None:
+                self._groups[key].append(entry)
+        self._patterns = {}
+        for key, entries in self._groups.items():
+            entries.sort(key=lambda e: (e[0], str(e[2])))
+            self._analyze_group(key)
+
+    def _entry(self, expense: Dict) -> Optional[Tuple[int, float, Any, str, str]]:
+        try:
+            day = date.fromisoformat(expense['date'][:10]).toordinal()
+        except (TypeError, ValueError):
+            # A malformed date can't be placed in a series
+            return None
+        return (day, float(expense['amount']), expense.get('id'), expense.get('category', 'Other'), expense.get('description', ''))
+
+    def _add(self, expense: Dict) -> str:
+        key = self.normalize_description(expense.get('description', ''))
+        entry = self._entry(expense)
+        if key and entry is not None:
+            bisect.insort(self._groups[key], entry, key=lambda e: (e[0], str(e[2])))
+        return key
+
+    def _remove(self, expense: Dict) -> str:
+        key = self.normalize_description(expense.get('description', ''))
+        entries = self._groups.get(key, [])
+        for i, entry in enumerate(entries):
+            if entry[2] == expense.get('id'):
+                entries.pop(i)
+                break
+        return key
+
+    def _analyze_group(self, key: str):
+        """Re-detect patterns for one normalized description"""
+        entries = self._groups.get(key)
+        if not key or not entries or len(entries) < 2:
+            self._patterns.pop(key, None)
+            if key in self._groups and not self._groups[key]:
+                del self._groups[key]
+            return
+
+        # Split into amount bands: sort by amount and cut where the jump is too large
+        by_amount = sorted(entries, key=lambda e: e[1])
+        bands, band = [], [by_amount[0]]
+        for entry in by_amount[1:]:
+            if band[-1][1] > 0 and entry[1] / band[-1][1] > self.band_ratio:
+                bands.append(band)
+                band = []
+            band.append(entry)
+        bands.append(band)
+
+        patterns = []
+        for band in bands:
+            band.sort(key=lambda e: e[0])
+            pattern = self._detect_period(key, band)
+            if pattern:
+                patterns.append(pattern)
+        if patterns:
+            self._patterns[key] = patterns
+        else:
+            self._patterns.pop(key, None)
+
+    def _detect_period(self, key: str, band: List[Tuple[int, float, Any, str, str]]) -> Optional[Dict[str, Any]]:
+        gaps = [b[0] - a[0] for a, b in zip(band, band[1:])]
+        gaps = [gap for gap in gaps if gap > 0]
+        if not gaps:
+            return None
+        typical_gap = median(gaps)
+
+        for name, period, jitter in PERIODS:
+            if abs(typical_gap - period) > jitter:
+                continue
+            # A skipped charge shows up as a gap of ~2 or ~3 periods; still a match
+            matches = sum(
+                1 for gap in gaps
+                if round(gap / period) >= 1 and abs(gap - round(gap / period) * period) <= jitter * round(gap / period)
+            )
+            min_occurrences = 2 if name == 'yearly' else self.min_occurrences
+            if len(band) < min_occurrences or matches / len(gaps) < self.min_match_ratio:
+                return None
+
+            amounts = [entry[1] for entry in band]
+            last_day, last_amount = band[-1][0], band[-1][1]
+            return {
+                'key': key,
+                'description': Counter(entry[4] for entry in band).most_common(1)[0][0],
+                'category': Counter(entry[3] for entry in band).most_common(1)[0][0],
+                'frequency': name,
+                'interval_days': round(typical_gap, 1),
+                'occurrences': len(band),
+                'typical_amount': round(median(amounts), 2),
+                'last_amount': round(last_amount, 2),
+                'last_date': date.fromordinal(last_day).isoformat(),
+                'next_expected_date': (date.fromordinal(last_day) + timedelta(days=round(period))).isoformat(),
+                'monthly_equivalent': round(last_amount * 30.44 / period, 2),
+                'expense_ids': [entry[2] for entry in band],
+                'price_change': self._price_change(band)
+            }
+        return None
+
+    def _price_change(self, band: List[Tuple[int, float, Any, str, str]]) -> Optional[Dict[str, Any]]:
+        """Most recent step between two stable price levels, e.g. 12.99 -> 15.49.
+
+        Series whose amount varies every time (groceries) have no stable
+        earlier level and are never flagged.
+        """
+        def same(a: float, b: float) -> bool:
+            return abs(a - b) <= max(a, b) * self.price_change_threshold
+
+        current = band[-1][1]
+        start = len(band) - 1
+        while start > 0 and same(band[start - 1][1], current):
+            start -= 1
+        if start == 0:
+            return None
+        previous = band[start - 1][1]
+        if start < 2 or not same(band[start - 2][1], previous):
+            return None
+        return {
+            'previous_amount': round(previous, 2),
+            'current_amount': round(current, 2),
+            'change_percent': round((current - previous) / previous * 100, 1) if previous else None,
+            'changed_on': date.fromordinal(band[start][0]).isoformat()
+        }
+
+# Global instance
+recurring_detector = RecurringDetector()
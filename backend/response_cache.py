@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from metrics import metrics
+from shared_state import shared_state
+
+
+class ResponseCache:
+    """Version-keyed cache of rendered GET responses.
+
+    Entries are keyed on (endpoint, query args, data version, budget version),
+    so a mutation never has to invalidate anything: bumping a version simply
+    makes the old keys unreachable and they age out of the LRU. The data
+    version is a shared counter, so every worker process sees a write made
+    by any of them.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.data_version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Salting the ETag keeps a client's tag from matching different data
+        # if the shared counters are ever reset; shared so all workers agree.
+        self._salt = None
+
+    def bump_data_version(self) -> int:
+        """Mark expense data as changed for every worker"""
+        version = shared_state.increment('expenses')
+        with self._lock:
+            self.data_version = max(self.data_version, version)
+            return version
+
+    def sync_data_version(self) -> int:
+        """Pick up writes made by other workers"""
+        version = shared_state.counter('expenses')
+        with self._lock:
+            self.data_version = max(self.data_version, version)
+            return self.data_version
+
+    def make_etag(self, key: Tuple) -> str:
+        """Derive a stable entity tag from a cache key"""
+        if self._salt is None:
+            self._salt = shared_state.setdefault('meta', 'etag_salt', os.urandom(8).hex())
+        return hashlib.sha1(f"{self._salt}:{key!r}".encode('utf-8')).hexdigest()[:20]
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """Return the cached entry for key, if any"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.cache_lookup('response', entry is not None)
+        return entry
+
+    def put(self, key: Tuple, body: bytes, mimetype: str, etag: str) -> Dict:
+        """Store a rendered response body and return its entry"""
+        # 'encoded' holds compressed variants of body, filled in on demand
+        entry = {'body': body, 'mimetype': mimetype, 'etag': etag, 'encoded': {}}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Drop all cached responses"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'data_version': self.data_version,
+            }
+
+# Global instance
+response_cache = ResponseCache()
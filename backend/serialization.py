@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+# auto (orjson when installed), orjson or stdlib
+JSON_ENCODER = os.environ.get("JSON_ENCODER", "auto").lower()
+
+
+def _default(value: Any) -> Any:
+    """Types the encoders don't handle natively"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class Serializer:
+    """The JSON encoder behind both the JSON stores and API responses.
+
+    Output is compact UTF-8 bytes. orjson is used when installed (unless
+    JSON_ENCODER=stdlib) and is several times faster than the stdlib encoder
+    on large expense lists; anything orjson refuses (e.g. integers beyond
+    64 bits) falls back to the stdlib encoder. The one difference is NaN and
+    Infinity, which orjson writes as null: values bound for the stores must
+    be finite, and the API rejects any that aren't.
+    """
+
+    def __init__(self, encoder: str = JSON_ENCODER):
+        if encoder == "orjson" and orjson is None:
+            raise ImportError("JSON_ENCODER=orjson but orjson is not installed")
+        self.fast = orjson is not None and encoder != "stdlib"
+        self.name = "orjson" if self.fast else "stdlib"
+
+    def dumps(self, obj: Any) -> bytes:
+        if self.fast:
+            try:
+                return orjson.dumps(obj, default=_default,
+                                    option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        if self.fast:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    def read_file(self, path: str) -> Any:
+        with open(path, "rb") as f:
+            return self.loads(f.read())
+
+    def write_file(self, path: str, obj: Any):
+        """Write obj to path atomically: temp file in the same directory, then rename.
+
+        Other workers reading the file never see it half-written.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        prefix = "." + os.path.splitext(os.path.basename(path))[0] + "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.dumps(obj))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+# Global instance
+serializer = Serializer()
@@ -0,0 +1,69 @@
+import logging
+import os
+import time
+from datetime import date
+from typing import Dict
+
+from app import app, load_aggregates
+from ai_categorizer import categorizer
+from smart_suggestions import suggestions_engine
+from financial_health import health_calculator
+from budget_manager import budget_manager
+from forecasting import spend_forecaster
+from metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Fetch market statistics in each worker right after it starts
+WARM_MARKET_STATS = os.environ.get("WARM_MARKET_STATS", "").lower() in ("1", "true", "yes")
+
+
+def warm_up() -> Dict[str, float]:
+    """Run every global engine once so the first real request doesn't pay for it.
+
+    Safe to call before forking: nothing here starts threads. Returns the
+    seconds spent per step.
+    """
+    today = date.today().isoformat()
+    sample = [
+        {'amount': amount, 'category': category, 'date': today, 'description': description}
+        for amount, category, description in [
+            (4.5, 'Food', 'Coffee'), (32.0, 'Transport', 'Uber ride'), (120.0, 'Bills', 'Electricity bill'),
+            (15.99, 'Entertainment', 'Netflix'), (64.2, 'Food', 'Grocery store'),
+        ]
+    ]
+    steps = [
+        ('categorizer', lambda: categorizer.categorize('Starbucks coffee')),
+        ('suggestions_engine', lambda: suggestions_engine.analyze_spending_patterns(sample, 3000)),
+        ('health_calculator', lambda: health_calculator.calculate_comprehensive_health(sample, 3000)),
+        ('budget_manager', budget_manager.load_budget_data),
+        ('aggregates', lambda: spend_forecaster.forecast(load_aggregates())),
+    ]
+
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+        timings[name] = round(time.perf_counter() - started, 4)
+    logger.info("Warm-up finished: %s", timings)
+    return timings
+
+
+def start_worker():
+    """Per-worker start hook (runs after fork); workers share one market fetch via a lease"""
+    metrics.start_worker()
+    if WARM_MARKET_STATS:
+        import market_data
+        market_data._start_refresh()
+
+
+def shutdown():
+    """Release background resources when a worker exits"""
+    import market_data
+    from jobs import job_runner
+    market_data._EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    job_runner.shutdown()
@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SharedState:
+    """State shared by all worker processes through one local SQLite file.
+
+    Holds monotonically increasing counters (data versions), JSON values
+    grouped in namespaces, append-only logs, and expiring leases for
+    cross-process single-flight work. Each write to a namespace bumps its counter, so a
+    process keeps its own decoded copy and re-reads the namespace only
+    when that counter moved: a coherent read costs one primary-key lookup.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get("SHARED_STATE_DB", "shared_state.db")
+        self._local = threading.local()
+        # namespace -> (counter value, decoded {key: value})
+        self._namespaces: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after fork and when the path changes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid() or self._local.path != self.path:
+            if conn is not None and self._local.path != self.path:
+                with self._lock:
+                    self._namespaces.clear()
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,
+                    updated_at REAL NOT NULL, PRIMARY KEY (namespace, key)
+                );
+                CREATE TABLE IF NOT EXISTS logs (
+                    stream TEXT NOT NULL, seq INTEGER NOT NULL, value TEXT NOT NULL,
+                    created_at REAL NOT NULL, PRIMARY KEY (stream, seq)
+                );
+                CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+            """)
+            self._local.conn, self._local.pid, self._local.path = conn, os.getpid(), self.path
+        return conn
+
+    # Counters
+
+    def counter(self, name: str) -> int:
+        row = self._connection().execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def increment(self, name: str) -> int:
+        """Atomically add one to a counter and return the new value"""
+        return self._increment(self._connection(), name)
+
+    @staticmethod
+    def _increment(conn: sqlite3.Connection, name: str) -> int:
+        return conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1 RETURNING value",
+            (name,),
+        ).fetchone()[0]
+
+    # Namespaced JSON values
+
+    def items(self, namespace: str) -> Dict[str, Any]:
+        """All values in a namespace; decoded once per change and shared, so treat it as read-only"""
+        version = self.counter(f"ns:{namespace}")
+        with self._lock:
+            cached = self._namespaces.get(namespace)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            version = self.counter(f"ns:{namespace}")
+            rows = conn.execute("SELECT key, value FROM entries WHERE namespace = ?", (namespace,)).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        values = {key: json.loads(value) for key, value in rows}
+        with self._lock:
+            self._namespaces[namespace] = (version, values)
+        return values
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        return self.items(namespace).get(key, default)
+
+    def set(self, namespace: str, key: str, value: Any):
+        with self._write() as conn:
+            self._put(conn, namespace, key, value)
+
+    def setdefault(self, namespace: str, key: str, value: Any) -> Any:
+        """Store value unless the key exists; return whichever value is stored"""
+        with self._write() as conn:
+            row = conn.execute("SELECT value FROM entries WHERE namespace = ? AND key = ?",
+                               (namespace, key)).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+            self._put(conn, namespace, key, value)
+            return value
+
+    def append(self, namespace: str, key: str, item: Any):
+        """Append to a list value atomically across processes"""
+        with self._write() as conn:
+            row = conn.execute("SELECT value FROM entries WHERE namespace = ? AND key = ?",
+                               (namespace, key)).fetchone()
+            values = json.loads(row[0]) if row else []
+            values.append(item)
+            self._put(conn, namespace, key, values)
+
+    def delete(self, namespace: str, key: str):
+        with self._write() as conn:
+            deleted = conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).rowcount
+            if deleted:
+                self._increment(conn, f"ns:{namespace}")
+
+    def _put(self, conn: sqlite3.Connection, namespace: str, key: str, value: Any):
+        conn.execute(
+            "INSERT INTO entries (namespace, key, value, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (namespace, key, json.dumps(value), time.time()),
+        )
+        self._increment(conn, f"ns:{namespace}")
+
+    def _write(self):
+        return _WriteTransaction(self._connection())
+
+    # Append-only logs
+
+    def log_append(self, stream: str, value: Any, keep: int = 1000) -> int:
+        """Append value to a log and return its sequence number; only the newest `keep` entries are retained"""
+        with self._write() as conn:
+            seq = self._increment(conn, f"log:{stream}")
+            conn.execute("INSERT INTO logs (stream, seq, value, created_at) VALUES (?, ?, ?, ?)",
+                         (stream, seq, json.dumps(value), time.time()))
+            conn.execute("DELETE FROM logs WHERE stream = ? AND seq <= ?", (stream, seq - keep))
+            return seq
+
+    def log_since(self, stream: str, after: int, limit: int = 500) -> List[Tuple[int, Any]]:
+        """Entries after sequence number `after`, oldest first"""
+        rows = self._connection().execute(
+            "SELECT seq, value FROM logs WHERE stream = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (stream, after, limit),
+        ).fetchall()
+        return [(seq, json.loads(value)) for seq, value in rows]
+
+    def log_head(self, stream: str) -> int:
+        """Sequence number of the newest entry (0 when empty)"""
+        return self.counter(f"log:{stream}")
+
+    # Leases
+
+    def acquire(self, name: str, ttl: float, owner: Optional[str] = None) -> bool:
+        """Take the named lease for ttl seconds unless another live owner holds it"""
+        owner = owner or str(os.getpid())
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+                (name, owner, now + ttl),
+            )
+            return True
+
+    def release(self, name: str, owner: Optional[str] = None):
+        owner = owner or str(os.getpid())
+        with self._write() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+
+class _WriteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+# Global instance
+shared_state = SharedState()
@@ -3,6 +3,10 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 from typing import List, Dict, Any
 
+import numpy as np
+
+from metrics import metrics
+
 class SmartSuggestions:
     def __init__(self):
         # Spending benchmarks (monthly averages in EUR)
@@ -26,6 +30,7 @@ class SmartSuggestions:
             'savings_target': 0.2   # 20% of income
         }
     
+    @metrics.timed('suggestions')
     def analyze_spending_patterns(self, expenses: List[Dict], income: float = None) -> Dict[str, Any]:
         """
         Analyze spending patterns and generate insights
@@ -50,7 +55,54 @@ class SmartSuggestions:
             category_totals[category] += exp['amount']
             category_counts[category] += 1
         
-        # Calculate insights and suggestions
+        insights, suggestions = self._pattern_insights(
+            total_spending, avg_spending, category_totals, category_counts, income
+        )
+        
+        return {
+            'insights': insights,
+            'suggestions': suggestions,
+            'health_score': self._calculate_health_score(expenses, income),
+            'category_breakdown': dict(category_totals),
+            'total_spending': total_spending,
+            'average_spending': avg_spending
+        }
+    
+    @metrics.timed('suggestions')
+    def analyze_columns(self, columns, income: float = None) -> Dict[str, Any]:
+        """
+        analyze_spending_patterns for an ExpenseColumns batch, computed with array reductions
+        """
+        if not len(columns):
+            return self.analyze_spending_patterns([], income)
+        
+        amounts = columns.amounts
+        total_spending = float(amounts.sum())
+        avg_spending = total_spending / len(amounts)
+        totals = columns.category_totals()
+        counts = columns.category_counts()
+        category_totals = {name: float(totals[i]) for i, name in enumerate(columns.categories) if counts[i]}
+        category_counts = {name: int(counts[i]) for i, name in enumerate(columns.categories) if counts[i]}
+        
+        insights, suggestions = self._pattern_insights(
+            total_spending, avg_spending, category_totals, category_counts, income
+        )
+        
+        return {
+            'insights': insights,
+            'suggestions': suggestions,
+            'health_score': self._score_from_stats(
+                total_spending, float(amounts.var()), len(category_totals),
+                int(np.count_nonzero(amounts > 200)), income
+            ),
+            'category_breakdown': category_totals,
+            'total_spending': total_spending,
+            'average_spending': avg_spending
+        }
+    
+    def _pattern_insights(self, total_spending: float, avg_spending: float, category_totals: Dict[str, float],
+                          category_counts: Dict[str, int], income: float = None):
+        """Insights and suggestions from spending totals"""
         insights = []
         suggestions = []
         
@@ -104,14 +156,7 @@ class SmartSuggestions:
             insights.append(f"💰 You could save €{potential_savings:.2f} monthly")
             suggestions.append("Set up automatic savings transfers")
         
-        return {
-            'insights': insights,
-            'suggestions': suggestions,
-            'health_score': self._calculate_health_score(expenses, income),
-            'category_breakdown': dict(category_totals),
-            'total_spending': total_spending,
-            'average_spending': avg_spending
-        }
+        return insights, suggestions
     
     def _calculate_health_score(self, expenses: List[Dict], income: float = None) -> int:
         """
@@ -120,19 +165,26 @@ class SmartSuggestions:
         if not expenses:
             return 0
         
-        score = 0
         total_spending = sum(exp['amount'] for exp in expenses)
-        
-        # 1. Spending consistency (25 points)
         amounts = [exp['amount'] for exp in expenses]
         avg_amount = sum(amounts) / len(amounts)
         variance = sum((amount - avg_amount) ** 2 for amount in amounts) / len(amounts)
+        categories = set(exp['category'] for exp in expenses)
+        large_expenses = sum(1 for exp in expenses if exp['amount'] > 200)
+        
+        return self._score_from_stats(total_spending, variance, len(categories), large_expenses, income)
+    
+    def _score_from_stats(self, total_spending: float, variance: float, category_count: int,
+                          large_expenses: int, income: float = None) -> int:
+        """Health score (0-100) from summary statistics of the expenses"""
+        score = 0
+        
+        # 1. Spending consistency (25 points)
         consistency_score = max(0, 25 - (variance / 1000))
         score += consistency_score
         
         # 2. Category diversity (25 points)
-        categories = set(exp['category'] for exp in expenses)
-        diversity_score = min(25, len(categories) * 3)
+        diversity_score = min(25, category_count * 3)
         score += diversity_score
         
         # 3. Income ratio (25 points) - if income provided
@@ -149,12 +201,12 @@ class SmartSuggestions:
             score += ratio_score
         
         # 4. Spending control (25 points)
-        large_expenses = sum(1 for exp in expenses if exp['amount'] > 200)
         control_score = max(0, 25 - large_expenses * 2)
         score += control_score
         
         return min(100, int(score))
     
+    @metrics.timed('weekly_report')
     def generate_weekly_report(self, expenses: List[Dict], income: float = None) -> Dict[str, Any]:
         """
         Generate a weekly spending report with insights
@@ -200,6 +252,7 @@ class SmartSuggestions:
             'expense_count': len(recent_expenses)
         }
     
+    @metrics.timed('anomalies')
     def detect_anomalies(self, expenses: List[Dict]) -> List[Dict]:
         """
         Detect unusual spending patterns
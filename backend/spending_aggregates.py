@@ -0,0 +1,163 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import metrics
+
+
+def month_key(date_str: str) -> Optional[str]:
+    """Return the YYYY-MM bucket for an ISO date string, or None if it doesn't start with one"""
+    month = date_str[:7] if isinstance(date_str, str) else ''
+    year, dash, number = month[:4], month[4:5], month[5:7]
+    if year.isdigit() and dash == '-' and number.isdigit() and '01' <= number <= '12':
+        return month
+    return None
+
+
+def month_index(month: str) -> int:
+    """Convert YYYY-MM to a running month number so gaps and offsets are integer math"""
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def month_from_index(index: int) -> str:
+    """Inverse of month_index"""
+    return f"{index // 12}-{index % 12 + 1:02d}"
+
+
+class MonthlyAggregates:
+    """Per-month, per-category spend totals and counts.
+
+    Built once from the expense list (O(n)) and then patched per mutation,
+    so analyses over any number of months only touch months x categories
+    cells instead of every expense.
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    @classmethod
+    def from_expenses(cls, expenses: List[Dict]) -> 'MonthlyAggregates':
+        aggregates = cls()
+        for exp in expenses:
+            aggregates.add(exp)
+        return aggregates
+
+    def copy(self) -> 'MonthlyAggregates':
+        """Return an independent copy (months x categories cells, not expenses)"""
+        clone = MonthlyAggregates()
+        for month, cats in self.totals.items():
+            clone.totals[month].update(cats)
+            clone.counts[month].update(self.counts[month])
+        return clone
+
+    def add(self, expense: Dict):
+        """Account for a new expense"""
+        month = month_key(expense['date'])
+        if month is None:
+            # Expenses saved with a malformed date belong to no month
+            return
+        category = expense['category']
+        self.totals[month][category] += expense['amount']
+        self.counts[month][category] += 1
+
+    def remove(self, expense: Dict):
+        """Undo add() for a deleted expense"""
+        month = month_key(expense['date'])
+        if month is None:
+            return
+        category = expense['category']
+        if category not in self.counts.get(month, {}):
+            return
+        self.counts[month][category] -= 1
+        self.totals[month][category] -= expense['amount']
+        if self.counts[month][category] <= 0:
+            del self.counts[month][category]
+            del self.totals[month][category]
+            if not self.counts[month]:
+                del self.counts[month]
+                del self.totals[month]
+
+    def months(self) -> List[str]:
+        """Months that have at least one expense, oldest first"""
+        return sorted(self.totals.keys())
+
+    def categories(self) -> List[str]:
+        """All categories seen, sorted"""
+        return sorted({cat for month in self.totals.values() for cat in month})
+
+    def month_total(self, month: str) -> float:
+        return sum(self.totals.get(month, {}).values())
+
+    def month_count(self, month: str) -> int:
+        return sum(self.counts.get(month, {}).values())
+
+    def category_matrix(self, first_month: str, last_month: str,
+                        categories: Optional[List[str]] = None) -> Tuple[List[str], List[str], np.ndarray]:
+        """Return (categories, months, totals) for a contiguous calendar range.
+
+        totals has shape (len(categories), len(months)); months without
+        spending are zero-filled so row-wise statistics see real gaps.
+        """
+        if categories is None:
+            categories = self.categories()
+        start, end = month_index(first_month), month_index(last_month)
+        months = [month_from_index(i) for i in range(start, end + 1)]
+        row_of = {cat: row for row, cat in enumerate(categories)}
+        matrix = np.zeros((len(categories), len(months)))
+        for col, month in enumerate(months):
+            for cat, total in self.totals.get(month, {}).items():
+                row = row_of.get(cat)
+                if row is not None:
+                    matrix[row, col] = total
+        return categories, months, matrix
+
+
+class AggregateCache:
+    """Holds the MonthlyAggregates for the current data version.
+
+    Mutations that report their delta keep the cached aggregates current
+    without rescanning expenses; anything else just forces a rebuild on the
+    next read.
+    """
+
+    def __init__(self):
+        self._aggregates: Optional[MonthlyAggregates] = None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, expenses: List[Dict], version: int) -> MonthlyAggregates:
+        """Return aggregates for expenses at the given data version"""
+        with self._lock:
+            hit = self._aggregates is not None and self._version == version
+            if not hit:
+                self._aggregates = MonthlyAggregates.from_expenses(expenses)
+                self._version = version
+            aggregates = self._aggregates
+        metrics.cache_lookup('aggregates', hit)
+        return aggregates
+
+    def peek(self, version: int) -> Optional[MonthlyAggregates]:
+        """The cached aggregates if they are for `version`, without building or replacing anything"""
+        with self._lock:
+            return self._aggregates if self._version == version else None
+
+    def record(self, version: int, added: Optional[Dict] = None, removed: Optional[Dict] = None):
+        """Apply a committed mutation that moved the data from version - 1 to version"""
+        with self._lock:
+            if self._aggregates is None or self._version != version - 1:
+                self._aggregates = None
+                return
+            # Copy-on-write: readers may still be iterating the old object
+            aggregates = self._aggregates.copy()
+            if removed is not None:
+                aggregates.remove(removed)
+            if added is not None:
+                aggregates.add(added)
+            self._aggregates = aggregates
+            self._version = version
+
+# Global instance
+aggregate_cache = AggregateCache()
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every store (db.json, budget_data.json, shared_state.db, jobs.db) lives in the working
+# directory; run the tests in a scratch one so they never touch real data
+os.chdir(tempfile.mkdtemp(prefix="finance-tests-"))
+os.environ.setdefault("MARKET_OFFLINE", "1")
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import AdmissionController, Overloaded
+
+
+def controller(limit=1, queue=1, heavy_threads=3, concurrency=1, timeout=2.0, stream_threads=1):
+    return AdmissionController(heavy_threads=heavy_threads, concurrency=concurrency, timeout=timeout,
+                               limits={'test': (limit, queue)}, stream_threads=stream_threads)
+
+
+class Holder:
+    """Runs a request under the gate on its own thread until release()"""
+
+    def __init__(self, control, name='test'):
+        self.admitted = threading.Event()
+        self._release = threading.Event()
+        self.error = None
+
+        def run():
+            try:
+                with control.admit(name):
+                    self.admitted.set()
+                    self._release.wait(5)
+            except Overloaded as e:
+                self.error = e
+                self.admitted.set()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def release(self):
+        self._release.set()
+        self._thread.join(5)
+
+
+def shed_reason(control, name='test'):
+    with pytest.raises(Overloaded) as info:
+        with control.admit(name):
+            pass
+    assert info.value.retry_after >= 1
+    return info.value.reason
+
+
+def test_admitted_straight_away():
+    control = controller()
+    gate = control._gates['test']
+    with control.admit('test'):
+        assert (gate.running, gate.queued, control._held) == (1, 0, 1)
+    assert (gate.running, gate.queued, control._held) == (0, 0, 0)
+
+
+def test_queued_request_starts_when_the_slot_frees():
+    control = controller()
+    gate = control._gates['test']
+    first = Holder(control)
+    assert first.admitted.wait(5)
+
+    second = Holder(control)
+    deadline = time.monotonic() + 5
+    while gate.queued == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert not second.admitted.is_set()
+    first.release()
+    assert second.admitted.wait(5) and second.error is None
+    assert gate.running == 1
+    second.release()
+    assert (gate.running, gate.queued, control._held) == (0, 0, 0)
+
+
+def test_queue_full_is_shed_immediately():
+    control = controller(queue=0)
+    holder = Holder(control)
+    assert holder.admitted.wait(5)
+    assert shed_reason(control) == 'queue_full'
+    assert control._held == 1
+    holder.release()
+
+
+def test_queued_request_times_out():
+    control = controller(timeout=0.05)
+    gate = control._gates['test']
+    holder = Holder(control)
+    assert holder.admitted.wait(5)
+    assert shed_reason(control) == 'timeout'
+    assert (gate.queued, control._held, control._waiting) == (0, 1, [])
+    holder.release()
+    assert (gate.running, control._held) == (0, 0)
+
+
+def test_thread_budget_sheds_as_overloaded():
+    control = controller(limit=2, heavy_threads=1)
+    holder = Holder(control)
+    assert holder.admitted.wait(5)
+    assert shed_reason(control) == 'overloaded'
+    holder.release()
+    with control.admit('test'):
+        pass
+
+
+def test_slot_handed_over_as_the_wait_times_out(monkeypatch):
+    control = controller(timeout=0.01)
+    gate = control._gates['test']
+    # Occupy the slot without a thread, so the hand-off can be timed exactly
+    control._enter(gate)
+
+    class HandOverOnTimeout(threading.Event):
+        def wait(self, timeout=None):
+            # The running request finishes just as the queued one gives up waiting
+            control._leave(gate, 0.0)
+            return False
+
+    monkeypatch.setattr(admission.threading, 'Event', HandOverOnTimeout)
+    with control.admit('test'):
+        assert (gate.running, gate.queued, control._held) == (1, 0, 1)
+    assert (gate.running, gate.queued, control._held) == (0, 0, 0)
+
+
+def test_disabled_controller_admits_everything():
+    control = controller(heavy_threads=0)
+    for _ in range(3):
+        with control.admit('test'):
+            pass
+
+
+def test_stream_slots():
+    control = controller(stream_threads=1)
+    assert control.open_stream()
+    assert not control.open_stream()
+    control.close_stream()
+    assert control.open_stream()
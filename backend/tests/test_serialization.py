@@ -0,0 +1,63 @@
+import math
+from datetime import date
+
+import numpy as np
+import pytest
+
+from serialization import Serializer, orjson
+
+ENCODERS = ["stdlib"] + (["orjson"] if orjson is not None else [])
+
+EXPENSES = {
+    "expenses": [
+        {"id": 1, "amount": 4.5, "category": "Food", "description": "Café crème", "date": "2024-05-01"},
+        {"id": 2, "amount": 1234.56, "category": "Rent", "description": "May rent", "date": "2024-05-02",
+         "ai_categorization": {"suggested_category": "Rent", "confidence": 0.93, "alternatives": []}},
+    ]
+}
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_store_round_trip(tmp_path, encoder):
+    serializer = Serializer(encoder)
+    path = tmp_path / "db.json"
+    serializer.write_file(str(path), EXPENSES)
+    assert serializer.read_file(str(path)) == EXPENSES
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_encoders_agree(encoder):
+    value = {"total": np.float64(12.5), "count": np.int64(3), "series": np.arange(3), "as_of": date(2024, 5, 1)}
+    assert Serializer(encoder).loads(Serializer(encoder).dumps(value)) == \
+        {"total": 12.5, "count": 3, "series": [0, 1, 2], "as_of": "2024-05-01"}
+
+
+@pytest.fixture
+def client():
+    from app import app, serializer
+    serializer.write_file("db.json", {"expenses": []})
+    return app.test_client()
+
+
+@pytest.mark.parametrize("amount", ["nan", "inf", "-Infinity", "ten"])
+def test_non_finite_amount_is_rejected(client, amount):
+    response = client.post("/expenses", json={"amount": amount, "description": "Coffee", "date": "2024-05-01"})
+    assert response.status_code == 400
+    assert client.get("/expenses").get_json() == []
+
+
+def test_saved_expense_reads_back(client):
+    response = client.post("/expenses", json={"amount": "4.5", "description": "Coffee", "date": "2024-05-01"})
+    assert response.status_code == 201
+    stored = client.get("/expenses").get_json()
+    assert stored == [response.get_json()]
+    assert all(math.isfinite(expense["amount"]) for expense in stored)
+    assert client.get("/budget/summary").status_code == 200
+
+
+@pytest.mark.parametrize("body, mimetype", [
+    (b'{"expenses": [1, null, 3]}', "application/json"),
+    (b'{"category": "Food"}\n[2, "Food"]\n', "application/x-ndjson"),
+])
+def test_missing_analyze_amount_is_rejected(client, body, mimetype):
+    assert client.post("/analyze", data=body, content_type=mimetype).status_code == 400
@@ -0,0 +1,11 @@
+"""Production WSGI entry point.
+
+    cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+Engines are warmed up at import time; with preload_app (the default in
+gunicorn.conf.py) that happens once in the master and the workers share it.
+"""
+from app import app
+from serving import warm_up
+
+warm_up()
@@ -18,75 +18,44 @@ export default function Budget() {
     'Phone', 'Insurance', 'Subscriptions', 'Loan Payments'
   ];
 
-  // Load budget data on component mount
+  // Load everything the page shows in one request on component mount
   useEffect(() => {
-    loadBudgetData();
-    loadBudgetSummary();
-    loadSavingsRecommendations();
-    loadInvestmentRecommendations();
-    loadVariableExpenses();
+    loadDashboard();
   }, []);
 
-  const loadBudgetData = async () => {
-    try {
-      // Load income
-      const incomeResponse = await fetch('http://127.0.0.1:5000/budget/income');
-      if (incomeResponse.ok) {
-        const incomeData = await incomeResponse.json();
-        setMonthlyIncome(incomeData.monthly_income || 0);
-      }
-
-      // Load fixed costs
-      const fixedCostsResponse = await fetch('http://127.0.0.1:5000/budget/fixed-costs');
-      if (fixedCostsResponse.ok) {
-        const fixedCostsData = await fixedCostsResponse.json();
-        setFixedCosts(fixedCostsData.fixed_costs || []);
-      }
-
-      // Load savings target
-      const savingsResponse = await fetch('http://127.0.0.1:5000/budget/savings-target');
-      if (savingsResponse.ok) {
-        const savingsData = await savingsResponse.json();
-        setSavingsTarget((savingsData.savings_target || 0) * 100);
-      }
-    } catch (error) {
-      console.error('Error loading budget data:', error);
-    }
-  };
+  const dashboardSections = [
+    'income', 'fixed_costs', 'savings_target', 'summary',
+    'recommendations', 'investment_recommendations', 'variable_expenses'
+  ];
 
-  const loadBudgetSummary = async () => {
+  // Fetch the given sections from /dashboard (one data read on the backend).
+  // A busy server answers 503 with Retry-After: wait that long and try again a few times.
+  const loadDashboard = async (sections = dashboardSections, attempt = 1) => {
     try {
-      const response = await fetch('http://127.0.0.1:5000/budget/summary');
-      if (response.ok) {
-        const data = await response.json();
-        setBudgetSummary(data);
+      const response = await fetch(`http://127.0.0.1:5000/dashboard?sections=${sections.join(',')}`);
+      if (response.status === 503 && attempt < 3) {
+        const seconds = Number(response.headers.get('Retry-After')) || 1;
+        await new Promise(resolve => setTimeout(resolve, Math.min(seconds, 10) * 1000));
+        return loadDashboard(sections, attempt + 1);
       }
-    } catch (error) {
-      console.error('Error loading budget summary:', error);
-    }
-  };
-
-  const loadSavingsRecommendations = async () => {
-    try {
-      const response = await fetch('http://127.0.0.1:5000/budget/recommendations');
-      if (response.ok) {
-        const data = await response.json();
-        setSavingsRecommendations(data);
+      if (!response.ok) {
+        console.error('Error loading dashboard:', response.status);
+        alert('Could not load your budget, please try again in a moment');
+        return;
       }
-    } catch (error) {
-      console.error('Error loading savings recommendations:', error);
-    }
-  };
-
-  const loadInvestmentRecommendations = async () => {
-    try {
-      const response = await fetch('http://127.0.0.1:5000/budget/investment-recommendations');
-      if (response.ok) {
-        const data = await response.json();
-        setInvestmentRecommendations(data);
+      const { sections: data, errors } = await response.json();
+      if (Object.keys(errors).length > 0) {
+        console.error('Error loading dashboard sections:', errors);
       }
+      if (data.income) setMonthlyIncome(data.income.monthly_income || 0);
+      if (data.fixed_costs) setFixedCosts(data.fixed_costs.fixed_costs || []);
+      if (data.savings_target) setSavingsTarget((data.savings_target.savings_target || 0) * 100);
+      if (data.summary) setBudgetSummary(data.summary);
+      if (data.recommendations) setSavingsRecommendations(data.recommendations);
+      if (data.investment_recommendations) setInvestmentRecommendations(data.investment_recommendations);
+      if (data.variable_expenses) setVariableExpenses(data.variable_expenses.variable_expenses || []);
     } catch (error) {
-      console.error('Error loading investment recommendations:', error);
+      console.error('Error loading dashboard:', error);
     }
   };
 
@@ -124,8 +93,7 @@ export default function Budget() {
       });
 
       if (response.ok) {
-        await loadBudgetSummary();
-        await loadSavingsRecommendations();
+        await loadDashboard(['summary', 'recommendations']);
         alert('Income updated successfully!');
       }
     } catch (error) {
@@ -151,8 +119,7 @@ export default function Budget() {
       });
 
       if (response.ok) {
-        await loadBudgetSummary();
-        await loadSavingsRecommendations();
+        await loadDashboard(['summary', 'recommendations']);
         alert('Savings target updated successfully!');
       }
     } catch (error) {
@@ -183,9 +150,7 @@ export default function Budget() {
 
       if (response.ok) {
         setNewFixedCost({ category: '', amount: '', description: '' });
-        await loadBudgetData();
-        await loadBudgetSummary();
-        await loadSavingsRecommendations();
+        await loadDashboard(['fixed_costs', 'summary', 'recommendations']);
         alert('Fixed cost added successfully!');
       }
     } catch (error) {
@@ -208,9 +173,7 @@ export default function Budget() {
       });
 
       if (response.ok) {
-        await loadBudgetData();
-        await loadBudgetSummary();
-        await loadSavingsRecommendations();
+        await loadDashboard(['fixed_costs', 'summary', 'recommendations']);
         alert('Fixed cost removed successfully!');
       }
     } catch (error) {
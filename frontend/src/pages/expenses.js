@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { ClerkProvider, SignedIn, SignedOut, SignIn } from '@clerk/clerk-react';
 
 export default function Expenses() {
@@ -12,6 +12,8 @@ export default function Expenses() {
   const [aiInsights, setAiInsights] = useState(null);
   const [healthScore, setHealthScore] = useState(null);
   const [suggestedCategory, setSuggestedCategory] = useState(null);
+  // True while the /events stream is open; mutations then arrive as deltas instead of refetches
+  const liveUpdates = useRef(false);
   
 
   const categories = [
@@ -19,43 +21,60 @@ export default function Expenses() {
     'Bills', 'Healthcare', 'Education', 'Travel', 'Other'
   ];
 
-  // Fetch expenses from backend
-  const fetchExpenses = async () => {
+  // Fetch expenses, AI insights and health score in one request
+  // A busy server answers 503 with Retry-After: wait that long and try again a few times
+  const fetchDashboard = async (attempt = 1) => {
     try {
-      const response = await fetch('http://127.0.0.1:5000/expenses');
-      if (response.ok) {
-        const data = await response.json();
-        setExpenses(data);
+      const response = await fetch('http://127.0.0.1:5000/dashboard?sections=expenses,insights,health');
+      if (response.status === 503 && attempt < 3) {
+        const seconds = Number(response.headers.get('Retry-After')) || 1;
+        await new Promise(resolve => setTimeout(resolve, Math.min(seconds, 10) * 1000));
+        return fetchDashboard(attempt + 1);
       }
-    } catch (error) {
-      console.error('Error fetching expenses:', error);
-    }
-  };
-
-  // Get AI insights
-  const fetchAiInsights = async () => {
-    try {
-      const response = await fetch('http://127.0.0.1:5000/ai/insights');
       if (response.ok) {
-        const data = await response.json();
-        setAiInsights(data);
+        const { sections, errors } = await response.json();
+        if (Object.keys(errors).length > 0) {
+          console.error('Error fetching dashboard sections:', errors);
+        }
+        if (sections.expenses) setExpenses(sections.expenses);
+        if (sections.insights) setAiInsights(sections.insights);
+        if (sections.health) setHealthScore(sections.health);
+      } else {
+        console.error('Error fetching dashboard:', response.status);
+        alert('Could not load your expenses, please try again in a moment');
       }
     } catch (error) {
-      console.error('Error fetching AI insights:', error);
+      console.error('Error fetching dashboard:', error);
     }
   };
 
-  // Get financial health score
-  const fetchHealthScore = async () => {
-    try {
-      const response = await fetch('http://127.0.0.1:5000/ai/health');
-      if (response.ok) {
-        const data = await response.json();
-        setHealthScore(data);
-      }
-    } catch (error) {
-      console.error('Error fetching health score:', error);
-    }
+  // Patch local state with a delta pushed by /events after an expense change
+  const applyExpenseEvent = (type, delta) => {
+    const { expense, anomalies, health } = delta;
+    setExpenses(prev => {
+      const others = prev.filter(exp => exp.id !== expense.id);
+      if (type === 'expense.deleted') return others;
+      if (type === 'expense.added') return [...others, expense];
+      return prev.map(exp => (exp.id === expense.id ? expense : exp));
+    });
+    setAiInsights(prev => prev && {
+      ...prev,
+      anomalies: [
+        ...(prev.anomalies || []).filter(anomaly => !anomalies.cleared.includes(anomaly.expense.id)
+          && !anomalies.added.some(added => added.expense.id === anomaly.expense.id)),
+        ...anomalies.added
+      ],
+      health_score: health.overall_score,
+      health_grade: health.grade,
+      health_status: health.status,
+      total_expenses: delta.total_expenses
+    });
+    setHealthScore(prev => prev && {
+      ...prev,
+      overall_score: health.overall_score,
+      grade: health.grade,
+      status: health.status
+    });
   };
 
   // AI categorization for description
@@ -112,9 +131,7 @@ export default function Expenses() {
         setDate(new Date().toISOString().split('T')[0]);
         setCategory('Food');
         setSuggestedCategory(null);
-        fetchExpenses(); // Refresh the list
-        fetchAiInsights(); // Refresh AI insights
-        fetchHealthScore(); // Refresh health score
+        if (!liveUpdates.current) fetchDashboard(); // Otherwise the /events delta updates the page
       }
     } catch (error) {
       console.error('Error adding expense:', error);
@@ -130,9 +147,7 @@ export default function Expenses() {
       });
 
       if (response.ok) {
-        fetchExpenses(); // Refresh the list
-        fetchAiInsights(); // Refresh AI insights
-        fetchHealthScore(); // Refresh health score
+        if (!liveUpdates.current) fetchDashboard(); // Otherwise the /events delta updates the page
       }
     } catch (error) {
       console.error('Error deleting expense:', error);
@@ -175,11 +190,27 @@ export default function Expenses() {
     }
   };
 
-  // Load expenses and AI data on component mount
+  // Subscribe to live updates, then load expenses and AI data on component mount
   useEffect(() => {
-    fetchExpenses();
-    fetchAiInsights();
-    fetchHealthScore();
+    if (typeof EventSource === 'undefined') {
+      fetchDashboard();
+      return undefined;
+    }
+    // Opened before the first load so no change falls between the two; deltas are idempotent
+    const events = new EventSource('http://127.0.0.1:5000/events');
+    const onDelta = (event) => applyExpenseEvent(event.type, JSON.parse(event.data));
+    ['expense.added', 'expense.deleted', 'expense.recategorized'].forEach(type => {
+      events.addEventListener(type, onDelta);
+    });
+    // The server couldn't tell us what changed; reload everything
+    events.addEventListener('reset', () => fetchDashboard());
+    events.onopen = () => { liveUpdates.current = true; };
+    events.onerror = () => { liveUpdates.current = false; };
+    fetchDashboard();
+    return () => {
+      liveUpdates.current = false;
+      events.close();
+    };
   }, []);
 
   // Auto-categorize when description changes